@@ -1,5 +1,6 @@
 import os
 import json
+import re
 from typing import Any, Dict
 
 import httpx
@@ -84,7 +85,58 @@ def format_markdown_with_refs(blocks_json: str) -> str:
 @function_tool
 def chem_calc(smiles: str) -> str:
     from app.tools.local import chem_calc as _chem
-    return json.dumps(_chem(smiles))
+    # Accept several SMILES separated by whitespace or commas (neither occurs in SMILES)
+    batch = [s for s in re.split(r"[\s,]+", smiles or "") if s]
+    if len(batch) == 1:
+        return json.dumps(_chem(batch[0]))
+    return json.dumps({"results": _chem(batch)})
+
+
+@function_tool
+@retry(
+    reraise=True,
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, min=0.2, max=2),
+    retry=retry_if_exception_type(httpx.HTTPError),
+)
+async def chem_properties_batch(smiles_json: str) -> str:
+    start = time.perf_counter()
+    try:
+        smiles = json.loads(smiles_json)
+    except Exception:
+        smiles = [s for s in re.split(r"[\s,]+", smiles_json or "") if s]
+    if isinstance(smiles, str):
+        smiles = [smiles]
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60) as client:
+        resp = await client.post("/services/chem/properties:batch", json={"smiles": smiles}, headers=await _get_headers())
+        resp.raise_for_status()
+        out = resp.json()
+    elapsed = int((time.perf_counter() - start) * 1000)
+    trace = TOOL_TRACE_CVAR.get()
+    if trace is not None:
+        trace.append({"tool": "chem.properties_batch", "args": {"count": len(smiles)}, "t_ms": elapsed})
+    return json.dumps(out)
+
+
+@function_tool
+@retry(
+    reraise=True,
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, min=0.2, max=2),
+    retry=retry_if_exception_type(httpx.HTTPError),
+)
+async def chem_similarity(smiles: str, k: int = 10, threshold: float = 0.0, substructure: str | None = None) -> str:
+    start = time.perf_counter()
+    body = {"smiles": smiles, "k": k, "threshold": threshold, "substructure": substructure}
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=30) as client:
+        resp = await client.post("/services/chem/similarity", json=body, headers=await _get_headers())
+        resp.raise_for_status()
+        out = resp.json()
+    elapsed = int((time.perf_counter() - start) * 1000)
+    trace = TOOL_TRACE_CVAR.get()
+    if trace is not None:
+        trace.append({"tool": "chem.similarity", "args": {"smiles": smiles[:120], "k": k}, "t_ms": elapsed})
+    return json.dumps(out)
 
 
 @function_tool
@@ -171,7 +223,9 @@ def _archivist_instructions() -> str:
 
 def _alchemist_instructions() -> str:
     return (
-        "You are ALCHEMIST, a chemistry planning agent. Use chem tools. "
+        "You are ALCHEMIST, a chemistry planning agent. Use chem tools; score many candidates "
+        "at once with chem_properties_batch rather than one chem_calc call per molecule, and "
+        "check proposals against known compounds with chem_similarity. "
         "Output a table of candidates, reasoning, and a safety disclaimer."
     )
 
@@ -241,7 +295,7 @@ def build_agents(mcp_servers: list[Any] | None = None) -> dict[str, Any]:
     alchemist = Agent(
         name="ALCHEMIST",
         instructions=_alchemist_instructions(),
-        tools=[chem_design, chem_calc],
+        tools=[chem_design, chem_calc, chem_properties_batch, chem_similarity],
         model=os.getenv("MODEL_ALCHEMIST", "gpt-4o-mini"),
         mcp_servers=mcp_servers or [],
         model_settings=common_settings,
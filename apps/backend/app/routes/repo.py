@@ -1,10 +1,28 @@
 import os
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Literal, Optional
-import subprocess
+from typing import List, Optional
+import json
+import mimetypes
 import shlex
 
+from app.workspace.exec import POOL as EXEC_POOL, ExecLimits, ExecQueueFull
+from app.workspace.files import (
+    PatchError,
+    apply_edits,
+    apply_unified_diff,
+    atomic_write,
+    file_hash,
+    iter_range,
+    parse_range,
+    path_lock,
+    read_range,
+)
+
+from app.workspace.search import get_search_index
+from app.workspace.tree import get_tree_cache
+
 router = APIRouter()
 
 # Resolve monorepo root: apps/backend/app/routes -> ../../../../ (repo root)
@@ -12,13 +30,10 @@ BST_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '
 REPOS = {
     "demo": os.path.join(BST_ROOT, 'examples', 'hello-world-trial')
 }
-
-
-class TreeNode(BaseModel):
-    name: str
-    path: str
-    type: Literal['file', 'dir']
-    children: Optional[List['TreeNode']] = None
+# Per-repo exec limits; repos not listed use the RUNIX_EXEC_* defaults
+EXEC_LIMITS = {
+    "demo": ExecLimits(timeout_s=120, memory_mb=1024, cpu_s=120),
+}
 
 
 def _is_allowed(base: str, target: str) -> bool:
@@ -26,73 +41,169 @@ def _is_allowed(base: str, target: str) -> bool:
     return rel and not rel.startswith('..') and not os.path.isabs(rel)
 
 
-def _build_tree(dir_path: str, base: str, depth: int = 0, max_depth: int = 4) -> List[TreeNode]:
-    if depth > max_depth:
-        return []
-    nodes: List[TreeNode] = []
-    try:
-        for name in sorted(os.listdir(dir_path)):
-            if name.startswith('.') or name in ('node_modules', 'dist', 'build'):
-                continue
-            full = os.path.join(dir_path, name)
-            if not _is_allowed(base, full):
-                continue
-            if os.path.isdir(full):
-                nodes.append(TreeNode(name=name, path=os.path.relpath(full, base), type='dir', children=_build_tree(full, base, depth+1, max_depth)))
-            else:
-                nodes.append(TreeNode(name=name, path=os.path.relpath(full, base), type='file'))
-    except Exception:
-        pass
-    # sort with dirs first
-    nodes.sort(key=lambda n: (0 if n.type == 'dir' else 1, n.name))
-    return nodes
-
-
 @router.get('/repo/tree')
-def get_repo_tree(repo: str = Query('demo')):
+def get_repo_tree(
+    request: Request,
+    repo: str = Query('demo'),
+    path: str = Query(''),
+    depth: int = Query(5, ge=1, le=32),
+):
     base = REPOS.get(repo)
     if not base:
         raise HTTPException(404, 'Unknown repo')
     if not os.path.exists(base):
         raise HTTPException(404, 'Repo path missing')
-    return {"repo": repo, "root": os.path.basename(base), "tree": [t.model_dump() for t in _build_tree(base, base)]}
+    path = os.path.normpath(path).replace('\\', '/').strip('/') if path else ''
+    if path and not _is_allowed(base, os.path.join(base, path)):
+        raise HTTPException(400, 'Invalid path')
+    if path and not os.path.isdir(os.path.join(base, path)):
+        raise HTTPException(404, 'Directory not found')
+    etag, tree = get_tree_cache(base).tree(path, depth)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"repo": repo, "root": os.path.basename(base), "path": path, "tree": tree}, headers=headers)
 
 
 class FileWrite(BaseModel):
     repo: str
     path: str
     content: str
+    base_hash: Optional[str] = None  # sha256 the client last read; mismatch -> 412
 
 
-@router.get('/repo/file')
-def read_file(repo: str = Query('demo'), path_q: str = Query('')):
+class FileEdit(BaseModel):
+    start: int
+    end: int
+    text: str = ''
+
+
+class FilePatch(BaseModel):
+    repo: str
+    path: str
+    base_hash: Optional[str] = None
+    edits: Optional[List[FileEdit]] = None
+    diff: Optional[str] = None  # unified diff, alternative to edits
+
+
+def _resolve(repo: str, path: str) -> tuple[str, str, str]:
+    """Return ``(base, target, rel)`` for a path inside a known repo."""
     base = REPOS.get(repo)
-    if not base or not path_q:
+    if not base or not path:
         raise HTTPException(400, 'Missing')
-    target = os.path.join(base, path_q)
+    target = os.path.join(base, path)
     rel = os.path.relpath(target, base)
-    if rel.startswith('..'):
+    if rel.startswith('..') or os.path.isabs(path):
         raise HTTPException(400, 'Invalid path')
+    return base, target, rel
+
+
+def _precondition(target: str, base_hash: Optional[str], if_match: Optional[str]) -> None:
+    expected = base_hash or (if_match.strip('"') if if_match else None)
+    if expected is None:
+        return
+    current = file_hash(target)
+    if current != expected:
+        raise HTTPException(412, {"error": "File changed since it was read", "hash": current})
+
+
+def _after_write(base: str, rel: str) -> None:
+    get_tree_cache(base).invalidate(rel)
+    get_search_index(base).update_path(rel)
+
+
+@router.get('/repo/file')
+def read_file(
+    repo: str = Query('demo'),
+    path_q: str = Query(''),
+    offset: int = Query(0, ge=0),
+    length: Optional[int] = Query(None, ge=0),
+):
+    """Read a text file, optionally a byte range of it.
+
+    The response's ``hash`` is the sha256 of the whole file, to be sent back
+    as ``base_hash`` on writes.
+    """
+    base, target, rel = _resolve(repo, path_q)
     try:
-        with open(target, 'r', encoding='utf-8') as f:
-            return {"repo": repo, "path": path_q, "content": f.read()}
-    except Exception as e:
+        size = os.path.getsize(target)
+        data = read_range(target, offset, length)
+        digest = file_hash(target)
+    except FileNotFoundError:
+        raise HTTPException(404, 'File not found')
+    except Exception:
         raise HTTPException(500, 'Failed to read file')
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError:
+        if offset or length is not None:
+            # a range may split a multi-byte character at either end
+            content = data.decode('utf-8', errors='replace')
+        else:
+            raise HTTPException(415, 'Binary file: use /repo/file/raw')
+    return JSONResponse(
+        {"repo": repo, "path": path_q, "content": content, "hash": digest, "size": size, "offset": offset, "length": len(data)},
+        headers={"ETag": f'"{digest}"'},
+    )
+
+
+@router.get('/repo/file/raw')
+def download_file(request: Request, repo: str = Query('demo'), path_q: str = Query('')):
+    """Stream a file (any type) with HTTP Range support."""
+    base, target, rel = _resolve(repo, path_q)
+    if not os.path.isfile(target):
+        raise HTTPException(404, 'File not found')
+    size = os.path.getsize(target)
+    headers = {"Accept-Ranges": "bytes", "Content-Disposition": f'inline; filename="{os.path.basename(target)}"'}
+    try:
+        rng = parse_range(request.headers.get('range'), size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    media_type = mimetypes.guess_type(target)[0] or 'application/octet-stream'
+    if rng is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_range(target, 0, size - 1), media_type=media_type, headers=headers)
+    start, end = rng
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_range(target, start, end), status_code=206, media_type=media_type, headers=headers)
 
 
 @router.post('/repo/file')
-def write_file(body: FileWrite):
-    base = REPOS.get(body.repo)
-    if not base or not body.path:
-        raise HTTPException(400, 'Missing')
-    target = os.path.join(base, body.path)
-    rel = os.path.relpath(target, base)
-    if rel.startswith('..'):
-        raise HTTPException(400, 'Invalid path')
-    os.makedirs(os.path.dirname(target), exist_ok=True)
-    with open(target, 'w', encoding='utf-8') as f:
-        f.write(body.content)
-    return {"ok": True}
+def write_file(body: FileWrite, if_match: Optional[str] = Header(default=None)):
+    base, target, rel = _resolve(body.repo, body.path)
+    with path_lock(target):
+        _precondition(target, body.base_hash, if_match)
+        digest = atomic_write(target, body.content.encode('utf-8'))
+    _after_write(base, rel)
+    return {"ok": True, "hash": digest}
+
+
+@router.patch('/repo/file')
+def patch_file(body: FilePatch, if_match: Optional[str] = Header(default=None)):
+    """Apply character-offset edits or a unified diff, atomically."""
+    if (body.edits is None) == (body.diff is None):
+        raise HTTPException(400, 'Provide exactly one of edits or diff')
+    base, target, rel = _resolve(body.repo, body.path)
+    with path_lock(target):
+        _precondition(target, body.base_hash, if_match)
+        try:
+            with open(target, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        except FileNotFoundError:
+            text = ''
+        except UnicodeDecodeError:
+            raise HTTPException(415, 'Cannot patch a binary file')
+        try:
+            if body.edits is not None:
+                new_text = apply_edits(text, [e.model_dump() for e in body.edits])
+            else:
+                new_text = apply_unified_diff(text, body.diff or '')
+        except PatchError as e:
+            raise HTTPException(409, str(e))
+        digest = atomic_write(target, new_text.encode('utf-8'))
+    _after_write(base, rel)
+    return {"ok": True, "hash": digest, "size": len(new_text.encode('utf-8'))}
 
 
 @router.get('/repo/branches')
@@ -102,41 +213,19 @@ def get_branches(repo: str = Query('demo')):
 
 
 @router.get('/repo/search')
-def search_repo(repo: str = Query('demo'), q: str = Query('')):
+def search_repo(
+    repo: str = Query('demo'),
+    q: str = Query(''),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
     base = REPOS.get(repo)
     if not base:
         raise HTTPException(404, 'Unknown repo')
     if not q:
-        return {"results": []}
-    results = []
-    ql = q.lower()
-    for root, dirs, files in os.walk(base):
-        # skip hidden / heavy dirs
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', 'dist', 'build')]
-        for f in files:
-            if f.startswith('.'):
-                continue
-            p = os.path.join(root, f)
-            rel = os.path.relpath(p, base)
-            # filename match
-            if ql in f.lower():
-                results.append({"path": rel, "preview": f"{f}"})
-                continue
-            try:
-                # small text files only
-                if os.path.getsize(p) <= 200_000:
-                    with open(p, 'r', encoding='utf-8', errors='ignore') as fh:
-                        for i, line in enumerate(fh.readlines()[:500]):
-                            if ql in line.lower():
-                                results.append({"path": rel, "line": i+1, "preview": line.strip()[:200]})
-                                break
-            except Exception:
-                pass
-            if len(results) >= 50:
-                break
-        if len(results) >= 50:
-            break
-    return {"results": results}
+        return {"results": [], "total": 0, "offset": offset, "limit": limit}
+    total, results = get_search_index(base).search(q, offset=offset, limit=limit)
+    return {"results": results, "total": total, "offset": offset, "limit": limit}
 
 
 class ExecRequest(BaseModel):
@@ -148,38 +237,89 @@ class ExecRequest(BaseModel):
 ALLOW_CMDS = {"ls", "cat", "head", "tail", "wc", "pwd", "echo", "python", "python3", "mkdir", "touch"}
 
 
-@router.post('/repo/exec')
-def exec_repo(body: ExecRequest):
+def _prepare_exec(body: ExecRequest) -> tuple[str, str, str]:
+    """Validate an exec request; returns ``(base, cwd, cmd)``."""
     base = REPOS.get(body.repo)
     if not base:
         raise HTTPException(404, 'Unknown repo')
     cmd = body.cmd.strip()
-    if not cmd:
-        return {"ok": True, "code": 0, "stdout": "", "stderr": ""}
     try:
         parts = shlex.split(cmd)
-        if parts[0] not in ALLOW_CMDS:
-            raise HTTPException(400, f"Command not allowed: {parts[0]}")
-        # Working directory under repo root
-        cwd = base
-        if body.cwd:
-            rel = os.path.normpath(body.cwd).replace('\\', '/')
-            if rel.startswith('..') or rel.startswith('/'):
-                raise HTTPException(400, 'Invalid cwd')
-            cwd = os.path.join(base, rel)
-        # Validate args: reject absolute/parent paths
-        for p in parts[1:]:
-            if p.startswith('/') or '..' in p:
-                raise HTTPException(400, 'Invalid path argument')
-        # Restrict python to run_demo.py only
-        if parts[0] in ("python", "python3"):
-            if len(parts) < 2 or not parts[1].endswith('run_demo.py'):
-                raise HTTPException(400, 'Only run_demo.py is allowed')
-        res = subprocess.run(cmd, cwd=cwd, shell=True, capture_output=True, text=True, timeout=15)
-        return {"ok": True, "code": res.returncode, "stdout": res.stdout, "stderr": res.stderr}
-    except HTTPException:
-        raise
-    except Exception as e:
+    except ValueError:
+        raise HTTPException(400, 'Invalid command')
+    if parts[0] not in ALLOW_CMDS:
+        raise HTTPException(400, f"Command not allowed: {parts[0]}")
+    # Working directory under repo root
+    cwd = base
+    if body.cwd:
+        rel = os.path.normpath(body.cwd).replace('\\', '/')
+        if rel.startswith('..') or rel.startswith('/'):
+            raise HTTPException(400, 'Invalid cwd')
+        cwd = os.path.join(base, rel)
+    # Validate args: reject absolute/parent paths
+    for p in parts[1:]:
+        if p.startswith('/') or '..' in p:
+            raise HTTPException(400, 'Invalid path argument')
+    # Restrict python to run_demo.py only
+    if parts[0] in ("python", "python3"):
+        if len(parts) < 2 or not parts[1].endswith('run_demo.py'):
+            raise HTTPException(400, 'Only run_demo.py is allowed')
+    return base, cwd, cmd
+
+
+def _submit(body: ExecRequest):
+    base, cwd, cmd = _prepare_exec(body)
+    try:
+        return EXEC_POOL.submit(body.repo, cmd, cwd, EXEC_LIMITS.get(body.repo, ExecLimits()))
+    except ExecQueueFull as e:
+        raise HTTPException(429, str(e))
+
+
+@router.post('/repo/exec')
+async def exec_repo(body: ExecRequest):
+    if not body.cmd.strip():
+        return {"ok": True, "code": 0, "stdout": "", "stderr": ""}
+    job = _submit(body)
+    out = {"stdout": [], "stderr": []}
+    result = {}
+    try:
+        async for event in EXEC_POOL.run(job):
+            if event["type"] == "output":
+                out[event["stream"]].append(event["data"])
+            elif event["type"] == "exit":
+                result = event
+    except Exception:
         raise HTTPException(500, 'Exec failed')
+    return {
+        "ok": True,
+        "code": result.get("code"),
+        "stdout": "".join(out["stdout"]),
+        "stderr": "".join(out["stderr"]),
+        "timed_out": result.get("timed_out", False),
+    }
+
+
+@router.post('/repo/exec/stream')
+async def exec_repo_stream(body: ExecRequest):
+    """Run a command and stream stdout/stderr chunks as server-sent events."""
+    if not body.cmd.strip():
+        raise HTTPException(400, 'Missing command')
+    job = _submit(body)
+
+    async def gen():
+        yield "event: open\n\n"
+        try:
+            async for event in EXEC_POOL.run(job):
+                yield "data: " + json.dumps(event) + "\n\n"
+        except Exception:
+            yield "data: " + json.dumps({"type": "error", "id": job.id, "error": "Exec failed"}) + "\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Exec-Id": job.id}
+    return StreamingResponse(gen(), media_type="text/event-stream", headers=headers)
 
 
+@router.post('/repo/exec/{job_id}/cancel')
+async def exec_cancel(job_id: str):
+    if not EXEC_POOL.cancel(job_id):
+        raise HTTPException(404, 'Unknown or finished job')
+    return {"ok": True, "id": job_id}
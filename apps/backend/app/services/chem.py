@@ -1,15 +1,20 @@
-from typing import List
+from typing import Dict, List
 from fastapi import APIRouter, Header
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
 
-router = APIRouter()
+from app.tools.chem import ChemUnavailable, compute_properties, druglikeness, shutdown_pool
+from app.tools.compounds import get_store
+
+# the descriptor process pool is started lazily; stop it with the app
+router = APIRouter(on_shutdown=[shutdown_pool])
 
 
 class Candidate(BaseModel):
     smiles: str
     score: float
     rationale: str
+    properties: Dict | None = None
 
 
 class DesignRequest(BaseModel):
@@ -17,16 +22,124 @@ class DesignRequest(BaseModel):
     n: int = 3
 
 
+# Seed pool used when the caller does not supply candidate SMILES
+_SEED_POOL = {
+    "CCO": "small alcohol",
+    "c1ccccc1": "benzene core",
+    "CC(=O)O": "acetate motif",
+    "CC(=O)Oc1ccccc1C(=O)O": "aspirin scaffold",
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C": "xanthine scaffold",
+}
+
+
 @router.post("/chem/design")
-async def chem_design(payload: DesignRequest, authorization: str | None = Header(default=None)):
+def chem_design(payload: DesignRequest, authorization: str | None = Header(default=None)):
+    # Sync handler: runs in the threadpool so RDKit work never blocks the event loop
+    if not authorization:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    constraints = payload.constraints or {}
+    pool = constraints.get("smiles")
+    if pool is not None and not (isinstance(pool, list) and all(isinstance(s, str) for s in pool)):
+        return JSONResponse({"error": "constraints.smiles must be a list of SMILES strings"}, status_code=400)
+    pool = pool or list(_SEED_POOL)
+    n = max(1, min(payload.n, 50))
+    try:
+        results, _ = compute_properties(pool)
+    except ChemUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    cands: List[Candidate] = []
+    for r in results:
+        if "error" in r:
+            continue
+        props = {k: v for k, v in r.items() if k not in ("smiles", "canonical")}
+        score, violations = druglikeness(r)
+        label = _SEED_POOL.get(r["smiles"], "supplied candidate")
+        rationale = f"{label}; " + (f"violates {', '.join(violations)}" if violations else "passes Lipinski/Veber")
+        cands.append(Candidate(smiles=r["canonical"], score=score, rationale=rationale, properties=props))
+    cands.sort(key=lambda c: c.score, reverse=True)
+    return {
+        "candidates": [c.model_dump() for c in cands[:n]],
+        "disclaimer": "Rule-based drug-likeness ranking; not a synthesis or safety assessment",
+    }
+
+
+class BatchPropertiesRequest(BaseModel):
+    smiles: List[str]
+
+
+@router.post("/chem/properties:batch")
+def chem_properties_batch(payload: BatchPropertiesRequest, authorization: str | None = Header(default=None)):
+    # Sync handler: runs in the threadpool so RDKit work never blocks the event loop
+    if not authorization:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    try:
+        results, stats = compute_properties(payload.smiles)
+    except ChemUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"results": results, "stats": stats}
+
+
+class CompoundsAddRequest(BaseModel):
+    smiles: List[str]
+    ids: List[str] | None = None
+
+
+@router.post("/chem/compounds")
+def chem_compounds_add(payload: CompoundsAddRequest, authorization: str | None = Header(default=None)):
     if not authorization:
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
-    cands: List[Candidate] = [
-        Candidate(smiles="CCO", score=0.42, rationale="Stub candidate: small alcohol").model_dump(),
-        Candidate(smiles="c1ccccc1", score=0.35, rationale="Stub candidate: benzene core").model_dump(),
-        Candidate(smiles="CC(=O)O", score=0.28, rationale="Stub candidate: acetate motif").model_dump(),
-    ]
-    n = max(1, min(payload.n, 5))
-    return {"candidates": cands[:n], "disclaimer": "Stub output for Phase 0"}
+    store = get_store()
+    try:
+        out = store.add(payload.smiles, payload.ids)
+    except ChemUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {**out, "total": len(store)}
 
 
+class SimilarityRequest(BaseModel):
+    smiles: str
+    k: int = 10
+    threshold: float = 0.0
+    substructure: str | None = None
+
+
+@router.post("/chem/similarity")
+def chem_similarity(payload: SimilarityRequest, authorization: str | None = Header(default=None)):
+    if not authorization:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    try:
+        hits = get_store().similarity(
+            payload.smiles,
+            k=max(1, min(payload.k, 1000)),
+            threshold=max(0.0, min(payload.threshold, 1.0)),
+            substructure=payload.substructure,
+        )
+    except ChemUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"query": payload.smiles, "hits": hits}
+
+
+class SubstructureRequest(BaseModel):
+    query: str
+    limit: int = 100
+
+
+@router.post("/chem/substructure")
+def chem_substructure(payload: SubstructureRequest, authorization: str | None = Header(default=None)):
+    if not authorization:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    try:
+        hits = get_store().substructure(payload.query, limit=max(1, min(payload.limit, 1000)))
+    except ChemUnavailable as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"query": payload.query, "hits": hits}
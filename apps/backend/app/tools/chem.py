@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import multiprocessing
+import os
+import threading
+
+try:
+    from rdkit import Chem, RDLogger  # type: ignore
+    from rdkit.Chem import Crippen, Descriptors, rdMolDescriptors  # type: ignore
+
+    RDLogger.DisableLog("rdApp.*")
+except Exception:  # pragma: no cover - optional dependency
+    Chem = None  # type: ignore
+
+
+# Batches smaller than this are computed inline; the pool only pays off once
+# RDKit work dominates the pickling round-trip.
+POOL_THRESHOLD = int(os.getenv("RUNIX_CHEM_POOL_THRESHOLD", "64"))
+MAX_WORKERS = int(os.getenv("RUNIX_CHEM_WORKERS", "0")) or (os.cpu_count() or 1)
+CACHE_SIZE = int(os.getenv("RUNIX_CHEM_CACHE_SIZE", "50000"))
+MAX_BATCH = int(os.getenv("RUNIX_CHEM_MAX_BATCH", "10000"))
+
+
+class ChemUnavailable(RuntimeError):
+    """Raised when RDKit is not installed."""
+
+
+def available() -> bool:
+    return Chem is not None
+
+
+class _LRU:
+    """Small thread-safe LRU map (request handlers run in a threadpool)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# input SMILES -> canonical SMILES, and canonical SMILES -> descriptor dict.
+# The alias map lets repeat inputs skip parsing entirely; the property map
+# shares results between different spellings of the same molecule.
+_ALIASES = _LRU(CACHE_SIZE)
+_PROPS = _LRU(CACHE_SIZE)
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _descriptors(mol) -> Dict:
+    return {
+        "mw": round(Descriptors.MolWt(mol), 3),
+        "hbd": rdMolDescriptors.CalcNumHBD(mol),
+        "hba": rdMolDescriptors.CalcNumHBA(mol),
+        "logp": round(Crippen.MolLogP(mol), 3),
+        "tpsa": round(rdMolDescriptors.CalcTPSA(mol), 2),
+        "rotatable_bonds": rdMolDescriptors.CalcNumRotatableBonds(mol),
+        "heavy_atoms": mol.GetNumHeavyAtoms(),
+    }
+
+
+def _compute_chunk(smiles: List[str]) -> List[Tuple[str, Optional[str], Optional[Dict]]]:
+    """Worker entry point: parse each SMILES once and compute descriptors.
+
+    Returns ``(input, canonical, props)`` triples; ``canonical`` is None for
+    unparseable input.
+    """
+    out: List[Tuple[str, Optional[str], Optional[Dict]]] = []
+    for s in smiles:
+        mol = Chem.MolFromSmiles(s)
+        if mol is None:
+            out.append((s, None, None))
+            continue
+        out.append((s, Chem.MolToSmiles(mol), _descriptors(mol)))
+    return out
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: never fork a server process that already runs threads
+            _POOL = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+            _POOL = None
+
+
+def _run(pending: List[str]) -> List[Tuple[str, Optional[str], Optional[Dict]]]:
+    if len(pending) < POOL_THRESHOLD or MAX_WORKERS <= 1:
+        return _compute_chunk(pending)
+    size = max(16, -(-len(pending) // (MAX_WORKERS * 4)))
+    chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+    results: List[Tuple[str, Optional[str], Optional[Dict]]] = []
+    for part in _get_pool().map(_compute_chunk, chunks):
+        results.extend(part)
+    return results
+
+
+def compute_properties(smiles: Iterable[str]) -> Tuple[List[Dict], Dict[str, int]]:
+    """Compute descriptors for a batch of SMILES, preserving input order.
+
+    Returns ``(results, stats)`` where each result carries the input SMILES,
+    its canonical form and descriptors, or an ``error`` for invalid input.
+    """
+    if Chem is None:
+        raise ChemUnavailable("RDKit is not installed")
+    items = [(s or "").strip() for s in smiles]
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"Batch too large (max {MAX_BATCH})")
+
+    resolved: Dict[str, Tuple[Optional[str], Optional[Dict]]] = {}
+    pending: List[str] = []
+    hits = 0
+    for s in dict.fromkeys(items):
+        canon = _ALIASES.get(s)
+        props = _PROPS.get(canon) if canon else None
+        if props is not None:
+            resolved[s] = (canon, props)
+            hits += 1
+        elif s:
+            pending.append(s)
+        else:
+            resolved[s] = (None, None)
+
+    for s, canon, props in _run(pending) if pending else []:
+        if canon is not None:
+            cached = _PROPS.get(canon)
+            if cached is not None:
+                props = cached
+            else:
+                _PROPS.put(canon, props)
+            _ALIASES.put(s, canon)
+        resolved[s] = (canon, props)
+
+    results: List[Dict] = []
+    for s in items:
+        canon, props = resolved[s]
+        if canon is None:
+            results.append({"smiles": s, "error": "Invalid SMILES"})
+        else:
+            results.append({"smiles": s, "canonical": canon, **props})
+    stats = {"count": len(items), "unique": len(resolved), "cache_hits": hits, "computed": len(pending)}
+    return results, stats
+
+
+def druglikeness(props: Dict) -> Tuple[float, List[str]]:
+    """Score a descriptor dict by Lipinski/Veber rule compliance (0..1)."""
+    rules = [
+        ("MW > 500", props["mw"] <= 500),
+        ("HBD > 5", props["hbd"] <= 5),
+        ("HBA > 10", props["hba"] <= 10),
+        ("logP > 5", props["logp"] <= 5),
+        ("TPSA > 140", props["tpsa"] <= 140),
+        ("rotatable bonds > 10", props["rotatable_bonds"] <= 10),
+    ]
+    violations = [name for name, ok in rules if not ok]
+    return round(1 - len(violations) / len(rules), 3), violations
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import threading
+
+from .chem import ChemUnavailable, Chem, MAX_WORKERS, POOL_THRESHOLD, _get_pool
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional "chem" extra
+    np = None  # type: ignore
+
+try:
+    from rdkit.Chem import rdFingerprintGenerator  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    rdFingerprintGenerator = None  # type: ignore
+
+
+STORE_DIR = os.getenv("RUNIX_COMPOUND_DIR", os.path.join(os.path.dirname(__file__), "..", "compounds"))
+FP_BITS = 2048
+FP_WORDS = FP_BITS // 64
+# Rows scored per vectorised step; bounds the temporary (rows x FP_WORDS) array
+BLOCK_ROWS = 1 << 16
+
+_BYTE_COUNTS = None
+
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    global _BYTE_COUNTS
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    # numpy < 2.0: table lookup per byte
+    if _BYTE_COUNTS is None:  # pragma: no cover
+        _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    as_bytes = words.view(np.uint8).reshape(words.shape[0], -1)
+    return _BYTE_COUNTS[as_bytes].sum(axis=1, dtype=np.int32)
+
+
+def _require(substructure_only: bool = False) -> None:
+    if Chem is None or (rdFingerprintGenerator is None and not substructure_only):
+        raise ChemUnavailable("RDKit is not installed")
+    if np is None:
+        raise ChemUnavailable("numpy is not installed")
+
+
+_MORGAN_GEN = None
+
+
+def _morgan(mol) -> np.ndarray:
+    global _MORGAN_GEN
+    if _MORGAN_GEN is None:
+        _MORGAN_GEN = rdFingerprintGenerator.GetMorganGenerator(radius=2, fpSize=FP_BITS)
+    return np.packbits(_MORGAN_GEN.GetFingerprintAsNumPy(mol).astype(np.uint8)).view(np.uint64)
+
+
+def _pattern(mol) -> np.ndarray:
+    bits = np.zeros(FP_BITS, dtype=np.uint8)
+    fp = Chem.PatternFingerprint(mol, fpSize=FP_BITS)
+    bits[list(fp.GetOnBits())] = 1
+    return np.packbits(bits).view(np.uint64)
+
+
+def _parse_query(smiles: str):
+    mol = Chem.MolFromSmiles(smiles)
+    return mol if mol is not None else Chem.MolFromSmarts(smiles)
+
+
+def _contains(smiles: str, query) -> bool:
+    target = Chem.MolFromSmiles(smiles)
+    return target is not None and target.HasSubstructMatch(query)
+
+
+def _screen(block: np.ndarray, qp: np.ndarray) -> np.ndarray:
+    # Pattern-fingerprint screen: a substructure match must carry every query bit
+    return ((block & qp) == qp).all(axis=1)
+
+
+def _fingerprint_chunk(smiles: List[str]) -> List[Tuple[str, Optional[str], Optional[bytes], Optional[bytes]]]:
+    """Worker entry point: canonical SMILES plus packed Morgan/pattern fingerprints."""
+    out: List[Tuple[str, Optional[str], Optional[bytes], Optional[bytes]]] = []
+    for s in smiles:
+        mol = Chem.MolFromSmiles(s)
+        if mol is None:
+            out.append((s, None, None, None))
+            continue
+        out.append((s, Chem.MolToSmiles(mol), _morgan(mol).tobytes(), _pattern(mol).tobytes()))
+    return out
+
+
+class CompoundStore:
+    """Append-only compound store with packed fingerprint arrays.
+
+    Layout under ``root``: ``smiles.txt`` (canonical SMILES and id, one per
+    line), ``morgan.bin`` and ``pattern.bin`` (row-major uint64 words,
+    FP_WORDS per compound) and ``counts.bin`` (uint16 Morgan popcounts).
+    Appends only extend the files; searches memory-map them.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self._loaded_rows = -1
+        self._smiles: List[str] = []
+        self._ids: List[str] = []
+        # fingerprint arrays, loaded by _refresh (left unset without numpy)
+        self._morgan = self._pattern = self._counts = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _rows_on_disk(self) -> int:
+        try:
+            return os.path.getsize(self._path("counts.bin")) // 2
+        except OSError:
+            return 0
+
+    def _truncate_to(self, rows: int) -> None:
+        """Drop bytes past ``rows`` committed rows left by an interrupted append."""
+        for name, width in (("morgan.bin", FP_WORDS * 8), ("pattern.bin", FP_WORDS * 8), ("counts.bin", 2)):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * width:
+                os.truncate(path, rows * width)
+        path = self._path("smiles.txt")
+        if not os.path.exists(path):
+            return
+        end = 0
+        with open(path, "rb") as fh:
+            for _ in range(rows):
+                line = fh.readline()
+                if not line:
+                    break
+                end += len(line)
+        if os.path.getsize(path) > end:
+            os.truncate(path, end)
+
+    def _refresh(self) -> None:
+        rows = self._rows_on_disk()
+        if rows == self._loaded_rows:
+            return
+        if rows == 0:
+            self._smiles, self._ids = [], []
+            if np is None:
+                self._loaded_rows = rows
+                return
+            self._morgan = np.zeros((0, FP_WORDS), dtype=np.uint64)
+            self._pattern = np.zeros((0, FP_WORDS), dtype=np.uint64)
+            self._counts = np.zeros(0, dtype=np.uint16)
+        else:
+            smiles: List[str] = []
+            ids: List[str] = []
+            with open(self._path("smiles.txt"), "r", encoding="utf-8") as fh:
+                for line in fh:
+                    smi, _, cid = line.rstrip("\n").partition("\t")
+                    smiles.append(smi)
+                    ids.append(cid)
+            self._smiles, self._ids = smiles[:rows], ids[:rows]
+            if np is None:
+                self._loaded_rows = rows
+                return
+            self._morgan = np.memmap(self._path("morgan.bin"), dtype=np.uint64, mode="r", shape=(rows, FP_WORDS))
+            self._pattern = np.memmap(self._path("pattern.bin"), dtype=np.uint64, mode="r", shape=(rows, FP_WORDS))
+            self._counts = np.memmap(self._path("counts.bin"), dtype=np.uint16, mode="r", shape=(rows,))
+        self._loaded_rows = rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._smiles)
+
+    def add(self, smiles: Iterable[str], ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Fingerprint and append compounds; returns counts of added/invalid rows."""
+        _require()
+        items = [(s or "").strip() for s in smiles]
+        id_list = list(ids) if ids is not None else [""] * len(items)
+        if len(id_list) != len(items):
+            raise ValueError("ids must match smiles length")
+        if len(items) < POOL_THRESHOLD or MAX_WORKERS <= 1:
+            rows = _fingerprint_chunk(items)
+        else:
+            size = max(64, -(-len(items) // (MAX_WORKERS * 4)))
+            rows = []
+            for part in _get_pool().map(_fingerprint_chunk, [items[i:i + size] for i in range(0, len(items), size)]):
+                rows.extend(part)
+        good = [(r, cid) for r, cid in zip(rows, id_list) if r[1] is not None]
+        if good:
+            morgan = np.frombuffer(b"".join(r[2] for r, _ in good), dtype=np.uint64).reshape(-1, FP_WORDS)
+            counts = _popcount_rows(morgan).astype(np.uint16)
+            with self._lock:
+                os.makedirs(self.root, exist_ok=True)
+                # counts.bin is written last: its size defines the committed row count,
+                # so first cut the other files back to it in case a prior append died
+                self._truncate_to(self._rows_on_disk())
+                with open(self._path("smiles.txt"), "a", encoding="utf-8") as fh:
+                    fh.writelines(f"{r[1]}\t{(cid or '').replace(chr(9), ' ')}\n" for r, cid in good)
+                with open(self._path("morgan.bin"), "ab") as fh:
+                    fh.write(morgan.tobytes())
+                with open(self._path("pattern.bin"), "ab") as fh:
+                    fh.write(b"".join(r[3] for r, _ in good))
+                with open(self._path("counts.bin"), "ab") as fh:
+                    fh.write(counts.tobytes())
+                self._loaded_rows = -1
+        return {"added": len(good), "invalid": len(items) - len(good)}
+
+    def similarity(
+        self,
+        smiles: str,
+        k: int = 10,
+        threshold: float = 0.0,
+        substructure: Optional[str] = None,
+    ) -> List[Dict]:
+        """Top-k Tanimoto neighbours of ``smiles`` over Morgan fingerprints.
+
+        Rows whose popcount cannot reach ``threshold`` are pruned before the
+        bitwise pass, and ``substructure`` restricts candidates via the
+        pattern-fingerprint screen followed by an exact match.
+        """
+        _require()
+        mol = Chem.MolFromSmiles(smiles)
+        if mol is None:
+            raise ValueError("Invalid SMILES")
+        sub = _parse_query(substructure) if substructure else None
+        if substructure and sub is None:
+            raise ValueError("Invalid substructure query")
+        q = _morgan(mol)
+        qp = _pattern(sub) if sub is not None else None
+        qc = int(_popcount_rows(q[None, :])[0])
+        with self._lock:
+            self._refresh()
+            morgan, pattern, counts = self._morgan, self._pattern, self._counts
+            names, ids = self._smiles, self._ids
+        total = len(names)
+        k = max(1, k)
+        best_idx = np.zeros(0, dtype=np.int64)
+        best_sim = np.zeros(0, dtype=np.float32)
+        for lo in range(0, total, BLOCK_ROWS):
+            hi = min(total, lo + BLOCK_ROWS)
+            c = counts[lo:hi].astype(np.int32)
+            # Tanimoto <= min(a, b) / max(a, b): skip rows that cannot qualify
+            keep = (np.minimum(c, qc) >= threshold * np.maximum(c, qc)) if threshold > 0 else np.ones(hi - lo, dtype=bool)
+            if sub is not None:
+                keep &= _screen(pattern[lo:hi], qp)
+            idx = np.nonzero(keep)[0]
+            if idx.size == 0:
+                continue
+            inter = _popcount_rows(morgan[lo:hi][idx] & q)
+            union = c[idx] + qc - inter
+            sim = np.where(union > 0, inter / np.maximum(union, 1), 0.0).astype(np.float32)
+            ok = sim >= threshold
+            if sub is not None:
+                # Exact match only for rows that survived the screen and the threshold
+                for j in np.nonzero(ok)[0]:
+                    ok[j] = _contains(names[lo + idx[j]], sub)
+            best_idx = np.concatenate([best_idx, idx[ok] + lo])
+            best_sim = np.concatenate([best_sim, sim[ok]])
+            if best_idx.size > k:
+                top = np.argpartition(-best_sim, k - 1)[:k]
+                best_idx, best_sim = best_idx[top], best_sim[top]
+        order = np.argsort(-best_sim, kind="stable")
+        hits: List[Dict] = []
+        for i in order:
+            row = int(best_idx[i])
+            hits.append({"smiles": names[row], "id": ids[row] or None, "similarity": round(float(best_sim[i]), 4)})
+        return hits
+
+    def substructure(self, query: str, limit: int = 100) -> List[Dict]:
+        """Compounds containing ``query`` (SMILES or SMARTS)."""
+        _require(substructure_only=True)
+        sub = _parse_query(query)
+        if sub is None:
+            raise ValueError("Invalid substructure query")
+        with self._lock:
+            self._refresh()
+            pattern, names, ids = self._pattern, self._smiles, self._ids
+        qp = _pattern(sub)
+        hits: List[Dict] = []
+        for lo in range(0, len(names), BLOCK_ROWS):
+            hi = min(len(names), lo + BLOCK_ROWS)
+            for row in np.nonzero(_screen(pattern[lo:hi], qp))[0] + lo:
+                if _contains(names[row], sub):
+                    hits.append({"smiles": names[row], "id": ids[row] or None})
+                    if len(hits) >= limit:
+                        return hits
+        return hits
+
+
+_STORE: Optional[CompoundStore] = None
+
+
+def get_store() -> CompoundStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = CompoundStore()
+    return _STORE
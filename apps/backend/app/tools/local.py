@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 
 
 def extract_citations(text: str) -> List[Dict]:
@@ -40,15 +40,13 @@ def format_markdown_with_refs(blocks: List[Dict]) -> str:
     return md
 
 
-def chem_calc(smiles: str) -> Dict:
-    """Dummy chemistry calculator. Returns pretend properties."""
-    return {
-        "smiles": smiles,
-        "mw": 42.0,
-        "hbd": 1,
-        "hba": 1,
-        "logp": 1.23,
-        "note": "Stub properties for Phase 0",
-    }
-
+def chem_calc(smiles: Union[str, List[str]]) -> Union[Dict, List[Dict]]:
+    """Compute molecular descriptors for one SMILES or a list of SMILES."""
+    from .chem import ChemUnavailable, compute_properties
 
+    batch = [smiles] if isinstance(smiles, str) else list(smiles)
+    try:
+        results, _ = compute_properties(batch)
+    except (ChemUnavailable, ValueError) as e:
+        results = [{"smiles": s, "error": str(e)} for s in batch]
+    return results[0] if isinstance(smiles, str) else results
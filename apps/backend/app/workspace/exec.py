@@ -0,0 +1,214 @@
+import asyncio
+import codecs
+import os
+import signal
+import uuid
+import weakref
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+MAX_CONCURRENT = int(os.getenv("RUNIX_EXEC_CONCURRENCY", "4"))
+MAX_QUEUED = int(os.getenv("RUNIX_EXEC_QUEUE", "16"))
+CHUNK_BYTES = 4096
+
+
+@dataclass
+class ExecLimits:
+    """Per-repo execution limits; 0 disables a limit."""
+
+    timeout_s: float = float(os.getenv("RUNIX_EXEC_TIMEOUT_S", "15"))
+    memory_mb: int = int(os.getenv("RUNIX_EXEC_MEMORY_MB", "1024"))
+    cpu_s: int = int(os.getenv("RUNIX_EXEC_CPU_S", "0"))
+
+
+class ExecQueueFull(RuntimeError):
+    """Raised when both the running slots and the wait queue are full."""
+
+
+def _sandbox_env(cwd: str) -> Dict[str, str]:
+    # Minimal environment: no inherited secrets (API keys, tokens)
+    return {
+        "PATH": os.getenv("PATH", "/usr/bin:/bin"),
+        "HOME": cwd,
+        "LANG": os.getenv("LANG", "C.UTF-8"),
+        "PYTHONUNBUFFERED": "1",
+    }
+
+
+def _limited(cmd: str, limits: ExecLimits) -> str:
+    # ulimit inside the child shell instead of preexec_fn, which is unsafe in a
+    # threaded server process
+    prefix = []
+    if limits.memory_mb:
+        prefix.append(f"ulimit -v {int(limits.memory_mb) * 1024} 2>/dev/null;")
+    if limits.cpu_s:
+        prefix.append(f"ulimit -t {int(limits.cpu_s)} 2>/dev/null;")
+    return " ".join(prefix + [cmd])
+
+
+class _Slot:
+    """A place in an ``ExecPool``'s wait queue, given back exactly once."""
+
+    def __init__(self, pool: "ExecPool"):
+        self.pool = pool
+        self.held = True
+
+    def release(self) -> None:
+        if self.held:
+            self.held = False
+            self.pool.queued -= 1
+
+
+class ExecJob:
+    def __init__(self, repo: str, cmd: str, cwd: str, limits: ExecLimits):
+        self.id = uuid.uuid4().hex
+        self.repo = repo
+        self.cmd = cmd
+        self.cwd = cwd
+        self.limits = limits
+        self.state = "queued"
+        self.cancelled = False
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.slot: Optional[_Slot] = None
+
+    def kill(self) -> None:
+        if self.proc is not None and self.proc.returncode is None:
+            try:
+                # the child leads its own session: take down its whole group
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.state == "queued" and self.slot is not None:
+            # may never be run (client gone): free its queue place now
+            self.slot.release()
+        self.kill()
+
+
+class ExecPool:
+    """Bounded pool of concurrent sandboxed command executions.
+
+    At most ``max_concurrent`` commands run at once; up to ``max_queued``
+    more wait in FIFO order and anything beyond is rejected. ``run`` yields
+    events as they happen (queued, started, output chunks, exit) so callers
+    can stream them or collect them.
+
+    A submitted job holds a queue place until ``run`` starts it, it is
+    cancelled, or it is garbage-collected without ever being run (a client
+    that disconnected before its stream began).
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_queued: int = MAX_QUEUED):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queued = 0
+        # weak: a job nobody will run must not be kept alive by the registry
+        self.jobs: "weakref.WeakValueDictionary[str, ExecJob]" = weakref.WeakValueDictionary()
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrent)
+        return self._sem
+
+    def submit(self, repo: str, cmd: str, cwd: str, limits: ExecLimits) -> ExecJob:
+        if self.queued >= self.max_queued:
+            raise ExecQueueFull("Execution queue is full")
+        job = ExecJob(repo, cmd, cwd, limits)
+        job.slot = _Slot(self)
+        weakref.finalize(job, job.slot.release)
+        self.jobs[job.id] = job
+        self.queued += 1
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    async def run(self, job: ExecJob) -> AsyncIterator[dict]:
+        sem = self._semaphore()
+        acquired = False
+        try:
+            yield {"type": "queued", "id": job.id, "waiting": self.queued}
+            await sem.acquire()
+            acquired = True
+            job.slot.release()
+            if job.cancelled:
+                yield {"type": "exit", "id": job.id, "code": None, "timed_out": False, "cancelled": True}
+                return
+            job.state = "running"
+            yield {"type": "started", "id": job.id}
+            async for event in self._execute(job):
+                yield event
+        finally:
+            if acquired:
+                sem.release()
+            job.slot.release()
+            job.kill()
+            job.state = "done"
+            self.jobs.pop(job.id, None)
+
+    async def _execute(self, job: ExecJob) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+        proc = await asyncio.create_subprocess_shell(
+            _limited(job.cmd, job.limits),
+            cwd=job.cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=_sandbox_env(job.cwd),
+            start_new_session=True,
+        )
+        job.proc = proc
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(reader: asyncio.StreamReader, name: str) -> None:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                chunk = await reader.read(CHUNK_BYTES)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    await queue.put((name, text))
+                if not chunk:
+                    break
+            await queue.put((name, None))
+
+        pumps = [
+            asyncio.create_task(pump(proc.stdout, "stdout")),
+            asyncio.create_task(pump(proc.stderr, "stderr")),
+        ]
+        deadline = loop.time() + job.limits.timeout_s if job.limits.timeout_s else None
+        timed_out = False
+        finished = False
+        open_streams = 2
+        try:
+            while open_streams:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+                try:
+                    name, data = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    break
+                if data is None:
+                    open_streams -= 1
+                    continue
+                yield {"type": "output", "stream": name, "data": data}
+            finished = not timed_out
+        finally:
+            # timed out, or the consumer went away mid-stream
+            if not finished:
+                job.kill()
+            code = await proc.wait()
+            for t in pumps:
+                t.cancel()
+        yield {"type": "exit", "id": job.id, "code": code, "timed_out": timed_out, "cancelled": job.cancelled}
+
+
+POOL = ExecPool()
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CHUNK_BYTES = 64 * 1024
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_LOCK = threading.Lock()
+
+# path -> (inode, mtime_ns, size, sha256) of the last full hash
+_DIGESTS: Dict[str, Tuple[int, int, int, str]] = {}
+_DIGESTS_LOCK = threading.Lock()
+# Files modified this recently are re-hashed every time: a same-size write
+# within the filesystem's timestamp granularity would not change the key
+RACY_NS = 2_000_000_000
+
+
+class PatchError(ValueError):
+    """Raised when edits or a diff do not apply to the current content."""
+
+
+def path_lock(path: str) -> threading.Lock:
+    with _LOCKS_LOCK:
+        lock = _LOCKS.get(path)
+        if lock is None:
+            lock = _LOCKS[path] = threading.Lock()
+        return lock
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file, streamed in chunks; None if it does not exist.
+
+    Digests are cached by inode, mtime and size, so re-reading an unchanged
+    file costs one ``stat``.
+    """
+    try:
+        with open(path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+            with _DIGESTS_LOCK:
+                cached = _DIGESTS.get(path)
+            if cached is not None and cached[:3] == key:
+                return cached[3]
+            h = hashlib.sha256()
+            for chunk in iter(lambda: fh.read(CHUNK_BYTES), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    digest = h.hexdigest()
+    if time.time_ns() - st.st_mtime_ns >= RACY_NS:
+        with _DIGESTS_LOCK:
+            _DIGESTS[path] = (*key, digest)
+    return digest
+
+
+def read_range(path: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        return fh.read() if length is None else fh.read(length)
+
+
+def iter_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes ``start..end`` (inclusive) in chunks."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=a-b`` range; raises ValueError if unsatisfiable."""
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].split(",")[0].strip()
+    first, _, last = spec.partition("-")
+    if not first:
+        n = int(last)
+        start, end = max(0, size - n), size - 1
+    else:
+        start = int(first)
+        end = int(last) if last else size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def atomic_write(path: str, data: bytes) -> str:
+    """Write via temp file + fsync + rename; returns the new sha256."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return hashlib.sha256(data).hexdigest()
+
+
+def apply_edits(text: str, edits: List[dict]) -> str:
+    """Apply ``{start, end, text}`` replacements (character offsets into ``text``).
+
+    Offsets all refer to the original text; edits must not overlap.
+    """
+    ordered = sorted(edits, key=lambda e: (e["start"], e["end"]))
+    prev_end = 0
+    for e in ordered:
+        if not 0 <= e["start"] <= e["end"] <= len(text):
+            raise PatchError(f"Edit range {e['start']}..{e['end']} out of bounds")
+        if e["start"] < prev_end:
+            raise PatchError("Overlapping edits")
+        prev_end = e["end"]
+    parts: List[str] = []
+    pos = 0
+    for e in ordered:
+        parts.append(text[pos:e["start"]])
+        parts.append(e.get("text", ""))
+        pos = e["end"]
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def apply_unified_diff(text: str, diff: str) -> str:
+    """Apply a unified diff to ``text``, verifying every context/removed line."""
+    src = text.splitlines(keepends=True)
+    out: List[str] = []
+    pos = 0
+    lines = diff.splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        m = _HUNK_RE.match(lines[i])
+        i += 1
+        if not m:
+            continue
+        start = int(m.group(1))
+        old_len = int(m.group(2)) if m.group(2) is not None else 1
+        # a zero-length hunk inserts *after* line `start`
+        target = start if old_len == 0 else start - 1
+        if target < pos or target > len(src):
+            raise PatchError(f"Hunk at line {start} out of order or out of range")
+        out.extend(src[pos:target])
+        pos = target
+        last_tag = ""
+        while i < len(lines) and not lines[i].startswith("@@"):
+            line = lines[i]
+            i += 1
+            if line.startswith("\\"):  # "\ No newline at end of file"
+                if last_tag == "+" and out and out[-1].endswith("\n"):
+                    out[-1] = out[-1][:-1]
+                continue
+            tag, body = line[:1], line[1:]
+            last_tag = tag
+            if tag in (" ", "-"):
+                if pos >= len(src) or src[pos].rstrip("\r\n") != body.rstrip("\r\n"):
+                    raise PatchError(f"Context mismatch at line {pos + 1}")
+                if tag == " ":
+                    out.append(src[pos])
+                pos += 1
+            elif tag == "+":
+                out.append(body)
+            elif line.strip() == "":
+                # blank context line whose leading space was stripped
+                if pos >= len(src) or src[pos].strip() != "":
+                    raise PatchError(f"Context mismatch at line {pos + 1}")
+                out.append(src[pos])
+                pos += 1
+    out.extend(src[pos:])
+    return "".join(out)
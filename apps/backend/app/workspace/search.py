@@ -0,0 +1,224 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.workspace.tree import SKIP_DIRS
+
+MAX_FILE_BYTES = int(os.getenv("RUNIX_SEARCH_MAX_FILE_BYTES", str(1_000_000)))
+# Minimum seconds between background mtime sweeps
+REFRESH_INTERVAL = float(os.getenv("RUNIX_SEARCH_REFRESH_S", "5"))
+
+
+def _trigrams(text: str) -> Set[str]:
+    return set(map("".join, zip(text, text[1:], text[2:])))
+
+
+class _Doc:
+    __slots__ = ("rel", "mtime", "size", "lines", "lower", "starts", "grams")
+
+    def __init__(self, rel: str, mtime: int, size: int, text: str):
+        self.rel = rel
+        self.mtime = mtime
+        self.size = size
+        self.lines = text.split("\n")
+        self.lower = text.lower()
+        # offsets index into the lower-cased text, whose length can differ
+        starts = [0]
+        for line in self.lower.split("\n")[:-1]:
+            starts.append(starts[-1] + len(line) + 1)
+        self.starts = starts
+        self.grams = _trigrams(self.lower) | _trigrams(os.path.basename(rel).lower())
+
+
+class SearchIndex:
+    """Trigram index over a repo's text files.
+
+    Each file contributes the set of lower-cased trigrams of its content and
+    name; a query is answered by intersecting the posting sets of its
+    trigrams and verifying only the surviving files. The index is updated in
+    place by ``update_path`` (called on writes) and by a throttled background
+    sweep that compares file mtimes/sizes, so queries never walk the tree.
+    """
+
+    def __init__(self, base: str):
+        self.base = os.path.abspath(base)
+        self._lock = threading.RLock()
+        self._docs: Dict[str, _Doc] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._built = False
+        self._last_sweep = 0.0
+        self._sweeping = False
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def _read(self, full: str) -> Optional[str]:
+        try:
+            with open(full, "rb") as fh:
+                raw = fh.read(MAX_FILE_BYTES + 1)
+        except OSError:
+            return None
+        if len(raw) > MAX_FILE_BYTES or b"\0" in raw[:8192]:
+            # binary or too large: index the name only, so filename search still finds it
+            return ""
+        return raw.decode("utf-8", errors="ignore")
+
+    def _remove(self, rel: str) -> None:
+        doc = self._docs.pop(rel, None)
+        if doc is None:
+            return
+        for g in doc.grams:
+            posting = self._postings.get(g)
+            if posting is not None:
+                posting.discard(rel)
+                if not posting:
+                    del self._postings[g]
+
+    def _add(self, rel: str, st: os.stat_result, text: str) -> None:
+        doc = _Doc(rel, st.st_mtime_ns, st.st_size, text)
+        self._docs[rel] = doc
+        for g in doc.grams:
+            self._postings.setdefault(g, set()).add(rel)
+
+    def update_path(self, rel: str) -> None:
+        """Re-index (or drop) a single file after it was written or removed."""
+        rel = rel.replace("\\", "/").strip("/")
+        full = os.path.join(self.base, rel)
+        with self._lock:
+            self._remove(rel)
+            try:
+                st = os.stat(full)
+            except OSError:
+                return
+            if not os.path.isfile(full):
+                return
+            text = self._read(full)
+            if text is not None:
+                self._add(rel, st, text)
+
+    def _walk(self) -> Dict[str, os.stat_result]:
+        found: Dict[str, os.stat_result] = {}
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                it = os.scandir(os.path.join(self.base, rel_dir) if rel_dir else self.base)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if e.name.startswith(".") or e.name in SKIP_DIRS:
+                        continue
+                    rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+                    try:
+                        if e.is_dir():
+                            stack.append(rel)
+                        elif e.is_file():
+                            found[rel] = e.stat()
+                    except OSError:
+                        continue
+        return found
+
+    def sweep(self) -> int:
+        """Reconcile the index with the filesystem; returns files (re)indexed."""
+        found = self._walk()
+        changed = 0
+        with self._lock:
+            for rel in [r for r in self._docs if r not in found]:
+                self._remove(rel)
+            for rel, st in found.items():
+                doc = self._docs.get(rel)
+                if doc is not None and doc.mtime == st.st_mtime_ns and doc.size == st.st_size:
+                    continue
+                self._remove(rel)
+                text = self._read(os.path.join(self.base, rel))
+                if text is not None:
+                    self._add(rel, st, text)
+                    changed += 1
+            self._built = True
+            self._last_sweep = time.monotonic()
+        return changed
+
+    def _ensure_fresh(self) -> None:
+        if not self._built:
+            self.sweep()
+            return
+        if self._sweeping or time.monotonic() - self._last_sweep < REFRESH_INTERVAL:
+            return
+        self._sweeping = True
+
+        def run() -> None:
+            try:
+                self.sweep()
+            finally:
+                self._sweeping = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def _candidates(self, ql: str) -> List[str]:
+        if len(ql) < 3:
+            return list(self._docs)
+        postings = []
+        for g in _trigrams(ql):
+            posting = self._postings.get(g)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for p in postings[1:]:
+            result &= p
+            if not result:
+                break
+        return list(result)
+
+    def search(self, q: str, offset: int = 0, limit: int = 50) -> Tuple[int, List[dict]]:
+        """Return ``(total, page)`` of ranked matches for ``q`` (case-insensitive).
+
+        Filename hits come first, then files ordered by match count; every
+        matching line is reported with its 1-based line number.
+        """
+        self._ensure_fresh()
+        ql = q.lower()
+        with self._lock:
+            scored: List[Tuple[int, int, str, List[int], bool]] = []
+            for rel in self._candidates(ql):
+                doc = self._docs[rel]
+                name_hit = ql in os.path.basename(rel).lower()
+                lines: List[int] = []
+                pos = doc.lower.find(ql)
+                while pos != -1:
+                    line = bisect.bisect_right(doc.starts, pos) - 1
+                    lines.append(line)
+                    # next search starts on the following line: one hit per line
+                    nxt = doc.starts[line + 1] if line + 1 < len(doc.starts) else len(doc.lower)
+                    pos = doc.lower.find(ql, nxt)
+                if not lines and not name_hit:
+                    continue
+                scored.append((0 if name_hit else 1, -len(lines), rel, lines, name_hit))
+            scored.sort()
+            results: List[dict] = []
+            for _, _, rel, lines, name_hit in scored:
+                doc = self._docs[rel]
+                if name_hit:
+                    results.append({"path": rel, "preview": os.path.basename(rel), "score": len(lines) + 10})
+                for i in lines:
+                    results.append({"path": rel, "line": i + 1, "preview": doc.lines[i].strip()[:200], "score": len(lines)})
+        return len(results), results[offset:offset + limit]
+
+
+_INDEXES: Dict[str, SearchIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_search_index(base: str) -> SearchIndex:
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(base)
+        if index is None:
+            index = _INDEXES[base] = SearchIndex(base)
+        return index
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+SKIP_DIRS = ('node_modules', 'dist', 'build')
+
+# (name, is_dir) pairs in display order: dirs first, then by name
+Listing = List[Tuple[str, bool]]
+
+
+class TreeCache:
+    """Directory-listing cache validated by directory mtimes.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed inside it, so each cached listing is reused until its own
+    directory changes; unchanged subtrees are never rescanned. Rendered
+    subtrees are memoised together with the (dir, mtime) signature they were
+    built from, which doubles as the ETag.
+    """
+
+    def __init__(self, base: str):
+        self.base = os.path.abspath(base)
+        self._lock = threading.Lock()
+        self._listings: Dict[str, Tuple[int, Listing]] = {}
+        self._rendered: Dict[Tuple[str, int], Tuple[Tuple[Tuple[str, int], ...], str, List[dict]]] = {}
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.base, rel) if rel else self.base
+
+    def _listing(self, rel: str) -> Tuple[int, Listing]:
+        full = self._abs(rel)
+        entries: Listing = []
+        try:
+            mtime = os.stat(full).st_mtime_ns
+            cached = self._listings.get(rel)
+            if cached and cached[0] == mtime:
+                return cached
+            with os.scandir(full) as it:
+                for e in it:
+                    if e.name.startswith('.') or e.name in SKIP_DIRS:
+                        continue
+                    try:
+                        entries.append((e.name, e.is_dir()))
+                    except OSError:
+                        continue
+        except OSError:
+            # unreadable: show it empty, uncached; mtime -1 never validates a signature
+            self._listings.pop(rel, None)
+            return -1, []
+        entries.sort(key=lambda x: (0 if x[1] else 1, x[0]))
+        result = (mtime, entries)
+        self._listings[rel] = result
+        return result
+
+    def _signature_valid(self, signature: Tuple[Tuple[str, int], ...]) -> bool:
+        for rel, mtime in signature:
+            try:
+                if os.stat(self._abs(rel)).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _render(self, rel: str, depth: int, sig: List[Tuple[str, int]]) -> List[dict]:
+        mtime, entries = self._listing(rel)
+        sig.append((rel, mtime))
+        nodes: List[dict] = []
+        for name, is_dir in entries:
+            path = f"{rel}/{name}" if rel else name
+            if is_dir:
+                # children=None marks an unexpanded directory for lazy loading
+                children = self._render(path, depth - 1, sig) if depth > 1 else None
+                nodes.append({"name": name, "path": path, "type": "dir", "children": children})
+            else:
+                nodes.append({"name": name, "path": path, "type": "file", "children": None})
+        return nodes
+
+    def tree(self, rel: str = '', depth: int = 5) -> Tuple[str, List[dict]]:
+        """Return ``(etag, nodes)`` for ``rel`` expanded ``depth`` levels deep."""
+        rel = rel.strip('/')
+        key = (rel, depth)
+        with self._lock:
+            hit = self._rendered.get(key)
+            if hit and self._signature_valid(hit[0]):
+                return hit[1], hit[2]
+            sig: List[Tuple[str, int]] = []
+            nodes = self._render(rel, depth, sig)
+            digest = hashlib.sha1(repr((key, sig)).encode()).hexdigest()
+            etag = f'W/"{digest}"'
+            self._rendered[key] = (tuple(sig), etag, nodes)
+            return etag, nodes
+
+    def invalidate(self, rel: Optional[str] = None) -> None:
+        """Drop cached state for ``rel``'s parent (or everything).
+
+        Writes normally bump the parent mtime; this covers filesystems with
+        coarse timestamps where two changes can land on the same tick.
+        """
+        with self._lock:
+            if rel is None:
+                self._listings.clear()
+                self._rendered.clear()
+                return
+            parent = os.path.dirname(rel.strip('/'))
+            self._listings.pop(parent, None)
+            self._rendered = {k: v for k, v in self._rendered.items() if not any(d == parent for d, _ in v[0])}
+
+
+_CACHES: Dict[str, TreeCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_tree_cache(base: str) -> TreeCache:
+    with _CACHES_LOCK:
+        cache = _CACHES.get(base)
+        if cache is None:
+            cache = _CACHES[base] = TreeCache(base)
+        return cache
@@ -0,0 +1,80 @@
+"""Query latency of the /repo/search trigram index versus repo size.
+
+Builds synthetic repos of increasing size, indexes each once, then times a
+selective query (a token present in a fixed number of files) and compares it
+with the previous full-walk implementation.
+
+    cd apps/backend && python -m benchmarks.bench_repo_search
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.workspace.search import SearchIndex
+
+WORDS = ["protocol", "cohort", "endpoint", "placebo", "dose", "arm", "visit", "baseline", "safety", "consent"]
+
+
+def make_repo(root: str, n_files: int, needle_files: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    needles = set(rng.sample(range(n_files), needle_files))
+    for i in range(n_files):
+        d = os.path.join(root, f"dir{i % 50}", f"sub{i % 7}")
+        os.makedirs(d, exist_ok=True)
+        lines = [" ".join(rng.choice(WORDS) + str(rng.randint(0, 999)) for _ in range(8)) for _ in range(40)]
+        if i in needles:
+            lines[rng.randrange(len(lines))] += " zebrafish_marker"
+        with open(os.path.join(d, f"file{i}.txt"), "w") as fh:
+            fh.write("\n".join(lines))
+
+
+def walk_search(base: str, q: str) -> int:
+    """The pre-index implementation, kept here as the baseline."""
+    hits = 0
+    ql = q.lower()
+    for root, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for f in files:
+            with open(os.path.join(root, f), "r", encoding="utf-8", errors="ignore") as fh:
+                for line in fh.readlines()[:500]:
+                    if ql in line.lower():
+                        hits += 1
+                        break
+    return hits
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'files':>8} {'build s':>8} {'index ms':>9} {'walk ms':>9} {'matches':>8}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as root:
+            make_repo(root, n, needle_files=25)
+            index = SearchIndex(root)
+            t = time.perf_counter()
+            index.sweep()
+            build = time.perf_counter() - t
+            total, _ = index.search("zebrafish_marker")
+            q_ms = timed(lambda: index.search("zebrafish_marker"), args.repeat)
+            w_ms = timed(lambda: walk_search(root, "zebrafish_marker"), max(1, args.repeat // 10))
+            print(f"{n:>8} {build:>8.2f} {q_ms:>9.3f} {w_ms:>9.1f} {total:>8}")
+
+
+if __name__ == "__main__":
+    main()
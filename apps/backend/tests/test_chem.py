@@ -0,0 +1,89 @@
+"""Tests for the chemistry service routes."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import chem
+from app.tools import chem as engine
+from app.tools.chem import compute_properties, shutdown_pool
+from app.tools.local import chem_calc
+
+needs_rdkit = pytest.mark.skipif(not engine.available(), reason="RDKit is not installed")
+
+AUTH = {"Authorization": "Bearer t"}
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    engine._ALIASES.clear()
+    engine._PROPS.clear()
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(chem.router, prefix="/services")
+    return TestClient(app)
+
+
+@needs_rdkit
+def test_spellings_of_one_molecule_share_cached_properties():
+    results, stats = compute_properties(["CCO", "OCC", "CCO"])
+    assert stats == {"count": 3, "unique": 2, "cache_hits": 0, "computed": 2}
+    assert results[0]["canonical"] == results[1]["canonical"] == "CCO"
+    assert results[0] == results[2]
+    assert engine._PROPS.get("CCO") is not None and len(engine._PROPS) == 1
+
+    # a new spelling is parsed once, then reuses the canonical entry
+    cached = engine._PROPS.get("CCO")
+    results, stats = compute_properties(["C(C)O", "OCC"])
+    assert stats == {"count": 2, "unique": 2, "cache_hits": 1, "computed": 1}
+    assert engine._PROPS.get("CCO") is cached
+    assert {k: v for k, v in results[0].items() if k != "smiles"} == \
+        {k: v for k, v in results[1].items() if k != "smiles"}
+
+
+@needs_rdkit
+def test_invalid_rows_keep_their_position():
+    results, stats = compute_properties(["c1ccccc1", "not-a-smiles", "", "CCO"])
+    assert [r.get("error") for r in results] == [None, "Invalid SMILES", "Invalid SMILES", None]
+    assert results[1]["smiles"] == "not-a-smiles"
+    assert stats["computed"] == 3
+    assert engine._ALIASES.get("not-a-smiles") is None
+
+
+@needs_rdkit
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(engine, "MAX_BATCH", 2)
+    with pytest.raises(ValueError, match="max 2"):
+        compute_properties(["C", "CC", "CCC"])
+
+    res = _client().post("/services/chem/properties:batch", json={"smiles": ["C", "CC", "CCC"]}, headers=AUTH)
+    assert res.status_code == 400
+    assert "max 2" in res.json()["error"]
+
+    assert chem_calc(["C", "CC", "CCC"]) == [{"smiles": s, "error": "Batch too large (max 2)"}
+                                             for s in ("C", "CC", "CCC")]
+
+
+@needs_rdkit
+def test_batch_route():
+    client = _client()
+    assert client.post("/services/chem/properties:batch", json={"smiles": ["CCO"]}).status_code == 401
+    res = client.post("/services/chem/properties:batch", json={"smiles": ["OCC", "bad"]}, headers=AUTH)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["results"][0]["canonical"] == "CCO" and body["results"][0]["heavy_atoms"] == 3
+    assert body["results"][1] == {"smiles": "bad", "error": "Invalid SMILES"}
+    assert body["stats"]["count"] == 2
+
+
+def test_design_rejects_a_smiles_string():
+    app = FastAPI()
+    app.include_router(chem.router, prefix="/services")
+    assert shutdown_pool in app.router.on_shutdown
+
+    client = TestClient(app)
+    res = client.post("/services/chem/design", json={"constraints": {"smiles": "CCO"}}, headers=AUTH)
+    assert res.status_code == 400
+    assert "list" in res.json()["error"]
@@ -0,0 +1,89 @@
+"""Tests for the packed-fingerprint compound store."""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("rdkit")
+
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+
+from app.tools import compounds
+from app.tools.compounds import CompoundStore, FP_WORDS
+
+SMILES = [
+    "CCO", "CCCO", "CCCCO", "c1ccccc1", "c1ccccc1O", "c1ccccc1N", "Cc1ccccc1",
+    "CC(=O)O", "CC(=O)Oc1ccccc1C(=O)O", "CCN(CC)CC", "C1CCCCC1", "OCCO",
+]
+
+
+def _brute(query, smiles):
+    gen = rdFingerprintGenerator.GetMorganGenerator(radius=2, fpSize=compounds.FP_BITS)
+    q = gen.GetFingerprint(Chem.MolFromSmiles(query))
+    return {s: DataStructs.TanimotoSimilarity(q, gen.GetFingerprint(Chem.MolFromSmiles(s))) for s in smiles}
+
+
+def _canon(smiles):
+    return [Chem.MolToSmiles(Chem.MolFromSmiles(s)) for s in smiles]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = CompoundStore(str(tmp_path))
+    assert s.add(SMILES + ["not-a-smiles"], ids=[f"id{i}" for i in range(len(SMILES) + 1)]) == {
+        "added": len(SMILES), "invalid": 1}
+    return s
+
+
+def test_add_and_reload(store, tmp_path):
+    assert len(store) == len(SMILES)
+    store.add(["CCCCCO"])
+    again = CompoundStore(str(tmp_path))
+    assert len(again) == len(SMILES) + 1
+    hit = again.similarity("CCCCCO", k=1)[0]
+    assert hit["smiles"] == "CCCCCO" and hit["id"] is None and hit["similarity"] == 1.0
+
+
+def test_top_k_matches_brute_force(store):
+    expected = _brute("c1ccccc1O", _canon(SMILES))
+    hits = store.similarity("c1ccccc1O", k=5)
+    assert len(hits) == 5
+    for hit in hits:
+        assert hit["similarity"] == pytest.approx(expected[hit["smiles"]], abs=1e-4)
+    ranked = sorted(expected.values(), reverse=True)[:5]
+    assert [h["similarity"] for h in hits] == pytest.approx(ranked, abs=1e-4)
+
+
+def test_threshold_prunes(store):
+    expected = _brute("CCCO", _canon(SMILES))
+    hits = store.similarity("CCCO", k=len(SMILES), threshold=0.3)
+    assert {h["smiles"] for h in hits} == {s for s, v in expected.items() if v >= 0.3}
+
+
+def test_substructure_filter(store, monkeypatch):
+    calls = []
+    real = compounds._contains
+    monkeypatch.setattr(compounds, "_contains", lambda s, q: calls.append(s) or real(s, q))
+    hits = store.similarity("c1ccccc1O", k=len(SMILES), threshold=0.2, substructure="c1ccccc1")
+    assert hits and all(Chem.MolFromSmiles(h["smiles"]).HasSubstructMatch(Chem.MolFromSmiles("c1ccccc1"))
+                        for h in hits)
+    # the exact match never runs on rows already below the threshold
+    sims = _brute("c1ccccc1O", _canon(SMILES))
+    assert all(sims[s] >= 0.2 for s in calls)
+    assert {h["smiles"] for h in store.substructure("c1ccccc1")} >= {h["smiles"] for h in hits}
+
+
+def test_add_discards_an_interrupted_append(store, tmp_path):
+    rows = len(SMILES)
+    # a crash after smiles.txt and morgan.bin were written but before counts.bin
+    with open(tmp_path / "smiles.txt", "a", encoding="utf-8") as fh:
+        fh.write("CCCCCCCC\tstray\n")
+    with open(tmp_path / "morgan.bin", "ab") as fh:
+        fh.write(np.zeros(FP_WORDS, dtype=np.uint64).tobytes())
+    store.add(["CCCCCO"], ids=["new"])
+    assert os.path.getsize(tmp_path / "morgan.bin") == (rows + 1) * FP_WORDS * 8
+    again = CompoundStore(str(tmp_path))
+    hit = again.similarity("CCCCCO", k=1)[0]
+    assert hit == {"smiles": "CCCCCO", "id": "new", "similarity": 1.0}
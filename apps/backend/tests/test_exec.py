@@ -0,0 +1,37 @@
+"""Tests for the sandboxed exec pool."""
+
+import asyncio
+import gc
+
+from app.workspace.exec import ExecLimits, ExecPool
+
+
+def test_queue_slot_is_released_when_a_job_is_never_run(tmp_path):
+    pool = ExecPool(max_concurrent=1, max_queued=2)
+    limits = ExecLimits(timeout_s=5, memory_mb=0, cpu_s=0)
+
+    # client went away before the stream started: the job is dropped unrun
+    job = pool.submit("demo", "echo hi", str(tmp_path), limits)
+    stream = pool.run(job)
+    assert pool.queued == 1
+    del job, stream
+    gc.collect()
+    assert pool.queued == 0 and not pool.jobs
+
+    # cancelled while still queued
+    job = pool.submit("demo", "echo hi", str(tmp_path), limits)
+    assert pool.cancel(job.id)
+    assert pool.queued == 0
+
+    async def collect(job):
+        return [event async for event in pool.run(job)]
+
+    events = asyncio.run(collect(job))
+    assert events[-1]["cancelled"] is True
+    assert pool.queued == 0
+
+    job = pool.submit("demo", "echo hi", str(tmp_path), limits)
+    events = asyncio.run(collect(job))
+    assert "".join(e["data"] for e in events if e["type"] == "output") == "hi\n"
+    assert events[-1]["code"] == 0
+    assert pool.queued == 0
@@ -0,0 +1,50 @@
+"""Tests for workspace file helpers."""
+
+import hashlib
+import os
+
+import pytest
+
+from app.workspace import files
+from app.workspace.files import PatchError, apply_unified_diff, file_hash
+
+
+def test_apply_unified_diff():
+    text = "alpha\nbeta\ngamma\ndelta\n"
+    diff = (
+        "--- a/f.txt\n"
+        "+++ b/f.txt\n"
+        "@@ -1,2 +1,2 @@\n"
+        " alpha\n"
+        "-beta\n"
+        "+BETA\n"
+        "@@ -3,0 +4,1 @@\n"
+        "+inserted\n"
+    )
+    assert apply_unified_diff(text, diff) == "alpha\nBETA\ngamma\ninserted\ndelta\n"
+
+    # dropping the final newline
+    diff = "@@ -4 +4 @@\n-delta\n+delta\n\\ No newline at end of file\n"
+    assert apply_unified_diff(text, diff) == "alpha\nbeta\ngamma\ndelta"
+
+    with pytest.raises(PatchError, match="Context mismatch at line 2"):
+        apply_unified_diff(text, "@@ -1,2 +1,2 @@\n alpha\n-bravo\n+BETA\n")
+    with pytest.raises(PatchError, match="out of order"):
+        apply_unified_diff(text, "@@ -3 +3 @@\n-gamma\n+G\n@@ -1 +1 @@\n-alpha\n+A\n")
+
+
+def test_file_hash_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"first")
+    # freshly written files are not cached
+    assert file_hash(str(path)) == hashlib.sha256(b"first").hexdigest()
+    assert str(path) not in files._DIGESTS
+
+    old = os.stat(path).st_mtime_ns - 10 * files.RACY_NS
+    os.utime(path, ns=(old, old))
+    file_hash(str(path))
+    assert files._DIGESTS[str(path)][3] == hashlib.sha256(b"first").hexdigest()
+
+    path.write_bytes(b"second!")
+    assert file_hash(str(path)) == hashlib.sha256(b"second!").hexdigest()
+    assert file_hash(str(tmp_path / "missing")) is None
@@ -0,0 +1,27 @@
+"""Tests for the workspace search index."""
+
+import os
+
+from app.workspace import search
+from app.workspace.search import SearchIndex
+
+
+def test_filename_search_finds_binary_and_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(search, "MAX_FILE_BYTES", 64)
+    os.makedirs(tmp_path / "data")
+    (tmp_path / "data" / "synthetic-controls.parquet").write_bytes(b"PAR1\0\0\x01binary")
+    (tmp_path / "data" / "controls-log.txt").write_text("x" * 100)
+    (tmp_path / "notes.md").write_text("no match here\n")
+
+    index = SearchIndex(str(tmp_path))
+    total, results = index.search("controls")
+    assert total == 2
+    assert {r["path"] for r in results} == {"data/synthetic-controls.parquet", "data/controls-log.txt"}
+    assert all("line" not in r for r in results)
+
+    # content of a name-only entry is never searched
+    assert index.search("binary") == (0, [])
+
+    (tmp_path / "data" / "more-controls.bin").write_bytes(b"\0" * 10)
+    index.update_path("data/more-controls.bin")
+    assert index.search("more-controls")[0] == 1
@@ -0,0 +1,95 @@
+"""Tests for the cached workspace tree."""
+
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import repo
+from app.workspace import tree
+from app.workspace.tree import TreeCache
+
+
+def _names(nodes):
+    return [n["name"] for n in nodes]
+
+
+def _workspace(root):
+    os.makedirs(root / "src" / "deep" / "deeper")
+    (root / "src" / "main.py").write_text("")
+    (root / "src" / "deep" / "deeper" / "leaf.txt").write_text("")
+    (root / "README.md").write_text("")
+    os.makedirs(root / "node_modules")
+
+
+def test_cache_hit_and_nested_invalidation(tmp_path, monkeypatch):
+    _workspace(tmp_path)
+    cache = TreeCache(str(tmp_path))
+    etag, nodes = cache.tree()
+    assert _names(nodes) == ["src", "README.md"]
+
+    scans = []
+    real = os.scandir
+    monkeypatch.setattr(tree.os, "scandir", lambda p: scans.append(p) or real(p))
+    assert cache.tree() == (etag, nodes)
+    assert scans == []
+
+    (tmp_path / "src" / "deep" / "deeper" / "new.txt").write_text("")
+    # coarse-mtime filesystems rely on the explicit invalidation writes perform
+    cache.invalidate("src/deep/deeper/new.txt")
+    etag2, nodes2 = cache.tree()
+    assert etag2 != etag
+    assert scans == [os.path.join(str(tmp_path), "src/deep/deeper")]
+    deeper = nodes2[0]["children"][0]["children"][0]
+    assert _names(deeper["children"]) == ["leaf.txt", "new.txt"]
+
+
+def test_depth_limit_leaves_children_unexpanded(tmp_path):
+    _workspace(tmp_path)
+    _, nodes = TreeCache(str(tmp_path)).tree(depth=2)
+    src = nodes[0]
+    deep = src["children"][0]
+    assert deep["name"] == "deep" and deep["type"] == "dir" and deep["children"] is None
+    assert nodes[1]["children"] is None
+
+    _, sub = TreeCache(str(tmp_path)).tree("src/deep", depth=1)
+    assert sub == [{"name": "deeper", "path": "src/deep/deeper", "type": "dir", "children": None}]
+
+
+def test_unreadable_directory_is_listed_empty(tmp_path, monkeypatch):
+    _workspace(tmp_path)
+    locked = os.path.join(str(tmp_path), "src/deep")
+    real = os.scandir
+
+    def scandir(path):
+        if path == locked:
+            raise PermissionError(13, "Permission denied", path)
+        return real(path)
+
+    monkeypatch.setattr(tree.os, "scandir", scandir)
+    cache = TreeCache(str(tmp_path))
+    _, nodes = cache.tree()
+    assert nodes[0]["children"][0] == {"name": "deep", "path": "src/deep", "type": "dir", "children": []}
+
+    monkeypatch.setattr(tree.os, "scandir", real)
+    _, nodes = cache.tree()
+    assert _names(nodes[0]["children"][0]["children"]) == ["deeper"]
+
+
+def test_route_answers_304_for_a_matching_etag(tmp_path, monkeypatch):
+    _workspace(tmp_path)
+    monkeypatch.setitem(repo.REPOS, "tmp", str(tmp_path))
+    app = FastAPI()
+    app.include_router(repo.router)
+    client = TestClient(app)
+
+    res = client.get("/repo/tree", params={"repo": "tmp"})
+    assert res.status_code == 200
+    assert _names(res.json()["tree"]) == ["src", "README.md"]
+    etag = res.headers["etag"]
+
+    assert client.get("/repo/tree", params={"repo": "tmp"}, headers={"If-None-Match": etag}).status_code == 304
+    (tmp_path / "NOTES.md").write_text("")
+    tree.get_tree_cache(str(tmp_path)).invalidate("NOTES.md")
+    res = client.get("/repo/tree", params={"repo": "tmp"}, headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["etag"] != etag
@@ -0,0 +1,8 @@
+import { NextRequest } from 'next/server'
+
+const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
+
+export async function POST(_req: NextRequest, { params }: { params: { id: string } }) {
+  const res = await fetch(`${defaultBase}/repo/exec/${encodeURIComponent(params.id)}/cancel`, { method: 'POST' })
+  return new Response(await res.text(), { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
+}
@@ -0,0 +1,15 @@
+import { NextRequest } from 'next/server'
+
+const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
+
+export async function POST(req: NextRequest) {
+  const body = await req.json().catch(() => ({}))
+  const res = await fetch(`${defaultBase}/repo/exec/stream`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body), signal: req.signal })
+  const headers: Record<string, string> = {
+    'Content-Type': res.headers.get('content-type') || 'text/event-stream',
+    'Cache-Control': 'no-cache',
+  }
+  const execId = res.headers.get('x-exec-id')
+  if (execId) headers['X-Exec-Id'] = execId
+  return new Response(res.body, { status: res.status, headers })
+}
@@ -0,0 +1,17 @@
+import { NextRequest } from 'next/server'
+const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
+
+export async function GET(req: NextRequest) {
+  const { searchParams } = new URL(req.url)
+  const repo = searchParams.get('repo') || 'demo'
+  const file = searchParams.get('path') || ''
+  const target = `${defaultBase}/repo/file/raw?repo=${encodeURIComponent(repo)}&path_q=${encodeURIComponent(file)}`
+  const range = req.headers.get('range')
+  const res = await fetch(target, { headers: range ? { Range: range } : {} })
+  const headers = new Headers()
+  for (const h of ['content-type', 'content-length', 'content-range', 'accept-ranges', 'content-disposition']) {
+    const v = res.headers.get(h)
+    if (v) headers.set(h, v)
+  }
+  return new Response(res.body, { status: res.status, headers })
+}
@@ -1,19 +1,40 @@
 import { NextRequest, NextResponse } from 'next/server'
 const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
 
+// Forward the write precondition; a stale If-Match gets a 412 from the backend
+function writeHeaders(req: NextRequest): Record<string, string> {
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' }
+  const ifMatch = req.headers.get('if-match')
+  if (ifMatch) headers['If-Match'] = ifMatch
+  return headers
+}
+
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url)
   const repo = searchParams.get('repo') || 'demo'
   const file = searchParams.get('path') || ''
-  const target = `${defaultBase}/repo/file?repo=${encodeURIComponent(repo)}&path_q=${encodeURIComponent(file)}`
+  let target = `${defaultBase}/repo/file?repo=${encodeURIComponent(repo)}&path_q=${encodeURIComponent(file)}`
+  const offset = searchParams.get('offset')
+  const length = searchParams.get('length')
+  if (offset) target += `&offset=${encodeURIComponent(offset)}`
+  if (length) target += `&length=${encodeURIComponent(length)}`
   const res = await fetch(target)
-  return new Response(res.body, { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
+  const headers: Record<string, string> = { 'Content-Type': res.headers.get('content-type') || 'application/json' }
+  const etag = res.headers.get('etag')
+  if (etag) headers['ETag'] = etag
+  return new Response(res.body, { status: res.status, headers })
 }
 
 export async function POST(req: NextRequest) {
   const body = await req.json().catch(() => ({}))
-  const res = await fetch(`${defaultBase}/repo/file`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) })
+  const res = await fetch(`${defaultBase}/repo/file`, { method: 'POST', headers: writeHeaders(req), body: JSON.stringify(body) })
   return new Response(await res.text(), { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
 }
 
 
+
+export async function PATCH(req: NextRequest) {
+  const body = await req.json().catch(() => ({}))
+  const res = await fetch(`${defaultBase}/repo/file`, { method: 'PATCH', headers: writeHeaders(req), body: JSON.stringify(body) })
+  return new Response(await res.text(), { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
+}
@@ -4,10 +4,11 @@ const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
 
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url)
-  const repo = searchParams.get('repo') || 'demo'
-  const q = searchParams.get('q') || ''
-  const res = await fetch(`${defaultBase}/repo/search?repo=${encodeURIComponent(repo)}&q=${encodeURIComponent(q)}`)
+  const params = new URLSearchParams({ repo: searchParams.get('repo') || 'demo', q: searchParams.get('q') || '' })
+  for (const key of ['offset', 'limit']) {
+    const value = searchParams.get(key)
+    if (value) params.set(key, value)
+  }
+  const res = await fetch(`${defaultBase}/repo/search?${params.toString()}`)
   return new Response(res.body, { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
 }
-
-
@@ -4,9 +4,16 @@ const defaultBase = process.env.RUNIX_BACKEND_BASE || 'http://localhost:8787'
 
 export async function GET(req: NextRequest) {
   const { searchParams } = new URL(req.url)
-  const repo = searchParams.get('repo') || 'demo'
-  const target = `${defaultBase}/repo/tree?repo=${encodeURIComponent(repo)}`
-  const res = await fetch(target)
-  return new Response(res.body, { status: res.status, headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' } })
+  const params = new URLSearchParams({ repo: searchParams.get('repo') || 'demo' })
+  for (const key of ['path', 'depth']) {
+    const value = searchParams.get(key)
+    if (value) params.set(key, value)
+  }
+  const target = `${defaultBase}/repo/tree?${params.toString()}`
+  const ifNoneMatch = req.headers.get('if-none-match')
+  const res = await fetch(target, { headers: ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : undefined })
+  const headers: Record<string, string> = { 'Content-Type': res.headers.get('content-type') || 'application/json' }
+  const etag = res.headers.get('etag')
+  if (etag) headers['ETag'] = etag
+  return new Response(res.status === 304 ? null : res.body, { status: res.status, headers })
 }
-
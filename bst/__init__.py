@@ -1,12 +1,19 @@
 """bst package metadata"""
 
-from importlib.metadata import version, PackageNotFoundError
-
-try:
-    __version__: str = version("bst")
-except PackageNotFoundError:  # pragma: no cover
-    __version__ = "0.0.0"
-
 from .cli import cli  # noqa: F401
 
 __all__ = ["cli", "__version__"]
+
+
+def __getattr__(name: str) -> str:
+    # importlib.metadata is slow to import; only pay for it when asked
+    if name == "__version__":
+        from importlib.metadata import version, PackageNotFoundError
+
+        global __version__
+        try:
+            __version__ = version("bst")
+        except PackageNotFoundError:  # pragma: no cover
+            __version__ = "0.0.0"
+        return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
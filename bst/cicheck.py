@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+"""Incremental protocol checks for ``bst ci-check``.
+
+Schema validation results are memoised in the repository store
+(``ci_checks``) keyed by the protocol's digest and the schema's digest, so
+re-checking an unchanged protocol against an unchanged schema is a
+``stat`` (see :func:`bst.hashing.cached_hashes`) plus an indexed lookup.
+Cache misses go through :func:`bst.validation.validate_files`, which
+shares one compiled validator per schema and uses a process pool for large
+batches.
+
+``changed_protocols`` asks git which protocol files differ from a revision
+(committed, staged, unstaged or untracked); when the schema itself changed
+every protocol is returned, and the memo sorts out which really need work.
+
+``twins_current`` / ``record_twins`` remember which inputs produced the
+synthetic-control file, so ``ci-check`` only re-simulates (and commits)
+twins when the protocol, cohort size or bst code changed or the file was
+touched since.
+"""
+
+import contextlib
+import hashlib
+import json
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from bst import store as _store
+from bst.hashing import cached_hash, cached_hashes
+from bst.validation import load_schema, validate_files
+
+__all__ = [
+    "CheckResult",
+    "changed_files",
+    "changed_protocols",
+    "check_protocols",
+    "twins_key",
+    "twins_current",
+    "record_twins",
+]
+
+PROTOCOL_DIR = "protocol"
+PROTOCOL_SUFFIXES = (".yaml", ".yml")
+
+
+@dataclass
+class CheckResult:
+    path: Path
+    ok: bool
+    errors: List[str] = field(default_factory=list)
+    # whether the result came from the memo
+    cached: bool = False
+
+
+def _git_lines(root: Path, *args: str) -> List[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=root, check=True, capture_output=True, text=True).stdout
+    except FileNotFoundError:
+        raise RuntimeError("git is required for --changed-since") from None
+    except subprocess.CalledProcessError as exc:
+        raise ValueError(f"git {' '.join(args)} failed: {exc.stderr.strip()}") from None
+    return [line for line in out.splitlines() if line]
+
+
+def changed_files(root: Path, rev: str) -> List[str]:
+    """Paths (relative to ``root``) that differ from ``rev`` in the working tree."""
+    changed = set(_git_lines(root, "diff", "--name-only", "--relative", "--no-renames", rev, "--"))
+    changed.update(_git_lines(root, "ls-files", "--others", "--exclude-standard"))
+    return sorted(changed)
+
+
+def _is_protocol(rel: str) -> bool:
+    return rel.startswith(f"{PROTOCOL_DIR}/") and rel.endswith(PROTOCOL_SUFFIXES)
+
+
+def changed_protocols(root: Path, rev: str, schema_path: Path) -> List[Path]:
+    """Existing protocol files changed since ``rev`` (all of them if the schema changed)."""
+    changed = changed_files(root, rev)
+    schema_rel = schema_path.resolve().relative_to(root.resolve()).as_posix()
+    if schema_rel in changed:
+        candidates = sorted((root / PROTOCOL_DIR).rglob("*"))
+        return [p for p in candidates if p.is_file() and p.suffix in PROTOCOL_SUFFIXES]
+    return [root / rel for rel in changed if _is_protocol(rel) and (root / rel).is_file()]
+
+
+def check_protocols(paths: List[Path], schema_path: Path, root: Path,
+                    workers: Optional[int] = None) -> List[CheckResult]:
+    """Validate ``paths`` against the schema, reusing memoised results."""
+    if not paths:
+        return []
+    schema_digest = cached_hash(schema_path, root)
+    keys = [str(Path(p).resolve()) for p in paths]
+    digests = cached_hashes([Path(k) for k in keys], root)
+    results: List[Optional[CheckResult]] = [None] * len(paths)
+    with contextlib.closing(_store.connect(root)) as conn:
+        for i, (k, d) in enumerate(zip(keys, digests)):
+            row = conn.execute(
+                "SELECT ok, errors FROM ci_checks WHERE path = ? AND digest = ? AND schema = ?",
+                (k, d, schema_digest),
+            ).fetchone()
+            if row is not None:
+                results[i] = CheckResult(Path(paths[i]), bool(row["ok"]), json.loads(row["errors"]), cached=True)
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            computed = validate_files([Path(keys[i]) for i in misses], load_schema(schema_path), workers)
+            now = int(time.time())
+            fresh = []
+            for i, errors in zip(misses, computed):
+                results[i] = CheckResult(Path(paths[i]), not errors, errors)
+                fresh.append((keys[i], digests[i], schema_digest, int(not errors), json.dumps(errors), now))
+            with _store.transaction(conn):
+                conn.executemany("INSERT OR REPLACE INTO ci_checks VALUES (?, ?, ?, ?, ?, ?)", fresh)
+    return results  # type: ignore[return-value]
+
+
+def twins_key(root: Path, protocol: Optional[Path], n: int, seed: int = 0, fmt: str = "parquet") -> str:
+    """Digest of everything a synthetic-control run depends on."""
+    from bst.pipeline import code_version
+
+    material = {
+        "protocol": cached_hash(protocol, root) if protocol is not None and protocol.is_file() else None,
+        "n": n,
+        "seed": seed,
+        "format": fmt,
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def twins_current(root: Path, output: Path, key: str) -> bool:
+    """Whether ``output`` still holds the twins last simulated from ``key``."""
+    if not output.is_file():
+        return False
+    with contextlib.closing(_store.connect(root)) as conn:
+        row = conn.execute("SELECT inputs, digest FROM twin_runs WHERE output = ?",
+                           (str(output.resolve()),)).fetchone()
+    return row is not None and row["inputs"] == key and row["digest"] == cached_hash(output, root)
+
+
+def record_twins(root: Path, output: Path, key: str) -> None:
+    """Remember that ``output`` was just simulated from ``key``."""
+    entry = (str(output.resolve()), key, cached_hash(output, root), int(time.time()))
+    with contextlib.closing(_store.connect(root)) as conn, _store.transaction(conn):
+        conn.execute("INSERT OR REPLACE INTO twin_runs VALUES (?, ?, ?, ?)", entry)
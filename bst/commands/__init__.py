@@ -0,0 +1 @@
+"""Subcommands of ``bst``, imported lazily by :class:`bst.cli.LazyGroup`."""
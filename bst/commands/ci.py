@@ -0,0 +1,263 @@
+"""Evidence CI/CD commands (``bst ci ...``)."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+from typing import Any
+
+import click
+from rich.markup import escape
+
+from bst.cli import _repo_root, console
+from bst.commands.repo import ci_check, power_analysis
+from bst.protocol_io import load_protocol
+from bst.reglint import RegLinter
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 3 – Evidence CI/CD
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def ci() -> None:
+    """Evidence CI/CD pipeline commands."""
+
+
+@ci.command("lint-protocol")
+@click.argument("protocol", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--strict", is_flag=True, help="Exit non-zero on schema or Reg-Lint failures")
+def ci_lint(protocol: pathlib.Path, strict: bool) -> None:
+    """Run JSON-Schema linter on protocol file."""
+    # Re-use existing validation logic
+    ci_check.callback(protocol, strict=strict)
+    # Run Reg-Lint engine
+    linter = RegLinter()
+    issues = linter.run(protocol)
+    if not issues:
+        console.print("[green]✓ Reg-Lint passed[/]")
+    else:
+        for issue in issues:
+            colour = "red" if issue.level == "error" else "yellow"
+            console.print(f"[{colour}]{issue}[/]")
+        console.print(f"[red]✗ {len(issues)} Reg-Lint issue(s) found.[/]")
+        if strict:
+            sys.exit(1)
+
+
+@ci.command("validate")
+@click.argument("protocols", nargs=-1, type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--workers", type=int, default=None, help="Validation processes (default: CPU count)")
+@click.option("--benchmark", "rounds", type=int, default=0, help="Also time ROUNDS passes of jsonschema.validate vs the cached validator")
+def ci_validate(protocols: tuple[pathlib.Path, ...], workers: int | None, rounds: int) -> None:
+    """Validate protocols (default: all of protocol/) against the schema, reporting every error."""
+    from bst.validation import benchmark, load_schema, validate_files
+
+    root = _repo_root()
+    schema = load_schema(root / "schemas" / "protocol.schema.json")
+    paths = list(protocols) or sorted(p for p in (root / "protocol").glob("*.y*ml") if p.is_file())
+    if not paths:
+        console.print("[yellow]No protocols to validate.[/]")
+        return
+    results = validate_files(paths, schema, workers)
+    for path, errors in zip(paths, results):
+        if not errors:
+            console.print(f"[green]✓ {path}[/]")
+            continue
+        console.print(f"[red]✗ {path}[/] ({len(errors)} error(s))")
+        for error in errors:
+            console.print(f"    {escape(error)}")
+    failed = sum(bool(errors) for errors in results)
+    console.print(f"[blue]{len(paths) - failed} of {len(paths)} protocol(s) valid[/]")
+
+    if rounds:
+        timing = benchmark(paths, schema, rounds)
+        console.print(
+            f"[cyan]Benchmark ({rounds} rounds): jsonschema.validate {timing['jsonschema_us']:.0f} µs/protocol, "
+            f"cached {timing['cached_us']:.0f} µs/protocol "
+            f"({timing['jsonschema_us'] / timing['cached_us']:.1f}× faster); all errors {timing['cached_errors_us']:.0f} µs[/]"
+        )
+    if failed:
+        sys.exit(1)
+
+
+@ci.command("power-sim")
+@click.argument("protocol", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+def ci_power(protocol: pathlib.Path) -> None:
+    """Monte-Carlo power simulation."""
+    console.print("[cyan]Running power simulation…[/]")
+    power_analysis.callback(protocol)
+
+
+@ci.command("interim-sim")
+@click.argument("protocol", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--spending", type=click.Choice(["obrien-fleming", "pocock"]), default=None,
+              help="Alpha-spending function (default: ci.alpha_spending or obrien-fleming)")
+@click.option("--looks", type=int, default=None, help="Total analyses incl. final (default: ci.interim_analyses + 1)")
+@click.option("--reps", default=20_000, show_default=True, help="Simulated trials per hypothesis")
+@click.option("--seed", default=0, show_default=True, help="Random seed")
+@click.option("--workers", type=int, default=None, help="Simulation processes (default: CPU count)")
+def ci_interim(protocol: pathlib.Path, spending: str | None, looks: int | None, reps: int, seed: int,
+               workers: int | None) -> None:
+    """Group-sequential simulation of the protocol's interim analyses."""
+    from bst.interim import sequential_from_protocol, simulate_sequential
+
+    protocol_data = load_protocol(protocol) or {}
+    try:
+        seq = sequential_from_protocol(protocol_data, spending=spending, looks=looks)
+        result = simulate_sequential(seq, reps=reps, seed=seed, workers=workers)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+
+    console.print(
+        f"[blue]Group-sequential design: {seq.looks} looks, {seq.spending} spending, "
+        f"alpha {seq.design.alpha}, {seq.design.endpoint} endpoint[/]"
+    )
+    for k, look in enumerate(result.looks, 1):
+        label = "final" if k == len(result.looks) else f"interim {k}"
+        console.print(
+            f"  {label:<10} t={look.fraction:.2f} n≈{look.patients:.0f}  |Z|≥{look.boundary:.3f} "
+            f"(p<{look.nominal_alpha:.4f})  stop: H1 {look.stop_h1:.3f}, H0 {look.stop_h0:.4f}"
+        )
+    console.print(f"  [green]Power: {result.power:.3f}[/]  Type I error: {result.type1_error:.4f}")
+    console.print(
+        f"  Expected sample size: {result.expected_n_h1:.1f} under H1, {result.expected_n_h0:.1f} under H0 "
+        f"(max {result.max_n}; {result.reps} trials each)"
+    )
+
+
+@ci.command("diversity-badge")
+@click.argument("protocol", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--data", "data_file", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+              default=None, help="Enrolment/twin dataset (Parquet, Arrow or CSV; default: data/synthetic-controls.parquet)")
+@click.option("--batch-rows", default=1 << 17, show_default=True, help="Rows read per batch")
+def ci_diversity(protocol: pathlib.Path, data_file: pathlib.Path | None = None, batch_rows: int = 1 << 17) -> None:
+    """Compute the diversity badge of a dataset against reference populations."""
+    from bst.diversity import meets, reference_from_protocol, score_dataset
+
+    protocol_data = load_protocol(protocol) or {}
+    if data_file is None:
+        data_file = _repo_root() / "data" / "synthetic-controls.parquet"
+        if not data_file.exists():
+            console.print("[red]No dataset given and no synthetic controls found (run `bst twin-simulate`).[/]")
+            sys.exit(1)
+    target = (protocol_data.get("ci") or {}).get("diversity_badge")
+    try:
+        if target:
+            meets(None, str(target))  # reject an unknown tier before scoring
+        reference = reference_from_protocol(protocol_data)
+        console.print(f"[cyan]Computing diversity badge for {data_file}…[/]")
+        report = score_dataset(data_file, reference, batch_rows=batch_rows)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+
+    for dim in report.dimensions:
+        worst = min(dim.ppr, key=dim.ppr.get)
+        note = f", {dim.unmapped} unmapped" if dim.unmapped else ""
+        console.print(
+            f"  {dim.dimension:<6} index {dim.index:.3f}  lowest PPR {dim.ppr[worst]:.2f} ({worst}){note}"
+        )
+    badge = report.badge or "none"
+    console.print(f"  Score: {report.score:.3f} over {report.rows} rows  Badge: [bold]{badge}[/]")
+
+    if target:
+        if meets(report.badge, str(target)):
+            console.print(f"[green]✓ Meets diversity badge target ({target})[/]")
+        else:
+            console.print(f"[red]✗ Below diversity badge target ({target})[/]")
+            sys.exit(1)
+
+
+@ci.command("twin-auc")
+@click.argument("control", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--twins", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path), default=None,
+              help="File with twin predictions, row-aligned with CONTROL (default: CONTROL itself)")
+@click.option("--label-col", default="response", show_default=True, help="Observed outcome column in CONTROL")
+@click.option("--score-col", default=None, help="Prediction column (default: score/prediction/probability)")
+@click.option("--bootstrap", default=1000, show_default=True, help="Bootstrap replicates for the CI (0 to skip)")
+@click.option("--seed", default=0, show_default=True, help="Random seed")
+@click.option("--workers", type=int, default=None, help="Bootstrap processes (default: CPU count)")
+@click.option("--batch-rows", default=1 << 20, show_default=True, help="Rows read per batch")
+def ci_twin_auc(control: pathlib.Path, twins: pathlib.Path | None = None, label_col: str = "response",
+                score_col: str | None = None, bootstrap: int = 1000, seed: int = 0, workers: int | None = None,
+                batch_rows: int = 1 << 20) -> None:
+    """Evaluate digital-twin AUC against observed control outcomes."""
+    from bst.auc import evaluate_files
+
+    try:
+        result = evaluate_files(control, twins, label_col=label_col, score_col=score_col, bootstrap=bootstrap,
+                                seed=seed, workers=workers, batch_rows=batch_rows)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+    ci = ""
+    if result.ci_low is not None:
+        ci = f" (95% CI {result.ci_low:.4f}–{result.ci_high:.4f}, {result.bootstrap} bootstrap replicates)"
+    console.print(f"[cyan]Twin AUC = {result.auc:.4f}{ci}[/]")
+    console.print(f"  {result.n_pos} positive / {result.n_neg} negative outcomes")
+    if result.missing_labels or result.missing_scores:
+        console.print(f"  [yellow]Left out {result.missing_labels} row(s) without a label and "
+                      f"{result.missing_scores} without a score[/]")
+
+
+def _pipeline(protocol: str | None) -> tuple[pathlib.Path, dict[str, Any]]:
+    """Repository root and the pipeline stages from bastion.yaml."""
+    from bst.pipeline import load_stages, resolve_protocol
+
+    root = _repo_root()
+    cfg_path = root / "bastion.yaml"
+    config = (load_protocol(cfg_path, root) if cfg_path.exists() else None) or {}
+    try:
+        return root, load_stages(config, resolve_protocol(root, protocol, config))
+    except ValueError as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+
+
+@ci.command("workflow")
+@click.option("--protocol", default=None, help="Protocol to fill into stage commands (default: pipeline.protocol)")
+def ci_workflow(protocol: str | None) -> None:
+    """Show the CI pipeline graph from bastion.yaml."""
+    from bst.pipeline import levels
+
+    _, stages = _pipeline(protocol)
+    for depth, names in enumerate(levels(stages)):
+        for name in names:
+            needs = f" ← {', '.join(stages[name].needs)}" if stages[name].needs else ""
+            console.print(f"[cyan]{'  ' * depth}{name}[/]{needs}  [dim]{stages[name].run}[/]")
+
+
+@ci.command("run")
+@click.argument("stages", nargs=-1)
+@click.option("--protocol", default=None, help="Protocol to fill into stage commands (default: pipeline.protocol)")
+@click.option("--jobs", "-j", type=int, default=None, help="Stages run at once (default: CPU count)")
+@click.option("--no-cache", is_flag=True, help="Run every stage even if its inputs are unchanged")
+def ci_run(stages: tuple[str, ...], protocol: str | None, jobs: int | None, no_cache: bool) -> None:
+    """Run the CI pipeline (or STAGES and what they need), skipping unchanged stages."""
+    from bst.pipeline import run_pipeline
+
+    root, pipeline = _pipeline(protocol)
+
+    def report(result) -> None:
+        if result.status == "passed":
+            console.print(f"[green]✓ {result.name}[/] ({result.seconds:.1f}s)")
+        elif result.status == "cached":
+            console.print(f"[green]✓ {result.name}[/] [dim](cached)[/]")
+        elif result.status == "skipped":
+            console.print(f"[yellow]- {result.name} skipped ({escape(result.log.strip())})[/]")
+        else:
+            console.print(f"[red]✗ {result.name} (exit {result.returncode})[/]")
+            console.print(result.log.rstrip(), markup=False, highlight=False)
+
+    try:
+        results = run_pipeline(root, pipeline, stages, jobs=jobs, use_cache=not no_cache, on_result=report)
+    except ValueError as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+    ran = sum(r.status == "passed" for r in results)
+    cached = sum(r.status == "cached" for r in results)
+    console.print(f"[blue]{ran} run, {cached} cached, {len(results) - ran - cached} failed or skipped[/]")
+    if not all(r.ok for r in results):
+        sys.exit(1)
@@ -0,0 +1,115 @@
+"""Collaboration commands: protocol diffs and threaded comments."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+
+import click
+
+from bst.cli import _repo_root, console
+from bst.protocol_io import load_protocol
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Collaboration & Governance Commands (Pillar 2)
+# ──────────────────────────────────────────────────────────────────────────
+
+@click.group()
+def diff() -> None:
+    """Diff utilities for trial artefacts."""
+
+
+_SEVERITY_STYLE = {"substantial": "red", "non-substantial": "yellow", "administrative": "dim"}
+
+
+def _short(value: object, width: int = 60) -> str:
+    import json
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+@diff.command("protocol")
+@click.argument("left", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.argument("right", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--json", "as_json", is_flag=True, help="Print the changes as a JSON Patch (RFC 6902).")
+@click.option("--fail-on", type=click.Choice(["substantial", "non-substantial", "administrative"]), default=None,
+              help="Exit 1 if any change is at least this severe.")
+def diff_protocol(left: pathlib.Path, right: pathlib.Path, as_json: bool, fail_on: str | None) -> None:
+    """Show field-level changes between two protocol YAML files."""
+    import json
+
+    from rich.markup import escape
+
+    from bst.protocol_diff import SEVERITIES, diff as tree_diff, highest_severity, to_patch
+
+    changes = tree_diff(load_protocol(left), load_protocol(right))
+    if as_json:
+        click.echo(json.dumps(to_patch(changes), indent=2, ensure_ascii=False, default=str))
+    elif not changes:
+        console.print("[green]No changes.[/]")
+    else:
+        for c in changes:
+            style = _SEVERITY_STYLE[c.severity]
+            if c.op == "move":
+                detail = f"moved from {c.from_}"
+            elif c.op == "replace":
+                detail = f"{_short(c.old)} → {_short(c.value)}"
+            else:
+                detail = _short(c.value if c.op == "add" else c.old)
+            console.print(f"[{style}]{c.severity:>15}[/] {c.op:<7} {escape(c.path or '/')}  {escape(detail)}")
+        counts = {s: sum(c.severity == s for c in changes) for s in reversed(SEVERITIES)}
+        console.print(", ".join(f"{n} {s}" for s, n in counts.items() if n) + f" ({len(changes)} changes)")
+    worst = highest_severity(changes)
+    if fail_on and worst and SEVERITIES.index(worst) >= SEVERITIES.index(fail_on):
+        sys.exit(1)
+
+
+@click.group()
+def comment() -> None:
+    """Threaded discussion comments."""
+
+
+@comment.command("add")
+@click.option("--file", "file_path", required=True, type=str, help="File path relative to repo root")
+@click.option("--line", "line_no", required=True, type=int, help="Line number in file")
+@click.option("--text", required=True, help="Comment text")
+@click.option("--role", default="reviewer", show_default=True, help="Role of commenter (e.g., statistician, IRB)")
+def comment_add(file_path: str, line_no: int, text: str, role: str) -> None:
+    """Add a threaded comment."""
+    from bst.comments import CommentStore
+    entry = CommentStore(_repo_root()).add(file_path, line_no, text, role)
+    console.print(f"[green]Comment added ({entry['id']}).[/]")
+
+
+@comment.command("list")
+@click.option("--file", "file_path", default=None, help="Filter comments by file path")
+def comment_list(file_path: str | None) -> None:
+    """List comments, optionally filtered by file."""
+    from bst.comments import CommentStore
+    comments = CommentStore(_repo_root()).list(file_path)
+    if not comments:
+        console.print("[yellow]No comments found.[/]")
+        return
+    for c in comments:
+        status = "resolved" if c.get("resolved") else "open"
+        console.print(f"[blue]{c['file']}:{c['line']}[/] \\[{status}] {c['user']} ({c['role']}): {c['text']}")
+
+
+@comment.command("resolve")
+@click.argument("comment_id")
+def comment_resolve(comment_id: str) -> None:
+    """Mark a comment thread as resolved."""
+    from bst.comments import CommentStore
+    if CommentStore(_repo_root()).resolve(comment_id):
+        console.print("[green]Comment resolved.[/]")
+    else:
+        console.print("[red]Comment ID not found.[/]")
+
+
+@comment.command("compact")
+def comment_compact() -> None:
+    """Fold resolve events into the comment log."""
+    from bst.comments import CommentStore
+    removed = CommentStore(_repo_root()).compact()
+    console.print(f"[green]Compacted comment log ({removed} resolve events folded).[/]")
@@ -0,0 +1,123 @@
+"""Security & compliance commands: e-signatures, audit export, ledger proofs."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+
+import click
+from rich.markup import escape
+
+from bst import onchain as _onchain
+from bst.cli import _repo_root, _store_insert, console
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 6 – Security & Compliance
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def compliance() -> None:
+    """Compliance utilities (Part 11 e-signatures, audit logs)."""
+
+
+@compliance.command("sign")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--user", default=lambda: os.getenv("USER", "anon"), help="Signer name")
+@click.option("--algorithm", type=click.Choice(["sha256", "blake2b-tree"]), default=lambda: os.getenv("BST_HASH_ALGORITHM", "sha256"), show_default="sha256", help="Digest algorithm")
+def compliance_sign(file: pathlib.Path, user: str, algorithm: str) -> None:
+    import time
+    from bst.hashing import cached_hash
+    root = _repo_root()
+    digest = cached_hash(file, root, algorithm)
+    if algorithm != "sha256":
+        digest = f"{algorithm}:{digest}"
+    _store_insert(root, "signatures", {"file": str(file), "digest": digest, "user": user, "time": int(time.time())})
+    console.print("[green]File e-signed (Part 11 stub).[/]")
+
+
+@compliance.command("audit-export")
+def compliance_audit() -> None:
+    root = _repo_root()
+    import json
+    from bst.comments import CommentStore
+    logs = {}
+    comments = CommentStore(root).list()
+    if comments:
+        logs["comments.json"] = comments
+    from bst import store as _store
+    for table in ["signatures", "models", "datasets"]:
+        records = _store.rows(root, table)
+        if records:
+            logs[_store.LEGACY_FILES[table]] = records
+    export = root / f"audit-log-{int(__import__('time').time())}.json"
+    export.write_text(json.dumps(logs, indent=2))
+    console.print(f"[green]Audit log exported → {export}[/]")
+
+# ─── On-chain ledger command ───────────────────────────────────────────
+
+@compliance.command("onchain-commit")
+@click.argument("artifacts", nargs=-1, required=True)
+@click.option("--batch", is_flag=True, help="Anchor all files under one Merkle root (implied by dirs, globs or several paths)")
+@click.option("--label", default=None, help="Batch label recorded in the ledger")
+@click.option("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+def compliance_onchain(artifacts: tuple[str, ...], batch: bool, label: str | None, workers: int | None) -> None:
+    """Record artifact hash(es) to on-chain audit ledger (stub).
+
+    ARTIFACTS may be files, directories or glob patterns.
+    """
+    root = _repo_root()
+    if not batch and len(artifacts) == 1 and pathlib.Path(artifacts[0]).is_file():
+        entry = _onchain.record_artifact(pathlib.Path(artifacts[0]), root)
+        console.print(f"[green]On-chain ledger entry added ({entry['sha256'][:8]}…)[/]")
+        return
+    files = _onchain.collect_artifacts(artifacts)
+    if not files:
+        console.print("[red]No files matched.[/]")
+        sys.exit(1)
+    manifest = _onchain.record_batch(files, root, label=label, workers=workers)
+    console.print(
+        f"[green]Anchored {len(files)} files under batch root {manifest['batch_root'][:12]}… "
+        f"(ledger leaf {manifest['entry']['leaf']}); proofs → {manifest['manifest']}[/]"
+    )
+
+
+@compliance.command("prove")
+@click.argument("artifact", required=False, type=click.Path(path_type=pathlib.Path))
+@click.option("--consistency", "old_size", type=int, default=None, help="Prove the ledger extends its state at this size")
+@click.option("--out", type=click.Path(dir_okay=False, path_type=pathlib.Path), help="Write the proof JSON here")
+def compliance_prove(artifact: pathlib.Path | None, old_size: int | None, out: pathlib.Path | None) -> None:
+    """Produce a Merkle inclusion proof for ARTIFACT, or a consistency proof."""
+    import json
+    if (artifact is None) == (old_size is None):
+        raise click.UsageError("Give either ARTIFACT or --consistency OLD_SIZE.")
+    root = _repo_root()
+    try:
+        if artifact is not None:
+            proof = _onchain.prove_inclusion(root, artifact)
+        else:
+            proof = _onchain.prove_consistency(root, old_size)
+    except (LookupError, ValueError) as exc:
+        console.print(f"[red]{escape(str(exc))}[/]")
+        sys.exit(1)
+    text = json.dumps(proof, indent=2)
+    if out:
+        out.write_text(text)
+        console.print(f"[green]Proof written → {out} (tree size {proof['tree_size']}, root {proof['root'][:12]}…)[/]")
+    else:
+        click.echo(text)
+
+
+@compliance.command("verify")
+@click.argument("proof_file", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--root", "expected_root", default=None, help="Trusted root hash (hex) to check against")
+def compliance_verify(proof_file: pathlib.Path, expected_root: str | None) -> None:
+    """Check an inclusion or consistency proof."""
+    import json
+    proof = json.loads(proof_file.read_text())
+    if _onchain.verify_proof(proof, expected_root):
+        console.print(f"[green]✓ {proof['type']} proof valid for tree size {proof['tree_size']}[/]")
+    else:
+        console.print(f"[red]✗ {proof['type']} proof does not verify[/]")
+        sys.exit(1)
@@ -0,0 +1,136 @@
+"""Protocol history commands (``bst history ...``)."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import pathlib
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+import click
+from rich.markup import escape
+
+from bst.cli import _repo_root, console
+from bst.protocol_io import load_protocol
+
+_PROTOCOL_HELP = "Protocol to query (default: pipeline.protocol, or the only file in protocol/)"
+
+
+def _short(value: Any, width: int = 60) -> str:
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def _date(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+@contextlib.contextmanager
+def _indexed(protocol: str | None) -> Iterator[tuple[pathlib.Path, pathlib.Path]]:
+    """Repository root and protocol, with the history index brought up to date."""
+    from bst import history
+    from bst.pipeline import resolve_protocol
+
+    root = _repo_root()
+    cfg_path = root / "bastion.yaml"
+    config = (load_protocol(cfg_path, root) if cfg_path.exists() else None) or {}
+    try:
+        rel = resolve_protocol(root, protocol, config)
+        if rel is None:
+            raise ValueError("Several protocols in protocol/: pass --protocol")
+        history.index(root, [root / rel])
+        yield root, root / rel
+    except ValueError as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+
+
+@click.group()
+def history() -> None:
+    """Protocol field history: blame, values at a revision, churn."""
+
+
+@history.command("index")
+@click.argument("protocols", nargs=-1, type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+def history_index(protocols: tuple[pathlib.Path, ...]) -> None:
+    """Index new commits of PROTOCOLS (default: every protocol in protocol/)."""
+    from bst import history as _history
+
+    root = _repo_root()
+    start = time.perf_counter()
+    try:
+        done = _history.index(root, [p.resolve() for p in protocols] or None)
+    except ValueError as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+    for rel, n in done.items():
+        console.print(f"[green]✓[/] {escape(rel)}: {n} new revision(s)")
+    console.print(f"[dim]Indexed in {time.perf_counter() - start:.2f}s[/]")
+
+
+@history.command("blame")
+@click.argument("field", default="")
+@click.option("--protocol", default=None, help=_PROTOCOL_HELP)
+@click.option("--rev", default="HEAD", show_default=True, help="Revision to blame")
+def history_blame(field: str, protocol: str | None, rev: str) -> None:
+    """Show the commit that set each value under FIELD (e.g. spec.population.inclusion_criteria)."""
+    from bst.history import blame
+
+    with _indexed(protocol) as (root, path):
+        spans = blame(root, path, field, rev)
+    if not spans:
+        console.print(f"[yellow]No values under {escape(field or '<root>')}.[/]")
+    for s in spans:
+        console.print(f"[cyan]{s.sha[:8]}[/] {_date(s.time)} [dim]{escape(s.author)}[/]  "
+                      f"{escape(s.path)} = {escape(_short(s.value))}")
+
+
+@history.command("show")
+@click.argument("field")
+@click.option("--protocol", default=None, help=_PROTOCOL_HELP)
+@click.option("--rev", default="HEAD", show_default=True, help="Revision to read")
+def history_show(field: str, protocol: str | None, rev: str) -> None:
+    """Print the values under FIELD at a revision, as JSON."""
+    from bst.history import value_at
+
+    with _indexed(protocol) as (root, path):
+        values = value_at(root, path, field, rev)
+    click.echo(json.dumps({k: v if k.endswith("[]") else v[0] for k, v in values.items()},
+                          indent=2, ensure_ascii=False, default=str))
+
+
+@history.command("log")
+@click.argument("field", default="")
+@click.option("--protocol", default=None, help=_PROTOCOL_HELP)
+def history_log(field: str, protocol: str | None) -> None:
+    """List the commits that changed FIELD, with the values added and removed."""
+    from bst.history import log
+
+    with _indexed(protocol) as (root, path):
+        events = log(root, path, field)
+    sha = None
+    for e in events:
+        if e.sha != sha:
+            sha = e.sha
+            console.print(f"[cyan]{e.sha[:8]}[/] {_date(e.time)} [dim]{escape(e.author)}[/]  {escape(e.summary)}")
+        colour = "green" if e.op == "+" else "red"
+        console.print(f"  [{colour}]{e.op} {escape(e.path)} = {escape(_short(e.value))}[/]")
+
+
+@history.command("churn")
+@click.argument("field", default="")
+@click.option("--protocol", default=None, help=_PROTOCOL_HELP)
+@click.option("--limit", type=int, default=20, show_default=True, help="Fields to list")
+def history_churn(field: str, protocol: str | None, limit: int) -> None:
+    """List the most frequently changed fields under FIELD."""
+    from bst.history import churn
+
+    with _indexed(protocol) as (root, path):
+        rows = churn(root, path, field, limit)
+    if not rows:
+        console.print("[yellow]No changes since the first revision.[/]")
+    for name, n, sha in rows:
+        console.print(f"{n:>5}  {escape(name)}  [dim]last {sha[:8]}[/]")
@@ -0,0 +1,57 @@
+"""Model & data hub and record-store commands."""
+
+from __future__ import annotations
+
+import pathlib
+
+import click
+
+from bst.cli import _repo_root, _store_insert, console
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 4 – Model & Data Hub
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def hub() -> None:
+    """Model & dataset registry commands."""
+
+
+@hub.command("model-publish")
+@click.argument("weights", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--card", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path), help="Model card YAML/JSON")
+def hub_model_publish(weights: pathlib.Path, card: pathlib.Path | None) -> None:
+    import uuid, time
+    entry = {"id": str(uuid.uuid4()), "weights": str(weights), "card": str(card) if card else None, "timestamp": int(time.time())}
+    _store_insert(_repo_root(), "models", entry)
+    console.print(f"[green]Model registered ({entry['id']}).[/]")
+
+
+@hub.command("dataset-publish")
+@click.argument("dataset", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--card", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path), help="Dataset card YAML/JSON")
+def hub_dataset_publish(dataset: pathlib.Path, card: pathlib.Path | None) -> None:
+    import uuid, time
+    entry = {"id": str(uuid.uuid4()), "dataset": str(dataset), "card": str(card) if card else None, "timestamp": int(time.time())}
+    _store_insert(_repo_root(), "datasets", entry)
+    console.print(f"[green]Dataset registered ({entry['id']}).[/]")
+
+
+@click.group()
+def store() -> None:
+    """Repository record store (.ctrepo/bastion.db)."""
+
+
+@store.command("migrate")
+def store_migrate() -> None:
+    """Import legacy registry, signature and ledger JSON files."""
+    from bst import store as _store
+    counts = _store.migrate_json(_repo_root())
+    if not counts:
+        console.print("[yellow]Nothing to migrate.[/]")
+        return
+    for table, (n, skipped) in counts.items():
+        console.print(f"[green]{_store.LEGACY_FILES[table]} → {table}: {n} records[/]")
+        if skipped:
+            console.print(f"[yellow]  {skipped} duplicate or invalid records skipped[/]")
@@ -0,0 +1,287 @@
+"""Repository commands: scaffolding, protocols, twins, checks and power."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+from typing import Any
+
+import click
+import yaml
+from jsonschema import ValidationError
+from rich.markup import escape
+
+from bst import gitrepo
+from bst.cli import ROOT_MARKER, _repo_root, console
+from bst.protocol_io import load_protocol
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Commands
+# ──────────────────────────────────────────────────────────────────────────
+
+@click.command()
+@click.option("--indication", required=True, help="Therapeutic area, e.g. NSCLC")
+def init(indication: str) -> None:
+    """Scaffold a new Bastion trial repository in the current directory."""
+
+    if pathlib.Path(ROOT_MARKER).exists():
+        console.print("[yellow]Repo already initialised.[/]")
+        return
+
+    # Init git repo if not already
+    gitrepo.init_repo(pathlib.Path.cwd())
+
+    # Create sentinel dir and baseline files
+    pathlib.Path(ROOT_MARKER).mkdir(exist_ok=True)
+    (pathlib.Path("protocol")).mkdir(exist_ok=True)
+    (pathlib.Path("schemas")).mkdir(exist_ok=True)
+    # Provide a minimal JSON Schema for protocols so validation works out-of-the-box
+    default_schema = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "type": "object",
+        "required": ["id"],
+        "properties": {
+            "id": {"type": "string"},
+            "title": {"type": "string"},
+            "version": {"type": "string"},
+            "inclusionCriteria": {"type": "array"}
+        }
+    }
+    with open("schemas/protocol.schema.json", "w") as schema_fh:
+        __import__("json").dump(default_schema, schema_fh, indent=2)
+
+    bastion_cfg = {
+        "indication": indication,
+        "schema": "schemas/protocol.schema.json",
+        "version": 1,
+    }
+    with open("bastion.yaml", "w") as fh:
+        yaml.safe_dump(bastion_cfg, fh)
+
+    gitrepo.record(pathlib.Path.cwd(), [pathlib.Path(ROOT_MARKER), pathlib.Path("bastion.yaml")],
+                   f"scaffold trial for {indication}")
+    console.print(f"[green]Initialised Bastion repo for {indication}.[/]")
+
+
+@click.command("add-protocol")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+def add_protocol(path: pathlib.Path) -> None:
+    """Attach or update a protocol file under ./protocol/."""
+
+    root = _repo_root()
+    schema_path = root / "schemas" / "protocol.schema.json"
+
+    if not schema_path.exists():
+        console.print("[red]Protocol schema not found. Did you run bst init?[/]")
+        sys.exit(1)
+
+    # Validate YAML against schema
+    from bst.validation import load_schema, validate
+    raw = load_protocol(path)
+    try:
+        validate(raw, load_schema(schema_path))
+    except ValidationError as e:
+        console.print(f"[red]Protocol validation failed:[/] {e.message}")
+        sys.exit(1)
+
+    dest = root / "protocol" / path.name
+    dest.write_text(path.read_text())
+
+    gitrepo.record(root, [dest], f"add protocol {dest.name}")
+    console.print(f"[green]Protocol {dest.name} added.[/]")
+
+
+@click.command("twin-simulate")
+@click.option("--n", default=100, show_default=True, help="Number of synthetic patients to simulate")
+@click.option("--protocol", help="Protocol file to use for simulation parameters")
+@click.option("--seed", default=0, show_default=True, help="Random seed (same seed, same cohort)")
+@click.option("--format", "fmt", type=click.Choice(["parquet", "arrow"]), default="parquet", show_default=True, help="Output format")
+@click.option("--block-rows", default=1 << 17, show_default=True, help="Twins generated per block / row group")
+def twin_simulate(n: int, protocol: str, seed: int = 0, fmt: str = "parquet", block_rows: int = 1 << 17) -> None:
+    """Generate a synthetic control cohort using protocol parameters."""
+    from bst.twins import spec_from_protocol, write_twins
+
+    root = _repo_root()
+    data_dir = root / "data"
+    data_dir.mkdir(exist_ok=True)
+
+    protocol_data: dict[str, Any] = {}
+    # If protocol specified, read CI config
+    if protocol:
+        protocol_path = root / "protocol" / protocol
+        if protocol_path.exists():
+            protocol_data = load_protocol(protocol_path, root) or {}
+            # Use protocol's CI config if available
+            ci_config = protocol_data.get("ci", {})
+            n = ci_config.get("synthetic_twins", n)
+            console.print(f"[blue]Using protocol {protocol} (n={n} from CI config)[/]")
+
+    twin_file = data_dir / ("synthetic-controls.parquet" if fmt == "parquet" else "synthetic-controls.arrow")
+    try:
+        write_twins(twin_file, spec_from_protocol(protocol_data), n, seed=seed, block_rows=block_rows, fmt=fmt)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]{escape(str(exc))}[/]")
+        sys.exit(1)
+
+    gitrepo.record(root, [twin_file], f"add synthetic control twins (n={n}, seed={seed})")
+    console.print(f"[green]Simulated {n} twins -> {twin_file}[/]")
+
+
+@click.command("ci-check")
+@click.argument("protocol_file", required=False, type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--changed-since", "changed_since", metavar="REV", default=None,
+              help="Validate every protocol changed since git revision REV (no twin simulation)")
+@click.option("--workers", type=int, default=None, help="Validation processes (default: CPU count)")
+@click.option("--strict", is_flag=True, help="Exit non-zero when PROTOCOL_FILE fails validation")
+def ci_check(protocol_file: pathlib.Path | None, changed_since: str | None = None, workers: int | None = None,
+             strict: bool = False) -> None:
+    """Run CI checks on a protocol (λ-Trial DSL validation)."""
+    from bst.cicheck import changed_protocols, check_protocols, record_twins, twins_current, twins_key
+    from bst.twins import available as twins_available
+
+    root = _repo_root()
+    schema_path = root / "schemas" / "protocol.schema.json"
+
+    if changed_since is not None:
+        try:
+            paths = changed_protocols(root, changed_since, schema_path)
+            results = check_protocols(paths, schema_path, root, workers=workers)
+        except (RuntimeError, ValueError) as exc:
+            console.print(f"[red]✗ {escape(str(exc))}[/]")
+            sys.exit(1)
+        for res in results:
+            rel = res.path.relative_to(root)
+            note = " [dim](cached)[/]" if res.cached else ""
+            if res.ok:
+                console.print(f"[green]✓ {rel}[/]{note}")
+            else:
+                console.print(f"[red]✗ {rel}[/]{note}")
+                for error in res.errors:
+                    console.print(f"    {escape(error)}")
+        failed = sum(not r.ok for r in results)
+        cached = sum(r.cached for r in results)
+        console.print(
+            f"[blue]{len(results)} protocol(s) changed since {escape(changed_since)}: "
+            f"{len(results) - failed} passed, {failed} failed ({cached} from cache)[/]"
+        )
+        if failed:
+            sys.exit(1)
+        return
+
+    if protocol_file is None:
+        console.print("[red]✗ Give a PROTOCOL_FILE or --changed-since REV[/]")
+        sys.exit(1)
+
+    # Validate against schema (memoised by protocol and schema digest)
+    result = check_protocols([protocol_file], schema_path, root)[0]
+    if result.ok:
+        console.print("[green]✓ Schema validation passed[/]")
+    else:
+        console.print(f"[red]✗ Schema validation failed:[/] {escape(result.errors[0])}")
+        if strict:
+            sys.exit(1)
+        return
+    protocol_data = load_protocol(protocol_file)
+
+    # Check CI requirements
+    ci_config = protocol_data.get("ci", {})
+    
+    if ci_config.get("power_target"):
+        console.print(f"[blue]Power target: {ci_config['power_target']}[/]")
+    
+    if ci_config.get("diversity_badge"):
+        console.print(f"[blue]Diversity badge target: {ci_config['diversity_badge']}[/]")
+    
+    # Simulate required number of twins, unless the last run used the same inputs
+    n_twins = ci_config.get("synthetic_twins", 100)
+    twin_file = root / "data" / "synthetic-controls.parquet"
+    key = twins_key(root, root / "protocol" / protocol_file.name, n_twins)
+    if not twins_available():
+        console.print("[yellow]⚠️  Skipping twin simulation: numpy and pyarrow are required (pip install 'bst\\[sim]')[/]")
+    elif twins_current(root, twin_file, key):
+        console.print(f"[green]✓ Synthetic controls up to date (n={n_twins})[/]")
+    else:
+        console.print(f"[yellow]Running twin simulation (n={n_twins})...[/]")
+        # Call twin-simulate with protocol config
+        twin_simulate.callback(n_twins, protocol_file.name)
+        record_twins(root, twin_file, key)
+    
+    console.print("[green]✓ CI checks completed[/]")
+
+
+@click.command("power-analysis")
+@click.argument("protocol_file", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--endpoint", type=click.Choice(["continuous", "binary", "survival"]), default=None, help="Override the endpoint model inferred from endpoints.primary")
+@click.option("--effect-size", type=float, default=None, help="Standardised mean difference (continuous)")
+@click.option("--control-rate", type=float, default=None, help="Control response rate (binary)")
+@click.option("--treatment-rate", type=float, default=None, help="Experimental response rate (binary)")
+@click.option("--hazard-ratio", type=float, default=None, help="Experimental/control hazard ratio (survival)")
+@click.option("--reps", "max_reps", default=50_000, show_default=True, help="Maximum simulated trials")
+@click.option("--tolerance", default=0.01, show_default=True, help="Stop once the 95% CI half-width is below this")
+@click.option("--seed", default=0, show_default=True, help="Random seed")
+@click.option("--workers", type=int, default=None, help="Simulation processes (default: CPU count)")
+@click.option("--solve-n", is_flag=True, help="Find the smallest sample size reaching ci.power_target")
+def power_analysis(protocol_file: pathlib.Path, endpoint: str | None = None, effect_size: float | None = None,
+                   control_rate: float | None = None, treatment_rate: float | None = None,
+                   hazard_ratio: float | None = None, max_reps: int = 50_000, tolerance: float = 0.01,
+                   seed: int = 0, workers: int | None = None, solve_n: bool = False) -> None:
+    """Run Monte-Carlo power analysis for a protocol."""
+    from bst.power import design_from_protocol, simulate_power, solve_sample_size
+
+    protocol_data = load_protocol(protocol_file) or {}
+    ci_config = protocol_data.get("ci", {})
+    power_target = float(ci_config.get("power_target", 0.8))
+
+    design = design_from_protocol(
+        protocol_data, endpoint=endpoint, effect_size=effect_size, control_rate=control_rate,
+        treatment_rate=treatment_rate, hazard_ratio=hazard_ratio,
+    )
+    if solve_n:
+        try:
+            solved = solve_sample_size(design, power_target, reps=max_reps, seed=seed, workers=workers,
+                                       tolerance=tolerance)
+        except (RuntimeError, ValueError) as exc:
+            console.print(f"[red]✗ {escape(str(exc))}[/]")
+            sys.exit(1)
+        found, result = solved.design, solved.power
+        console.print(f"[blue]Sample Size Search ({design.endpoint}, alpha {design.alpha}, power target {power_target}):[/]")
+        console.print(f"  Analytic approximation: {solved.analytic_total}")
+        console.print(
+            f"  [green]Required sample size: {found.n_control + found.n_treatment}[/] "
+            f"({found.n_control} control / {found.n_treatment} experimental)"
+        )
+        console.print(
+            f"  Estimated power: {result.power:.3f} (95% CI {result.ci_low:.3f}–{result.ci_high:.3f}, "
+            f"{result.reps} simulated trials)"
+        )
+        console.print(f"  Candidates scored: {len(solved.evaluations)} in {solved.passes} passes")
+        return
+
+    try:
+        result = simulate_power(design, max_reps=max_reps, tolerance=tolerance, seed=seed, workers=workers)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]✗ {escape(str(exc))}[/]")
+        sys.exit(1)
+
+    effect = {
+        "continuous": f"d={design.effect_size}",
+        "binary": f"{design.control_rate} → {design.treatment_rate}",
+        "survival": f"HR={design.hazard_ratio}",
+    }[design.endpoint]
+    console.print(f"[blue]Power Analysis Results:[/]")
+    console.print(f"  Sample size: {design.n_control + design.n_treatment} ({design.n_control} control / {design.n_treatment} experimental)")
+    console.print(f"  Endpoint: {design.endpoint} ({effect})")
+    console.print(f"  Power target: {power_target}")
+    console.print(f"  Alpha: {design.alpha}")
+    console.print(
+        f"  [green]Estimated power: {result.power:.3f}[/] "
+        f"(95% CI {result.ci_low:.3f}–{result.ci_high:.3f}, {result.reps} simulated trials"
+        f"{'' if result.converged else ', not converged'})"
+    )
+    if result.ci_low >= power_target:
+        console.print(f"  [yellow]Recommendation: Sample size adequate[/]")
+    elif result.ci_high < power_target:
+        console.print(f"  [red]Recommendation: Underpowered - increase sample size[/]")
+    else:
+        console.print(f"  [yellow]Recommendation: Borderline - power target within simulation error[/]")
@@ -0,0 +1,162 @@
+"""Platform service stubs: spaces, data mesh, API, marketplace, registry, metrics, discovery."""
+
+from __future__ import annotations
+
+import pathlib
+
+import click
+
+from bst import registry as _registry
+from bst.cli import __version__, console
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 5 – Trial Spaces (demo layer)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.command("space-deploy")
+@click.argument("app", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--cpu", default=True, is_flag=True, help="Deploy on CPU tier (default)")
+@click.option("--gpu", is_flag=True, help="Deploy on GPU tier")
+def space_deploy(app: pathlib.Path, cpu: bool, gpu: bool) -> None:
+    """Deploy demo dashboard (stub)."""
+    tier = "GPU" if gpu else "CPU"
+    console.print(f"[green]Deploying {app} to Trial Space ({tier} tier)…[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 7 – Federated Data Mesh (stub)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.command("fhir-query")
+@click.option("--endpoint", required=True, help="FHIR base URL inside hospital VPC")
+@click.option("--query", required=True, help="FHIR query string e.g. Patient?gender=female")
+def fhir_query(endpoint: str, query: str) -> None:
+    console.print(f"[cyan]Running on-prem FHIR query at {endpoint}/{query} (simulated)…[/]")
+    console.print("[green]Result: 42 matching resources (aggregated count only).[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 8 – Inference & API Layer (stub HTTP server)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.command("api-serve")
+@click.option("--port", default=8000, show_default=True)
+def api_serve(port: int) -> None:
+    """Start minimal HTTP server exposing /simulate endpoint."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    import json
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload: dict) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+
+        def do_GET(self):  # noqa: N802
+            if self.path.startswith("/simulate"):
+                self._send(200, {"status": "ok", "n": 100})
+            else:
+                self._send(404, {"error": "Not found"})
+
+    console.print(f"[green]Serving inference API on :{port} (Ctrl+C to stop)…[/]")
+    try:
+        HTTPServer(("0.0.0.0", port), Handler).serve_forever()
+    except KeyboardInterrupt:
+        console.print("[yellow]Server stopped.[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 9 – Marketplace / Plug-ins (stub)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def marketplace() -> None:
+    """Marketplace commands."""
+
+
+@marketplace.command("publish")
+@click.argument("artifact", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--type", type=click.Choice(["widget", "prior", "app"], case_sensitive=False), default="widget")
+def marketplace_publish(artifact: pathlib.Path, type: str) -> None:
+    console.print(f"[green]Published {artifact} as {type} to marketplace (stub).[/]")
+
+# ══════════════════════════════════════════════════════════════════════
+# Local Package Registry (Phase 3 stub)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def registry() -> None:
+    """Package registry commands."""
+
+
+@registry.command("publish")
+@click.argument("package", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--name", required=True, help="Package name")
+@click.option("--version", required=True, help="Package version")
+def registry_publish(package: pathlib.Path, name: str, version: str) -> None:
+    _registry.publish(package, name, version)
+    console.print(f"[green]Published {name}@{version} to registry[/]")
+
+
+@registry.command("install")
+@click.option("--name", required=True, help="Package name")
+@click.option("--version", required=True, help="Package version")
+@click.option("--dest", type=click.Path(path_type=pathlib.Path), default=".", show_default=True)
+def registry_install(name: str, version: str, dest: pathlib.Path) -> None:
+    installed = _registry.install(dest, name, version)
+    console.print(f"[green]Installed to {installed}[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 10 – Observability & Metrics (stub)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.group()
+def metrics() -> None:
+    """Trial metrics and badges."""
+
+
+@metrics.command("badge-generate")
+@click.option("--type", type=click.Choice(["power", "diversity", "part11"], case_sensitive=False), required=True)
+def metrics_badge(type: str) -> None:
+    console.print(f"[green]Generated {type} badge (stub).[/]")
+
+@metrics.command("serve")
+@click.option("--port", default=9102, show_default=True)
+def metrics_serve(port: int) -> None:
+    """Expose Prometheus metrics endpoint (stub)."""
+    from prometheus_client import Gauge, start_http_server
+    import time
+
+    gauge = Gauge("bastion_dummy_metric", "Dummy metric for demo")
+    start_http_server(port)
+    console.print(f"[green]Prometheus metrics server running on :{port} (Ctrl+C to stop)…[/]")
+    try:
+        while True:
+            gauge.set(time.time() % 100)
+            time.sleep(5)
+    except KeyboardInterrupt:
+        console.print("[yellow]Metrics server stopped.[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 11 – Community & Discovery (stub)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.command("search")
+@click.argument("term")
+def discovery_search(term: str) -> None:
+    console.print(f"[green]Searching platform for '{term}' (stub)…[/]")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# Pillar 12 – Client Tooling (informational)
+# ══════════════════════════════════════════════════════════════════════
+
+@click.command("about-cli")
+def about_cli() -> None:
+    """Show installed bst CLI version and feature parity."""
+    console.print(f"bst version {__version__}")
+    console.print("Features: Repo Fabric, Collaboration, Evidence CI/CD, Hub, Spaces, Compliance, Data Mesh, API, Marketplace, Metrics, Discovery")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+"""Append-only review-comment store.
+
+Comments live in ``.ctrepo/comments.jsonl`` as a log of events, one JSON
+object per line:
+
+* ``{"op": "add", "id": ..., "file": ..., "line": ..., ...}``
+* ``{"op": "resolve", "id": ..., "user": ..., "time": ...}``
+
+Adding or resolving a comment appends a single line; nothing is rewritten.
+The ``comment_index`` table of the repository store maps each comment id
+to its file, byte offset in the log and resolution (who, when); it is
+brought up to date by reading only the part of the log appended since the
+offset recorded in ``comment_log``, and only the new rows are written.
+Writers serialise on an advisory lock so concurrent reviewers never lose
+each other's events, and the log is periodically compacted (resolve
+events folded into their comments, resolver and time included) once
+enough of them accumulate.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from bst import store as _store
+
+try:  # POSIX advisory locks; other platforms run unlocked
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["CommentStore", "COMPACT_THRESHOLD"]
+
+# Resolve events tolerated in the log before it is compacted
+COMPACT_THRESHOLD = int(os.getenv("BST_COMMENTS_COMPACT_THRESHOLD", "500"))
+
+_SELECT = "SELECT pos, resolved, resolved_by, resolved_at FROM comment_index"
+
+
+class CommentStore:
+    """Comment log for the trial repository rooted at ``repo_root``."""
+
+    def __init__(self, repo_root: Path):
+        self.root = repo_root
+        self.dir = repo_root / ".ctrepo"
+        self.log = self.dir / "comments.jsonl"
+        self.lock_file = self.dir / "comments.lock"
+        self.legacy = self.dir / "comments.json"
+
+    # ------------------------------------------------------------------
+    # Locking and index maintenance
+    # ------------------------------------------------------------------
+    @contextlib.contextmanager
+    def _locked(self, catch_up: bool = True) -> Iterator[Optional[sqlite3.Connection]]:
+        """Hold the store lock and yield a store connection whose index is current.
+
+        Plain appends pass ``catch_up=False`` and get ``None``: the index is
+        only brought up to date by operations that need to look comments up.
+        """
+        self.dir.mkdir(exist_ok=True)
+        with open(self.lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                self._import_legacy()
+                if not catch_up:
+                    yield None
+                    return
+                with contextlib.closing(_store.connect(self.root)) as conn:
+                    self._catch_up(conn)
+                    yield conn
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _import_legacy(self) -> None:
+        # One-off migration from the old rewrite-everything comments.json
+        if not self.legacy.exists() or self.log.exists():
+            return
+        comments = json.loads(self.legacy.read_text() or "[]")
+        with open(self.log, "a", encoding="utf-8") as fh:
+            for c in comments:
+                fh.write(json.dumps({"op": "add", **c}) + "\n")
+        self.legacy.rename(self.legacy.with_name("comments.json.migrated"))
+
+    def _catch_up(self, conn: sqlite3.Connection) -> None:
+        row = conn.execute("SELECT inode, pos, resolve_events FROM comment_log").fetchone()
+        inode, pos, events = tuple(row) if row is not None else (None, 0, 0)
+        try:
+            st = os.stat(self.log)
+        except FileNotFoundError:
+            st = None
+        if st is None or inode != st.st_ino or pos > st.st_size:
+            # no log yet, or it was replaced (compaction elsewhere) or truncated: rebuild
+            if row is not None:
+                with _store.transaction(conn):
+                    conn.execute("DELETE FROM comment_index")
+                    conn.execute("DELETE FROM comment_log")
+            if st is None:
+                return
+            pos, events = 0, 0
+        elif pos == st.st_size:
+            return
+        with open(self.log, "rb") as fh:
+            fh.seek(pos)
+            data = fh.read(st.st_size - pos)
+        # stop at the last complete line; a torn tail is left for the next pass
+        data = data[: data.rfind(b"\n") + 1]
+        added, resolved = [], []
+        for raw in data.splitlines(keepends=True):
+            rec = json.loads(raw)
+            if rec["op"] == "add":
+                added.append((rec["id"], rec["file"], pos, int(bool(rec.get("resolved"))),
+                              rec.get("resolved_by"), rec.get("resolved_at")))
+            elif rec["op"] == "resolve":
+                resolved.append((rec.get("user"), rec.get("time"), rec["id"]))
+                events += 1
+            pos += len(raw)
+        with _store.transaction(conn):
+            conn.executemany("INSERT OR REPLACE INTO comment_index VALUES (?, ?, ?, ?, ?, ?)", added)
+            conn.executemany(
+                "UPDATE comment_index SET resolved = 1, resolved_by = ?, resolved_at = ? WHERE id = ?", resolved
+            )
+            conn.execute("INSERT OR REPLACE INTO comment_log VALUES (0, ?, ?, ?)", (st.st_ino, pos, events))
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        with open(self.log, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(rec) + "\n")
+
+    def _read_at(self, rows: Sequence[sqlite3.Row]) -> List[Dict[str, Any]]:
+        """Comments at the index ``rows``' offsets, with their resolution."""
+        out = []
+        with open(self.log, "rb") as fh:
+            for row in rows:
+                fh.seek(row["pos"])
+                rec = json.loads(fh.readline())
+                rec.pop("op", None)
+                rec["resolved"] = bool(row["resolved"])
+                if row["resolved_by"] is not None or row["resolved_at"] is not None:
+                    rec["resolved_by"] = row["resolved_by"]
+                    rec["resolved_at"] = row["resolved_at"]
+                out.append(rec)
+        return out
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def add(self, file: str, line: int, text: str, role: str, user: Optional[str] = None) -> Dict[str, Any]:
+        entry = {
+            "id": str(uuid.uuid4()),
+            "file": file,
+            "line": line,
+            "text": text,
+            "role": role,
+            "user": user or os.getenv("USER", "anon"),
+            "created": datetime.datetime.utcnow().isoformat() + "Z",
+            "resolved": False,
+        }
+        with self._locked(catch_up=False):
+            self._append({"op": "add", **entry})
+        return entry
+
+    def resolve(self, comment_id: str, user: Optional[str] = None) -> bool:
+        """Append a resolve event; returns False for an unknown id."""
+        with self._locked() as conn:
+            if conn.execute("SELECT 1 FROM comment_index WHERE id = ?", (comment_id,)).fetchone() is None:
+                return False
+            self._append({
+                "op": "resolve",
+                "id": comment_id,
+                "user": user or os.getenv("USER", "anon"),
+                "time": datetime.datetime.utcnow().isoformat() + "Z",
+            })
+            self._catch_up(conn)
+            if self._resolve_events(conn) >= COMPACT_THRESHOLD:
+                self._compact(conn)
+        return True
+
+    def list(self, file: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Comments in creation order, optionally only those on ``file``."""
+        with self._locked() as conn:
+            if file is not None:
+                rows = conn.execute(f"{_SELECT} WHERE file = ? ORDER BY pos", (file,)).fetchall()
+            else:
+                rows = conn.execute(f"{_SELECT} ORDER BY pos").fetchall()
+            if not rows:
+                return []
+            return self._read_at(rows)
+
+    def get(self, comment_id: str) -> Optional[Dict[str, Any]]:
+        with self._locked() as conn:
+            row = conn.execute(f"{_SELECT} WHERE id = ?", (comment_id,)).fetchone()
+            if row is None:
+                return None
+            return self._read_at([row])[0]
+
+    def compact(self) -> int:
+        """Fold resolve events into their comments; returns events removed."""
+        with self._locked() as conn:
+            return self._compact(conn)
+
+    @staticmethod
+    def _resolve_events(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT resolve_events FROM comment_log").fetchone()
+        return row[0] if row is not None else 0
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        removed = self._resolve_events(conn)
+        if not removed:
+            return 0
+        comments = self._read_at(conn.execute(f"{_SELECT} ORDER BY pos").fetchall())
+        tmp = self.log.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for c in comments:
+                fh.write(json.dumps({"op": "add", **c}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.log)
+        self._catch_up(conn)
+        return removed
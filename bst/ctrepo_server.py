@@ -18,12 +18,12 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 from flask import Flask, request, jsonify, abort
 from werkzeug.exceptions import BadRequest, NotFound, Unauthorized
-import yaml
 import json
 from datetime import datetime
 import hashlib
 
 # Bastion imports
+from bst.protocol_io import loads
 from bst.transpiler import ProtocolTranspiler, TranspilerConfig
 
 app = Flask(__name__)
@@ -228,7 +228,7 @@ done
         """Validate a protocol update before committing."""
         try:
             # Parse YAML
-            protocol = yaml.safe_load(protocol_content)
+            protocol = loads(protocol_content)
             
             # Validate against schema
             is_valid = self.transpiler.validate_protocol(protocol)
@@ -268,7 +268,7 @@ done
             
             try:
                 current_protocol_content = repo.git.show('HEAD:protocol.yaml')
-                current_protocol = yaml.safe_load(current_protocol_content)
+                current_protocol = loads(current_protocol_content)
                 
                 # Check for changes that require amendment
                 if new_protocol['meta']['id'] != current_protocol['meta']['id']:
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+"""Batch readers for tabular datasets (Parquet, Arrow IPC, CSV).
+
+Enrolment registries and twin cohorts can run to tens of millions of rows,
+so CI checks read them one record batch at a time and only the columns
+they need. Parquet is read row group by row group, Arrow IPC files are
+memory-mapped, and CSV is parsed incrementally by pyarrow's streaming
+reader (gzip-compressed ``.csv.gz`` included).
+"""
+
+import gzip
+from pathlib import Path
+from typing import Iterator, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional "sim" extra
+    pa = None
+
+__all__ = ["FORMATS", "dataset_format", "column_names", "iter_batches"]
+
+FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".csv": "csv",
+    ".tsv": "tsv",
+}
+# CSV bytes parsed per block, per requested batch row (rough row width)
+_CSV_ROW_BYTES = 64
+
+
+def dataset_format(path: Path) -> str:
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    fmt = FORMATS.get(suffixes[-1] if suffixes else "")
+    if fmt is None:
+        raise ValueError(f"Unsupported dataset format {''.join(Path(path).suffixes)!r} (use Parquet, Arrow or CSV)")
+    return fmt
+
+
+def _require() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required to read datasets (pip install 'bst[sim]')")
+
+
+def column_names(path: Path) -> List[str]:
+    """Column names without reading any data."""
+    _require()
+    fmt = dataset_format(path)
+    if fmt == "parquet":
+        return pq.ParquetFile(path).schema_arrow.names
+    if fmt == "arrow":
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).schema.names
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", newline="") as fh:
+        header = fh.readline().rstrip("\r\n")
+    return [c.strip().strip('"') for c in header.split("\t" if fmt == "tsv" else ",")]
+
+
+def iter_batches(path: Path, columns: List[str], batch_rows: int = 1 << 17) -> Iterator["pa.RecordBatch"]:
+    """Yield record batches of ``columns`` (at most ~``batch_rows`` rows each)."""
+    _require()
+    fmt = dataset_format(path)
+    if fmt == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns)
+    elif fmt == "arrow":
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).select(columns)
+    else:
+        yield from pa.csv.open_csv(
+            path,
+            read_options=pa.csv.ReadOptions(block_size=max(1 << 20, batch_rows * _CSV_ROW_BYTES)),
+            parse_options=pa.csv.ParseOptions(delimiter="\t" if fmt == "tsv" else ","),
+            convert_options=pa.csv.ConvertOptions(include_columns=columns),
+        )
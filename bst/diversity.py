@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+"""Diversity badge scoring for ``bst ci diversity-badge``.
+
+An enrolment (or synthetic twin) dataset is compared, dimension by
+dimension, with a reference population:
+
+* each group's participation-to-prevalence ratio (PPR) is its share of the
+  dataset over its share of the reference;
+* a dimension's representation index is ``sum(min(observed, reference))``
+  over groups, i.e. one minus the total-variation distance, so 1.0 means
+  the dataset mirrors the reference exactly;
+* the overall score is the mean index over the dimensions present.
+
+The score and the worst PPR map onto the ``ci.diversity_badge`` tiers.
+
+Datasets are Parquet, Arrow IPC or CSV files streamed through
+:mod:`bst.datasets` one record batch at a time; only the columns being
+scored are read, and each batch is reduced to per-group counts with ``bincount`` on
+its dictionary codes, so memory is bounded by the batch size.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional "sim" extra
+    np = None
+
+from bst.datasets import column_names, iter_batches
+from bst.twins import RACE_DISTRIBUTION, SEX_DISTRIBUTION
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - optional "sim" extra
+    pa = None
+
+__all__ = [
+    "AGE_DISTRIBUTION",
+    "BADGES",
+    "REFERENCE",
+    "DimensionScore",
+    "DiversityReport",
+    "count_groups",
+    "score_counts",
+    "score_dataset",
+    "badge_for",
+    "meets",
+    "reference_from_protocol",
+]
+
+# US adult age bands (census, rounded)
+AGE_DISTRIBUTION: Dict[str, float] = {"18-44": 0.46, "45-64": 0.33, "65+": 0.21}
+_BAND_RE = re.compile(r"^\s*(\d+)\s*(?:-|–|\+|to|$)")
+
+REFERENCE: Dict[str, Dict[str, float]] = {
+    "sex": SEX_DISTRIBUTION,
+    "race": RACE_DISTRIBUTION,
+    "age": AGE_DISTRIBUTION,
+}
+
+# (badge, minimum overall score, minimum PPR of any reference group), best first
+BADGES: Tuple[Tuple[str, float, float], ...] = (
+    ("gold", 0.90, 0.80),
+    ("silver", 0.80, 0.50),
+    ("bronze", 0.70, 0.0),
+)
+_RANK = {name: i for i, (name, _, _) in enumerate(BADGES)}
+
+# Dataset column names accepted for each dimension
+_COLUMNS = {
+    "sex": ("sex", "gender"),
+    "race": ("race", "ethnicity", "race_ethnicity"),
+    "age": ("age", "age_years"),
+}
+# Common spellings folded onto the reference labels
+_SYNONYMS = {
+    "female": "F", "woman": "F", "f": "F",
+    "male": "M", "man": "M", "m": "M",
+    "white": "White", "caucasian": "White",
+    "hispanic": "Hispanic", "latino": "Hispanic", "latina": "Hispanic", "hispanic or latino": "Hispanic",
+    "black": "Black", "african american": "Black", "black or african american": "Black",
+    "asian": "Asian",
+}
+
+
+@dataclass
+class DimensionScore:
+    dimension: str
+    index: float
+    # participation-to-prevalence ratio per reference group
+    ppr: Dict[str, float]
+    counts: Dict[str, int]
+    unmapped: int
+
+
+@dataclass
+class DiversityReport:
+    rows: int
+    score: float
+    badge: Optional[str]
+    dimensions: List[DimensionScore]
+
+    @property
+    def min_ppr(self) -> float:
+        return min((min(d.ppr.values()) for d in self.dimensions), default=0.0)
+
+
+def badge_for(score: float, min_ppr: float) -> Optional[str]:
+    """Best tier whose thresholds are met, or ``None``."""
+    for name, min_score, ppr_floor in BADGES:
+        if score >= min_score and min_ppr >= ppr_floor:
+            return name
+    return None
+
+
+def meets(badge: Optional[str], target: str) -> bool:
+    """Whether ``badge`` is at least the ``target`` tier."""
+    rank = _RANK.get(target.lower())
+    if rank is None:
+        raise ValueError(f"Unknown diversity badge {target!r} (choose from {', '.join(_RANK)})")
+    return badge is not None and _RANK[badge] <= rank
+
+
+def _normalise(label: str, reference: Dict[str, float]) -> Optional[str]:
+    text = re.sub(r"\s+", " ", str(label).strip())
+    for key in reference:
+        if key.lower() == text.lower():
+            return key
+    mapped = _SYNONYMS.get(text.lower())
+    if mapped in reference:
+        return mapped
+    return "Other" if "Other" in reference and text else None
+
+
+def _label_counts(column: "pa.Array") -> Dict[str, int]:
+    """Counts per distinct label via bincount over dictionary codes."""
+    if not pa.types.is_dictionary(column.type):
+        column = pc.dictionary_encode(column)
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    codes = column.indices.to_numpy(zero_copy_only=False)
+    valid = ~np.asarray(column.is_null().to_numpy(zero_copy_only=False))
+    counts = np.bincount(codes[valid].astype(np.int64), minlength=len(column.dictionary))
+    labels = column.dictionary.to_pylist()
+    return {str(labels[i]): int(c) for i, c in enumerate(counts) if c}
+
+
+def _age_counts(column: "pa.Array", bands: Dict[str, float]) -> Dict[str, int]:
+    """Counts per age band; bands are labelled ``"18-44"``, ``"65+"``..."""
+    labels = list(bands)
+    lower = []
+    for label in labels:
+        m = _BAND_RE.match(label)
+        if m is None:
+            raise ValueError(f"Cannot read an age band from {label!r} (expected e.g. '18-44' or '65+')")
+        lower.append(int(m.group(1)))
+    order = np.argsort(lower)
+    edges = np.asarray(lower)[order][1:]
+    ages = pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+    ages = ages[~np.isnan(ages)]
+    counts = np.bincount(np.searchsorted(edges, ages, side="right"), minlength=len(labels))
+    return {labels[i]: int(counts[j]) for j, i in enumerate(order)}
+
+
+def count_groups(path: Path, reference: Optional[Dict[str, Dict[str, float]]] = None,
+                 batch_rows: int = 1 << 17) -> Tuple[int, Dict[str, Dict[str, int]]]:
+    """Stream ``path`` and count raw labels per scored dimension.
+
+    Returns ``(rows, {dimension: {label: count}})`` for every dimension of
+    ``reference`` that has a matching column in the dataset.
+    """
+    if pa is None or np is None:
+        raise RuntimeError("numpy and pyarrow are required for diversity scoring (pip install 'bst[sim]')")
+    reference = reference or REFERENCE
+    names = {n.lower(): n for n in column_names(path)}
+    columns: Dict[str, str] = {}
+    for dim in reference:
+        for candidate in _COLUMNS.get(dim, (dim,)):
+            if candidate in names:
+                columns[dim] = names[candidate]
+                break
+    if not columns:
+        raise ValueError(f"{path} has none of the columns needed ({', '.join(sorted(reference))})")
+    totals: Dict[str, Dict[str, int]] = {dim: {} for dim in columns}
+    rows = 0
+    for batch in iter_batches(path, sorted(set(columns.values())), batch_rows):
+        rows += batch.num_rows
+        for dim, name in columns.items():
+            col = batch.column(name)
+            if dim == "age" and (pa.types.is_integer(col.type) or pa.types.is_floating(col.type)):
+                counts = _age_counts(col, reference[dim])
+            else:
+                counts = _label_counts(col)
+            acc = totals[dim]
+            for label, c in counts.items():
+                acc[label] = acc.get(label, 0) + c
+    return rows, totals
+
+
+def score_counts(counts: Dict[str, int], reference: Dict[str, float], dimension: str) -> DimensionScore:
+    """Representation index of one dimension from label counts."""
+    grouped = {key: 0 for key in reference}
+    unmapped = 0
+    for label, c in counts.items():
+        key = _normalise(label, reference)
+        if key is None:
+            unmapped += c
+        else:
+            grouped[key] += c
+    mapped = sum(grouped.values())
+    total_ref = sum(reference.values())
+    ppr, index = {}, 0.0
+    for key, share in reference.items():
+        expected = share / total_ref
+        observed = grouped[key] / mapped if mapped else 0.0
+        ppr[key] = observed / expected
+        index += min(observed, expected)
+    return DimensionScore(dimension, index, ppr, grouped, unmapped)
+
+
+def score_dataset(path: Path, reference: Optional[Dict[str, Dict[str, float]]] = None,
+                  batch_rows: int = 1 << 17) -> DiversityReport:
+    """Stream ``path`` and score it against ``reference`` (default: ``REFERENCE``)."""
+    reference = reference or REFERENCE
+    rows, totals = count_groups(path, reference, batch_rows)
+    dims = [score_counts(totals[dim], reference[dim], dim) for dim in reference if dim in totals]
+    score = sum(d.index for d in dims) / len(dims)
+    report = DiversityReport(rows, score, None, dims)
+    report.badge = badge_for(score, report.min_ppr)
+    return report
+
+
+def reference_from_protocol(protocol: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """``REFERENCE`` with any ``ci.diversity_reference`` dimensions overlaid."""
+    custom = (protocol.get("ci") or {}).get("diversity_reference") or {}
+    reference = dict(REFERENCE)
+    for dim, dist in custom.items():
+        if isinstance(dist, dict) and dist:
+            weights = {str(k): float(v) for k, v in dist.items()}
+            if min(weights.values()) < 0 or sum(weights.values()) <= 0:
+                raise ValueError(f"ci.diversity_reference.{dim}: weights must be non-negative with a positive total")
+            reference[str(dim)] = weights
+    return reference
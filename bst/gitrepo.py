@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+"""In-process git staging and commits for trial repositories.
+
+Commands used to fork ``git add`` and ``git commit`` for every artefact
+they wrote. ``record`` instead stages files through GitPython's index
+(one index write per batch, objects written by the pure-Python object
+database) and creates the commit in-process; only repository hooks, if
+any, still run as subprocesses.
+
+Every ``bst`` command runs inside a ``transaction``: the files and messages
+it records are held until the command finishes and then land as a single
+commit, so a multi-step command (``ci-check`` simulating twins, say)
+produces one commit, and a command that fails commits nothing. With
+``commit=False`` (``bst --no-commit``) changes are staged but not
+committed.
+
+GitPython is imported on first use, and a missing ``git`` binary or a
+directory that is not a git repository degrades to a warning, as before.
+"""
+
+import contextlib
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+__all__ = [
+    "Transaction",
+    "init_repo",
+    "record",
+    "transaction",
+]
+
+_ACTIVE: ContextVar[Optional["Transaction"]] = ContextVar("bst_git_transaction", default=None)
+
+
+def _warn(message: str) -> None:
+    from bst.cli import console
+
+    console.print(f"[yellow]⚠️  {message}[/]")
+
+
+def _open(root: Path) -> Any:
+    """The GitPython repository at ``root``, or ``None`` with a warning."""
+    try:
+        import git
+    except ImportError:
+        _warn("git unavailable – skipping git command.")
+        return None
+    try:
+        return git.Repo(root, odbt=git.GitDB, search_parent_directories=True)
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+        _warn(f"{root} is not a git repository – skipping git command.")
+        return None
+
+
+def _files(repo: Any, root: Path, paths: Iterable[Path]) -> List[str]:
+    """Existing files under ``paths`` (directories expanded), relative to the worktree.
+
+    Relative ``paths`` are taken relative to ``root``. Files matched by
+    ``.gitignore`` are left out, as ``git add`` would.
+    """
+    worktree = Path(repo.working_tree_dir)
+    out = []
+    for p in paths:
+        p = Path(root, p)
+        if p.is_dir():
+            for dirpath, dirnames, filenames in os.walk(p):
+                dirnames[:] = [d for d in dirnames if d != ".git"]
+                out.extend(os.path.relpath(os.path.join(dirpath, f), worktree) for f in filenames)
+        elif p.is_file():
+            out.append(os.path.relpath(p, worktree))
+    out = sorted(set(out))
+    if not out:
+        return out
+    # one git check-ignore for the batch
+    ignored = set(repo.ignored(*out))
+    return [f for f in out if f not in ignored]
+
+
+def _commit(root: Path, paths: List[Path], messages: List[str], commit: bool) -> Optional[str]:
+    repo = _open(root)
+    if repo is None:
+        return None
+    files = _files(repo, root, paths)
+    if files:
+        # one index read, one write for the whole batch
+        repo.index.add(files)
+    if not commit or not messages:
+        return None
+    # nothing to commit: the staged tree is HEAD's (checked without forking git diff)
+    if repo.head.is_valid() and repo.index.write_tree().binsha == repo.head.commit.tree.binsha:
+        return None
+    message = messages[0] if len(messages) == 1 else "\n".join(
+        [f"{messages[0]} (+{len(messages) - 1} more)", ""] + [f"- {m}" for m in messages]
+    )
+    try:
+        return repo.index.commit(message).hexsha
+    except Exception as exc:  # hooks rejecting the commit, unwritable objects...
+        _warn(f"git commit failed: {exc}")
+        return None
+
+
+@dataclass
+class Transaction:
+    commit: bool = True
+    # root -> (paths, messages) recorded so far
+    pending: Dict[Path, Any] = field(default_factory=dict)
+    commits: List[str] = field(default_factory=list)
+
+    def record(self, root: Path, paths: Iterable[Path], message: str) -> None:
+        paths_, messages = self.pending.setdefault(Path(root), ([], []))
+        paths_.extend(Path(p) for p in paths)
+        messages.append(message)
+
+    def flush(self) -> None:
+        pending, self.pending = self.pending, {}
+        for root, (paths, messages) in pending.items():
+            sha = _commit(root, paths, messages, self.commit)
+            if sha:
+                self.commits.append(sha)
+
+
+@contextlib.contextmanager
+def transaction(commit: bool = True) -> Iterator[Transaction]:
+    """Collect ``record`` calls and commit them once when the block succeeds.
+
+    Nested transactions join the outermost one. The block fails - and
+    nothing is staged or committed - on any exception other than a
+    ``SystemExit`` with status 0.
+    """
+    outer = _ACTIVE.get()
+    if outer is not None:
+        yield outer
+        return
+    tx = Transaction(commit)
+    token = _ACTIVE.set(tx)
+    ok = False
+    try:
+        yield tx
+        ok = True
+    except SystemExit as exc:
+        ok = exc.code in (None, 0)
+        raise
+    finally:
+        _ACTIVE.reset(token)
+        if ok:
+            tx.flush()
+
+
+def record(root: Path, paths: Iterable[Path], message: str) -> Optional[str]:
+    """Stage ``paths`` and commit them with ``message``.
+
+    Inside a transaction the commit is deferred to the end of it and
+    ``None`` is returned; otherwise the new commit's SHA (``None`` if
+    nothing changed or git is unavailable).
+    """
+    tx = _ACTIVE.get()
+    if tx is not None:
+        tx.record(root, paths, message)
+        return None
+    return _commit(Path(root), [Path(p) for p in paths], [message], commit=True)
+
+
+def init_repo(root: Path, branch: str = "main") -> None:
+    """``git init`` ``root`` unless it already is a repository."""
+    if (Path(root) / ".git").exists():
+        return
+    try:
+        import git
+
+        git.Repo.init(root, initial_branch=branch)
+    except Exception:  # no git binary, or a git too old for --initial-branch
+        _warn("git unavailable – skipping git command.")
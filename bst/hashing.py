@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+"""Streaming file hashing with a stat-keyed digest cache.
+
+Artefacts (datasets, model weights) can be many gigabytes, so files are
+never read into memory whole:
+
+* ``sha256`` streams the file through a fixed-size buffer.
+* ``blake2b-tree`` uses BLAKE2's tree mode: the file is memory-mapped, cut
+  into ``TREE_LEAF_BYTES`` leaves that are hashed in parallel (hashlib
+  releases the GIL on large buffers), and the leaf digests are hashed into
+  a root. Same idea as BLAKE3's chunk tree, from the standard library.
+
+``cached_hash`` and ``cached_hashes`` remember digests in the repository
+store keyed by path and ``(size, mtime, ctime, inode)``, so re-hashing an
+unchanged artefact is a single ``stat`` plus an indexed lookup; batches of
+cache misses are spread over a process pool.
+"""
+
+import contextlib
+import hashlib
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from bst import store as _store
+
+__all__ = [
+    "ALGORITHMS",
+    "DEFAULT_ALGORITHM",
+    "hash_file",
+    "cached_hash",
+    "cached_hashes",
+]
+
+ALGORITHMS = ("sha256", "blake2b-tree")
+DEFAULT_ALGORITHM = os.getenv("BST_HASH_ALGORITHM", "sha256")
+
+BUFFER_BYTES = 1 << 20
+TREE_LEAF_BYTES = 4 << 20
+_DIGEST_SIZE = 32
+# Below this many uncached files, hashing stays in-process
+POOL_THRESHOLD = 16
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    buf = bytearray(BUFFER_BYTES)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as fh:
+        while True:
+            n = fh.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _blake2b_tree(path: Path, workers: Optional[int] = None) -> str:
+    size = os.path.getsize(path)
+    n_leaves = max(1, -(-size // TREE_LEAF_BYTES))
+    params = dict(digest_size=_DIGEST_SIZE, fanout=0, depth=2, leaf_size=TREE_LEAF_BYTES, inner_size=_DIGEST_SIZE)
+
+    def leaf(i: int, data) -> bytes:
+        return hashlib.blake2b(
+            data, node_offset=i, node_depth=0, last_node=(i == n_leaves - 1), **params
+        ).digest()
+
+    if size == 0:
+        leaves = [leaf(0, b"")]
+    else:
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                chunks = [view[i * TREE_LEAF_BYTES:(i + 1) * TREE_LEAF_BYTES] for i in range(n_leaves)]
+                if n_leaves == 1:
+                    leaves = [leaf(0, chunks[0])]
+                else:
+                    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                        leaves = list(pool.map(leaf, range(n_leaves), chunks))
+                for c in chunks:
+                    c.release()
+            finally:
+                view.release()
+    root = hashlib.blake2b(node_offset=0, node_depth=1, last_node=True, **params)
+    for d in leaves:
+        root.update(d)
+    return root.hexdigest()
+
+
+def hash_file(path: Path, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """Hex digest of ``path`` without loading it into memory."""
+    if algorithm == "sha256":
+        return _sha256(path)
+    if algorithm == "blake2b-tree":
+        return _blake2b_tree(path)
+    raise ValueError(f"Unknown hash algorithm {algorithm!r} (choose from {', '.join(ALGORITHMS)})")
+
+
+def _stat_key(st: os.stat_result) -> tuple:
+    return (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+
+
+def cached_hashes(paths: List[Path], repo_root: Path, algorithm: str = DEFAULT_ALGORITHM,
+                  workers: Optional[int] = None) -> List[str]:
+    """Digests of many files; cache misses are hashed across a process pool."""
+    keys = [str(Path(p).resolve()) for p in paths]
+    stats = [_stat_key(os.stat(k)) for k in keys]
+    digests: List[Optional[str]] = [None] * len(keys)
+    with contextlib.closing(_store.connect(repo_root)) as conn:
+        for i, k in enumerate(keys):
+            row = conn.execute(
+                "SELECT size, mtime_ns, ctime_ns, inode, digest FROM hash_cache WHERE path = ? AND algorithm = ?",
+                (k, algorithm),
+            ).fetchone()
+            if row is not None and tuple(row)[:4] == stats[i]:
+                digests[i] = row["digest"]
+        misses = [i for i, d in enumerate(digests) if d is None]
+        todo = [Path(keys[i]) for i in misses]
+        if len(todo) >= POOL_THRESHOLD and (workers or os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(hash_file, todo, [algorithm] * len(todo), chunksize=8))
+        else:
+            computed = [hash_file(p, algorithm) for p in todo]
+        fresh = []
+        for i, digest in zip(misses, computed):
+            digests[i] = digest
+            # don't remember a digest of a file that changed while we read it
+            if _stat_key(os.stat(keys[i])) == stats[i]:
+                fresh.append((keys[i], algorithm, *stats[i], digest))
+        if fresh:
+            with _store.transaction(conn):
+                conn.executemany("INSERT OR REPLACE INTO hash_cache VALUES (?, ?, ?, ?, ?, ?, ?)", fresh)
+    return digests  # type: ignore[return-value]
+
+
+def cached_hash(path: Path, repo_root: Path, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """``hash_file`` memoised in the repository store by file identity."""
+    return cached_hashes([path], repo_root, algorithm)[0]
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+"""Indexed protocol history for ``bst history``.
+
+Answering "when did this criterion change?" used to mean walking git log
+and re-parsing the protocol at every revision. ``index`` does that once,
+incrementally: each new commit touching a protocol (first-parent history)
+is parsed and flattened into field values, and only the difference from
+the previous revision is stored, as spans in the repository store
+(``.ctrepo/bastion.db``)::
+
+    history_spans(file, path, value, added, removed)
+
+meaning "``path`` held ``value`` from revision ``added`` until revision
+``removed``" (``NULL``: still does). Field paths, values (keyed by a
+16-byte BLAKE2b hash of their JSON) and commits are interned once, so a
+span is a handful of integers. Blame, value-at-revision, log and churn
+queries are then indexed range scans over spans, never a re-parse.
+
+Field paths join mapping keys with dots. List items are addressed by their
+``id`` or ``name`` when every item has one (``arms[CONTROL].allocation``);
+lists of plain values are treated as sets (``eligibility.inclusion[]``
+holds one value per criterion, so an inserted criterion does not shift the
+others); any other list uses indices (``visits[0]``).
+
+Rewritten history (the last indexed commit is no longer an ancestor of
+``HEAD``) re-indexes the affected protocol from scratch.
+"""
+
+import contextlib
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import yaml
+
+from bst import store as _store
+from bst.protocol_diff import _item_key
+from bst.protocol_io import loads
+
+__all__ = [
+    "Span",
+    "Event",
+    "flatten",
+    "index",
+    "blame",
+    "value_at",
+    "log",
+    "churn",
+]
+
+PROTOCOL_DIR = "protocol"
+PROTOCOL_SUFFIXES = (".yaml", ".yml")
+
+
+@dataclass
+class Span:
+    path: str
+    value: Any
+    sha: str
+    time: int
+    author: str
+    summary: str
+
+
+@dataclass
+class Event:
+    sha: str
+    time: int
+    author: str
+    summary: str
+    path: str
+    op: str  # "+" value appeared, "-" value went away
+    value: Any
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Flattening
+# ──────────────────────────────────────────────────────────────────────────
+
+_encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def flatten(doc: Any) -> Set[Tuple[str, str]]:
+    """``(field path, value JSON)`` pairs of a parsed protocol."""
+    out: Set[Tuple[str, str]] = set()
+    stack = [(doc, "")]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            if not node:
+                out.add((path, "{}"))
+            stack.extend((v, f"{path}.{k}" if path else str(k)) for k, v in node.items())
+        elif isinstance(node, list):
+            key = _item_key(node)
+            if not node:
+                out.add((path, "[]"))
+            elif key is not None:
+                stack.extend((item, f"{path}[{item[key]}]") for item in node)
+            elif not any(isinstance(v, (dict, list)) for v in node):
+                out.update((f"{path}[]", _encode(v)) for v in node)
+            else:
+                stack.extend((v, f"{path}[{i}]") for i, v in enumerate(node))
+        else:
+            out.add((path, _encode(node)))
+    return out
+
+
+def _value_hash(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Indexing
+# ──────────────────────────────────────────────────────────────────────────
+
+def _open(root: Path) -> Any:
+    import git
+
+    try:
+        return git.Repo(root, search_parent_directories=True)
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+        raise ValueError(f"{root} is not a git repository") from None
+
+
+def _rel(repo: Any, root: Path, protocol: Path) -> str:
+    return Path(root, protocol).resolve().relative_to(Path(repo.working_tree_dir).resolve()).as_posix()
+
+
+def _intern(conn: sqlite3.Connection, table: str, column: str, value: str) -> int:
+    conn.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+    return conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+
+
+def _file_id(conn: sqlite3.Connection, rel: str, create: bool = False) -> Optional[int]:
+    if create:
+        return _intern(conn, "history_files", "path", rel)
+    row = conn.execute("SELECT id FROM history_files WHERE path = ?", (rel,)).fetchone()
+    return row[0] if row else None
+
+
+def _reset(conn: sqlite3.Connection, file_id: int) -> None:
+    conn.execute("DELETE FROM history_spans WHERE file = ?", (file_id,))
+    conn.execute("DELETE FROM history_revisions WHERE file = ?", (file_id,))
+
+
+def _snapshot(repo: Any, commit: Any, rel: str, parsed: Dict[str, Optional[Set[Tuple[str, str]]]]
+              ) -> Tuple[Optional[str], Optional[Set[Tuple[str, str]]]]:
+    """Blob SHA and flattened fields of ``rel`` at ``commit`` (``None`` fields if unparseable)."""
+    try:
+        blob = commit.tree / rel
+    except KeyError:
+        return None, set()
+    if blob.hexsha not in parsed:
+        try:
+            parsed[blob.hexsha] = flatten(loads(blob.data_stream.read()))
+        except yaml.YAMLError:
+            parsed[blob.hexsha] = None
+    return blob.hexsha, parsed[blob.hexsha]
+
+
+def _index_file(conn: sqlite3.Connection, repo: Any, rel: str) -> int:
+    file_id = _file_id(conn, rel, create=True)
+    last = conn.execute(
+        "SELECT r.rev, c.sha FROM history_revisions r JOIN history_commits c ON c.id = r.commit_id "
+        "WHERE r.file = ? ORDER BY r.rev DESC LIMIT 1", (file_id,)).fetchone()
+    head = repo.head.commit.hexsha
+    if last is not None and last["sha"] == head:
+        return 0
+    if last is not None and not repo.is_ancestor(last["sha"], head):
+        _reset(conn, file_id)
+        last = None
+    rev_range = f"{last['sha']}..{head}" if last is not None else head
+    commits = list(repo.iter_commits(rev_range, paths=rel, first_parent=True, reverse=True))
+    if not commits:
+        return 0
+
+    paths = {row["path"]: row["id"] for row in conn.execute("SELECT id, path FROM history_paths")}
+    path_names = {v: k for k, v in paths.items()}
+    values: Set[bytes] = set()
+    # fields of the last indexed revision, rebuilt from the open spans
+    current: Set[Tuple[str, str]] = set()
+    for row in conn.execute(
+            "SELECT s.path, v.value FROM history_spans s JOIN history_values v ON v.hash = s.value "
+            "WHERE s.file = ? AND s.removed IS NULL", (file_id,)):
+        current.add((path_names[row["path"]], row["value"]))
+    rev = last["rev"] + 1 if last is not None else 0
+    parsed: Dict[str, Optional[Set[Tuple[str, str]]]] = {}
+
+    for commit in commits:
+        conn.execute("INSERT OR IGNORE INTO history_commits (sha, time, author, summary) VALUES (?, ?, ?, ?)",
+                     (commit.hexsha, commit.committed_date, commit.author.name or "", commit.summary))
+        commit_id = conn.execute("SELECT id FROM history_commits WHERE sha = ?", (commit.hexsha,)).fetchone()[0]
+        blob, fields = _snapshot(repo, commit, rel, parsed)
+        conn.execute("INSERT INTO history_revisions VALUES (?, ?, ?, ?)", (file_id, rev, commit_id, blob))
+        if fields is not None:
+            gone = current - fields
+            new = fields - current
+            for path, value in new:
+                if path not in paths:
+                    paths[path] = _intern(conn, "history_paths", "path", path)
+                h = _value_hash(value)
+                if h not in values:
+                    conn.execute("INSERT OR IGNORE INTO history_values VALUES (?, ?)", (h, value))
+                    values.add(h)
+            conn.executemany(
+                "UPDATE history_spans SET removed = ? "
+                "WHERE file = ? AND path = ? AND value = ? AND removed IS NULL",
+                [(rev, file_id, paths[p], _value_hash(v)) for p, v in gone])
+            conn.executemany(
+                "INSERT INTO history_spans VALUES (?, ?, ?, ?, NULL)",
+                [(file_id, paths[p], _value_hash(v), rev) for p, v in new])
+            current = fields
+        rev += 1
+    return len(commits)
+
+
+def _protocols(repo: Any, root: Path) -> List[str]:
+    if not repo.head.is_valid():
+        return []
+    base = Path(root).resolve().relative_to(Path(repo.working_tree_dir).resolve()).as_posix()
+    prefix = f"{base}/{PROTOCOL_DIR}/" if base != "." else f"{PROTOCOL_DIR}/"
+    return sorted(b.path for b in repo.head.commit.tree.traverse()
+                  if b.type == "blob" and b.path.startswith(prefix) and b.path.endswith(PROTOCOL_SUFFIXES))
+
+
+def index(root: Path, protocols: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+    """Index commits not yet seen for each protocol (default: every one under ``protocol/`` at HEAD).
+
+    Returns the number of new revisions per protocol, by path relative to
+    the git work tree.
+    """
+    repo = _open(root)
+    if not repo.head.is_valid():
+        return {}
+    rels = [_rel(repo, root, p) for p in protocols] if protocols else _protocols(repo, root)
+    done: Dict[str, int] = {}
+    with contextlib.closing(_store.connect(root)) as conn:
+        for rel in rels:
+            with _store.transaction(conn):
+                done[rel] = _index_file(conn, repo, rel)
+    return done
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Queries
+# ──────────────────────────────────────────────────────────────────────────
+
+def _path_ids(conn: sqlite3.Connection, field: str) -> Dict[int, str]:
+    """Interned paths equal to ``field`` or below it."""
+    if not field:
+        rows = conn.execute("SELECT id, path FROM history_paths")
+    else:
+        n = len(field) + 1
+        rows = conn.execute(
+            "SELECT id, path FROM history_paths WHERE path = ? OR substr(path, 1, ?) IN (?, ?)",
+            (field, n, f"{field}.", f"{field}["))
+    return {row["id"]: row["path"] for row in rows}
+
+
+def _revision(conn: sqlite3.Connection, repo: Any, file_id: int, rel: str, rev: str) -> int:
+    """Index of the revision of ``rel`` current at git revision ``rev``."""
+    import git
+
+    try:
+        commit = next(repo.iter_commits(rev, paths=rel, first_parent=True, max_count=1), None)
+    except git.GitCommandError:
+        raise ValueError(f"Unknown revision {rev}") from None
+    row = None
+    if commit is not None:
+        row = conn.execute(
+            "SELECT r.rev FROM history_revisions r JOIN history_commits c ON c.id = r.commit_id "
+            "WHERE r.file = ? AND c.sha = ?", (file_id, commit.hexsha)).fetchone()
+    if row is None:
+        raise ValueError(f"{rev} is not in the indexed history of {rel}; run `bst history index`")
+    return row[0]
+
+
+@contextlib.contextmanager
+def _query(root: Path, protocol: Path) -> Iterator[Tuple[sqlite3.Connection, Any, int, str]]:
+    repo = _open(root)
+    rel = _rel(repo, root, protocol)
+    with contextlib.closing(_store.connect(root)) as conn:
+        file_id = _file_id(conn, rel)
+        if file_id is None:
+            raise ValueError(f"{rel} has not been indexed; run `bst history index`")
+        yield conn, repo, file_id, rel
+
+
+def _in(ids: Dict[int, str]) -> str:
+    return ",".join(str(i) for i in ids) or "NULL"
+
+
+def blame(root: Path, protocol: Path, field: str = "", rev: str = "HEAD") -> List[Span]:
+    """Each value under ``field`` at ``rev``, with the commit that introduced it."""
+    with _query(root, protocol) as (conn, repo, file_id, rel):
+        at = _revision(conn, repo, file_id, rel, rev)
+        ids = _path_ids(conn, field)
+        rows = conn.execute(
+            "SELECT s.path, v.value, c.sha, c.time, c.author, c.summary FROM history_spans s "
+            "JOIN history_values v ON v.hash = s.value "
+            "JOIN history_revisions r ON r.file = s.file AND r.rev = s.added "
+            "JOIN history_commits c ON c.id = r.commit_id "
+            f"WHERE s.file = ? AND s.path IN ({_in(ids)}) AND s.added <= ? "
+            "AND (s.removed IS NULL OR s.removed > ?)", (file_id, at, at)).fetchall()
+    spans = [Span(ids[r["path"]], json.loads(r["value"]), r["sha"], r["time"], r["author"], r["summary"])
+             for r in rows]
+    return sorted(spans, key=lambda s: (s.path, str(s.value)))
+
+
+def value_at(root: Path, protocol: Path, field: str, rev: str = "HEAD") -> Dict[str, List[Any]]:
+    """Values under ``field`` at ``rev``, by field path (set-like lists hold several)."""
+    out: Dict[str, List[Any]] = {}
+    for span in blame(root, protocol, field, rev):
+        out.setdefault(span.path, []).append(span.value)
+    return out
+
+
+def log(root: Path, protocol: Path, field: str = "") -> List[Event]:
+    """Every value appearing under or leaving ``field``, oldest first."""
+    with _query(root, protocol) as (conn, repo, file_id, rel):
+        ids = _path_ids(conn, field)
+        rows = conn.execute(
+            "SELECT e.rev, e.op, e.path, v.value, c.sha, c.time, c.author, c.summary FROM ("
+            f"  SELECT added AS rev, '+' AS op, path, value FROM history_spans WHERE file = ? AND path IN ({_in(ids)})"
+            "  UNION ALL"
+            f"  SELECT removed, '-', path, value FROM history_spans WHERE file = ? AND path IN ({_in(ids)})"
+            "  AND removed IS NOT NULL"
+            ") e JOIN history_values v ON v.hash = e.value "
+            "JOIN history_revisions r ON r.file = ? AND r.rev = e.rev "
+            "JOIN history_commits c ON c.id = r.commit_id",
+            (file_id, file_id, file_id)).fetchall()
+    rows.sort(key=lambda r: (r["rev"], ids[r["path"]], r["op"] != "-"))
+    return [Event(r["sha"], r["time"], r["author"], r["summary"], ids[r["path"]], r["op"], json.loads(r["value"]))
+            for r in rows]
+
+
+def churn(root: Path, protocol: Path, field: str = "", limit: int = 20) -> List[Tuple[str, int, str]]:
+    """Most frequently changed field paths: ``(path, revisions changing it, last changing commit)``.
+
+    A field's first appearance in the protocol's first revision is not a change.
+    """
+    with _query(root, protocol) as (conn, repo, file_id, rel):
+        ids = _path_ids(conn, field)
+        rows = conn.execute(
+            "SELECT path, COUNT(DISTINCT rev) AS n, MAX(rev) AS last FROM ("
+            f"  SELECT path, added AS rev FROM history_spans WHERE file = ? AND path IN ({_in(ids)}) AND added > 0"
+            "  UNION ALL"
+            f"  SELECT path, removed FROM history_spans WHERE file = ? AND path IN ({_in(ids)})"
+            "  AND removed IS NOT NULL"
+            ") GROUP BY path ORDER BY n DESC, last DESC, path LIMIT ?", (file_id, file_id, limit)).fetchall()
+        shas = dict(conn.execute(
+            "SELECT r.rev, c.sha FROM history_revisions r JOIN history_commits c ON c.id = r.commit_id "
+            f"WHERE r.file = ? AND r.rev IN ({','.join(str(r['last']) for r in rows) or 'NULL'})", (file_id,)))
+    return [(ids[r["path"]], r["n"], shas[r["last"]]) for r in rows]
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+"""Group-sequential interim analysis simulation for ``ci.interim_analyses``.
+
+A protocol with ``ci.interim_analyses: k`` is analysed at ``k`` equally
+spaced interim looks plus the final analysis. Efficacy boundaries come from
+a Lan-DeMets alpha-spending function (O'Brien-Fleming or Pocock type) and
+are computed exactly by recursive numerical integration of the null
+distribution of the score statistic.
+
+Operating characteristics are then simulated. Each trial trajectory is
+drawn once at full size; every look reads its statistic off that same
+trajectory (prefix sums of per-patient outcomes for continuous and binary
+endpoints, a calendar-time cut of staggered entry for survival) instead of
+re-simulating per look. Batches run in a process pool; batch ``i`` uses
+the ``i``-th child of ``SeedSequence(seed)`` under both hypotheses.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional "sim" extra
+    np = None
+
+from bst.power import BATCH_CELLS, PowerDesign, design_from_protocol, event_probability, logrank_z
+
+__all__ = [
+    "SPENDING",
+    "SequentialDesign",
+    "LookResult",
+    "SequentialResult",
+    "spend",
+    "boundaries",
+    "sequential_from_protocol",
+    "simulate_sequential",
+]
+
+SPENDING = ("obrien-fleming", "pocock")
+_ALIASES = {"obf": "obrien-fleming", "of": "obrien-fleming", "o'brien-fleming": "obrien-fleming"}
+# Points of the numerical-integration grid over the continuation region
+GRID_POINTS = 801
+
+_erf = np.frompyfunc(math.erf, 1, 1) if np is not None else None
+
+
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + _erf(np.asarray(x, dtype=np.float64) / math.sqrt(2)).astype(np.float64))
+
+
+def _norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+@dataclass(frozen=True)
+class SequentialDesign:
+    """A ``PowerDesign`` analysed at ``looks`` equally spaced looks."""
+
+    design: PowerDesign
+    looks: int = 3
+    spending: str = "obrien-fleming"
+    # survival: months of uniform enrolment before the last patient's follow-up
+    accrual: float = 12.0
+
+    @property
+    def fractions(self) -> List[float]:
+        return [k / self.looks for k in range(1, self.looks + 1)]
+
+
+@dataclass
+class LookResult:
+    fraction: float
+    boundary: float
+    nominal_alpha: float
+    cumulative_alpha: float
+    stop_h1: float
+    stop_h0: float
+    # mean patients enrolled at the look (under the alternative)
+    patients: float
+
+
+@dataclass
+class SequentialResult:
+    looks: List[LookResult]
+    power: float
+    type1_error: float
+    expected_n_h1: float
+    expected_n_h0: float
+    max_n: int
+    reps: int
+
+
+def spend(spending: str, alpha: float, t: float) -> float:
+    """Cumulative two-sided alpha spent at information fraction ``t``."""
+    if t <= 0:
+        return 0.0
+    if spending == "obrien-fleming":
+        return 2 * (1 - NormalDist().cdf(NormalDist().inv_cdf(1 - alpha / 2) / math.sqrt(t)))
+    if spending == "pocock":
+        return alpha * math.log(1 + (math.e - 1) * min(t, 1.0))
+    raise ValueError(f"Unknown spending function {spending!r} (choose from {', '.join(SPENDING)})")
+
+
+def boundaries(fractions: List[float], alpha: float = 0.05, spending: str = "obrien-fleming") -> List[float]:
+    """Two-sided efficacy boundaries (on the Z scale) for each look.
+
+    The score ``S_k = Z_k * sqrt(t_k)`` is Brownian motion under the null;
+    its density on the continuation region is propagated look to look on a
+    trapezoid grid, and each boundary is solved by bisection so that the
+    probability of first crossing at look ``k`` equals the alpha spent there.
+    """
+    bounds: List[float] = []
+    grid = weighted = None
+    prev_t = spent = 0.0
+    for t in fractions:
+        increment = spend(spending, alpha, t) - spent
+        dt = t - prev_t
+
+        def crossing(c: float) -> float:
+            b = c * math.sqrt(t)
+            if weighted is None:
+                return 2 * (1 - NormalDist().cdf(c))
+            sd = math.sqrt(dt)
+            return float(np.sum(weighted * (_norm_cdf((-b - grid) / sd) + 1 - _norm_cdf((b - grid) / sd))))
+
+        lo, hi = 0.0, 12.0
+        for _ in range(60):
+            mid = (lo + hi) / 2
+            if crossing(mid) > increment:
+                lo = mid
+            else:
+                hi = mid
+        c = (lo + hi) / 2
+        bounds.append(c)
+        spent += crossing(c)
+
+        b = c * math.sqrt(t)
+        new_grid = np.linspace(-b, b, GRID_POINTS)
+        weights = np.full(GRID_POINTS, 2 * b / (GRID_POINTS - 1))
+        weights[[0, -1]] /= 2
+        if weighted is None:
+            density = _norm_pdf(new_grid / math.sqrt(t)) / math.sqrt(t)
+        else:
+            sd = math.sqrt(dt)
+            density = (_norm_pdf((new_grid[:, None] - grid[None, :]) / sd) / sd) @ weighted
+        grid, weighted = new_grid, weights * density
+        prev_t = t
+    return bounds
+
+
+def sequential_from_protocol(protocol: Dict[str, Any], **overrides: Any) -> SequentialDesign:
+    """``SequentialDesign`` from ``ci.interim_analyses`` / ``ci.alpha_spending``.
+
+    ``overrides`` (``None`` values ignored) may set ``looks``,
+    ``spending`` and ``accrual``; any other key goes to the ``PowerDesign``.
+    """
+    ci_config = protocol.get("ci") or {}
+    params: Dict[str, Any] = {
+        "looks": int(ci_config.get("interim_analyses") or 0) + 1,
+        "spending": str(ci_config.get("alpha_spending", "obrien-fleming")),
+    }
+    if ci_config.get("accrual_months") is not None:
+        params["accrual"] = float(ci_config["accrual_months"])
+    seq_keys = {"looks", "spending", "accrual"}
+    params.update({k: v for k, v in overrides.items() if k in seq_keys and v is not None})
+    spending = params["spending"].lower().replace("_", "-").replace(" ", "-")
+    params["spending"] = _ALIASES.get(spending, spending)
+    if params["spending"] not in SPENDING:
+        raise ValueError(f"Unknown spending function {params['spending']!r} (choose from {', '.join(SPENDING)})")
+    design = design_from_protocol(protocol, **{k: v for k, v in overrides.items() if k not in seq_keys})
+    return SequentialDesign(design=design, **params)
+
+
+# ----------------------------------------------------------------------
+# Trajectory simulation
+# ----------------------------------------------------------------------
+
+def _null(design: PowerDesign) -> PowerDesign:
+    return replace(design, effect_size=0.0, treatment_rate=design.control_rate, hazard_ratio=1.0)
+
+
+def _look_sizes(n: int, fractions: List[float]) -> List[int]:
+    return [max(2, round(n * t)) for t in fractions]
+
+
+def _prefix_looks(design: PowerDesign, rng: np.random.Generator, reps: int,
+                  fractions: List[float]) -> tuple:
+    """Z at every look from one per-patient trajectory (continuous/binary)."""
+    n0 = max(2, round(design.n_control * (1 - design.dropout_rate)))
+    n1 = max(2, round(design.n_treatment * (1 - design.dropout_rate)))
+    looks0, looks1 = _look_sizes(n0, fractions), _look_sizes(n1, fractions)
+    z = np.empty((reps, len(fractions)))
+    if design.endpoint == "binary":
+        x0 = np.cumsum(rng.random((reps, n0)) < design.control_rate, axis=1, dtype=np.int32)
+        x1 = np.cumsum(rng.random((reps, n1)) < design.treatment_rate, axis=1, dtype=np.int32)
+        for k, (a, b) in enumerate(zip(looks0, looks1)):
+            pooled = (x0[:, a - 1] + x1[:, b - 1]) / (a + b)
+            se = np.sqrt(pooled * (1 - pooled) * (1.0 / a + 1.0 / b))
+            diff = x1[:, b - 1] / b - x0[:, a - 1] / a
+            z[:, k] = np.divide(diff, se, out=np.zeros_like(diff), where=se > 0)
+    else:
+        y0 = rng.standard_normal((reps, n0))
+        y1 = rng.standard_normal((reps, n1)) + design.effect_size
+        s0, q0 = np.cumsum(y0, axis=1), np.cumsum(y0 * y0, axis=1)
+        s1, q1 = np.cumsum(y1, axis=1), np.cumsum(y1 * y1, axis=1)
+        for k, (a, b) in enumerate(zip(looks0, looks1)):
+            m0, m1 = s0[:, a - 1] / a, s1[:, b - 1] / b
+            ss = q0[:, a - 1] - a * m0 ** 2 + q1[:, b - 1] - b * m1 ** 2
+            t = (m1 - m0) / np.sqrt(ss / (a + b - 2) * (1.0 / a + 1.0 / b))
+            # put t on the Z scale so one set of boundaries serves every look
+            df = a + b - 2
+            z[:, k] = t if df > 1000 else _t_to_z(t, df)
+    # planned allocation counts patients randomised, dropouts included
+    enrolled = np.array([(a + b) / (1 - design.dropout_rate) for a, b in zip(looks0, looks1)])
+    return z, np.broadcast_to(enrolled, (reps, len(fractions)))
+
+
+def _t_to_z(t: np.ndarray, df: int) -> np.ndarray:
+    # Wallace's normalising transformation of Student's t
+    return np.sign(t) * np.sqrt(df * np.log1p(t * t / df)) * (8 * df + 1) / (8 * df + 3)
+
+
+def _survival_looks(design: PowerDesign, accrual: float, rng: np.random.Generator, reps: int,
+                    fractions: List[float]) -> tuple:
+    """Log-rank Z at event-driven calendar looks of one staggered-entry trial."""
+    n0, n1 = design.n_control, design.n_treatment
+    n = n0 + n1
+    hazard = math.log(2) / design.median_survival
+    scale = np.concatenate([np.full(n0, 1 / hazard), np.full(n1, 1 / (hazard * design.hazard_ratio))])
+    entry = rng.uniform(0, accrual, (reps, n))
+    event_time = rng.exponential(1.0, (reps, n)) * scale
+    censor = np.full((reps, n), design.follow_up)
+    if design.dropout_rate:
+        drop = rng.random((reps, n)) < design.dropout_rate
+        censor = np.where(drop, rng.uniform(0, design.follow_up, (reps, n)), censor)
+    group = np.broadcast_to(np.concatenate([np.zeros(n0, bool), np.ones(n1, bool)]), (reps, n))
+
+    # interim looks fall when the planned share of the expected final events
+    # has been observed (or at the end of the study, whichever comes first)
+    observed = event_time <= censor
+    ordered = np.sort(np.where(observed, entry + event_time, np.inf), axis=1)
+    planned = n0 * event_probability(hazard, design) + n1 * event_probability(hazard * design.hazard_ratio, design)
+    end = accrual + design.follow_up
+
+    z = np.empty((reps, len(fractions)))
+    enrolled = np.empty((reps, len(fractions)))
+    for k, t in enumerate(fractions):
+        if k == len(fractions) - 1:
+            cut = np.full(reps, end)
+        else:
+            target = min(n, max(1, math.ceil(t * planned)))
+            cut = np.minimum(ordered[:, target - 1], end)
+        cut = cut[:, None]
+        include = entry < cut
+        window = cut - entry
+        time = np.minimum(np.minimum(event_time, censor), window)
+        event = observed & (event_time <= window)
+        z[:, k] = logrank_z(np.where(include, time, -1.0), event & include, group, include)
+        enrolled[:, k] = include.sum(axis=1)
+    return z, enrolled
+
+
+def _simulate_batch(seq: SequentialDesign, design: PowerDesign, bounds: List[float],
+                    seed: np.random.SeedSequence, reps: int) -> tuple:
+    """(stops per look + "never", patients-at-look sums, patients-at-stop sum)."""
+    rng = np.random.default_rng(seed)
+    if design.endpoint == "survival":
+        z, enrolled = _survival_looks(design, seq.accrual, rng, reps, seq.fractions)
+    else:
+        z, enrolled = _prefix_looks(design, rng, reps, seq.fractions)
+    crossed = np.abs(z) >= np.asarray(bounds)
+    stopped = crossed.any(axis=1)
+    first = np.where(stopped, crossed.argmax(axis=1), len(bounds))
+    stops = np.bincount(first, minlength=len(bounds) + 1)
+    at_stop = np.where(stopped, enrolled[np.arange(reps), np.minimum(first, len(bounds) - 1)], enrolled[:, -1])
+    return stops, enrolled.sum(axis=0), float(at_stop.sum())
+
+
+def simulate_sequential(seq: SequentialDesign, reps: int = 20_000, seed: int = 0,
+                        workers: Optional[int] = None) -> SequentialResult:
+    """Stopping probabilities and expected sample size under H1 and H0."""
+    if np is None:
+        raise RuntimeError("numpy is required for interim simulation (pip install 'bst[sim]')")
+    if seq.looks < 1:
+        raise ValueError("A sequential design needs at least one look")
+    design = seq.design
+    bounds = boundaries(seq.fractions, design.alpha, seq.spending)
+    n_total = design.n_control + design.n_treatment
+    per_batch = min(reps, max(16, BATCH_CELLS // n_total))
+    n_batches = -(-reps // per_batch)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    hypotheses = [design, _null(design)]
+    tasks = [(h, s) for h in hypotheses for s in seeds]
+    args = ([seq] * len(tasks), [h for h, _ in tasks], [bounds] * len(tasks), [s for _, s in tasks],
+            [per_batch] * len(tasks))
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_batch, *args))
+    else:
+        results = list(map(_simulate_batch, *args))
+
+    total = n_batches * per_batch
+    summary = []
+    for part in (results[:n_batches], results[n_batches:]):
+        stops = sum(r[0] for r in part) / total
+        patients = sum(r[1] for r in part) / total
+        expected_n = sum(r[2] for r in part) / total
+        summary.append((stops, patients, expected_n))
+    (stops_h1, patients, expected_h1), (stops_h0, _, expected_h0) = summary
+
+    looks = []
+    for k, (t, c) in enumerate(zip(seq.fractions, bounds)):
+        looks.append(LookResult(
+            fraction=t,
+            boundary=c,
+            nominal_alpha=2 * (1 - NormalDist().cdf(c)),
+            cumulative_alpha=spend(seq.spending, design.alpha, t),
+            stop_h1=float(stops_h1[k]),
+            stop_h0=float(stops_h0[k]),
+            patients=float(patients[k]),
+        ))
+    return SequentialResult(
+        looks=looks,
+        power=float(stops_h1[:-1].sum()),
+        type1_error=float(stops_h0[:-1].sum()),
+        expected_n_h1=expected_h1,
+        expected_n_h0=expected_h0,
+        max_n=n_total,
+        reps=total,
+    )
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+"""Append-only Merkle tree over the audit ledger (RFC 6962 / RFC 9162).
+
+Leaves are hashed as ``SHA-256(0x00 || data)`` and interior nodes as
+``SHA-256(0x01 || left || right)``. Every node of every complete subtree is
+persisted in the ``merkle_nodes`` table, so
+
+* appending a leaf writes at most ``log2(n) + 1`` nodes,
+* the root of the tree at any past size, an inclusion proof and a
+  consistency proof each need ``O(log n)`` node lookups.
+
+``verify_inclusion`` and ``verify_consistency`` are pure functions that an
+auditor can run on a proof alone, without access to the ledger.
+"""
+
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+__all__ = [
+    "leaf_hash",
+    "node_hash",
+    "entry_leaf",
+    "MerkleLog",
+    "MerkleTree",
+    "root_of",
+    "verify_inclusion",
+    "verify_consistency",
+]
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def entry_leaf(entry: Dict[str, Any]) -> bytes:
+    """Canonical leaf encoding of a ledger entry."""
+    fields = {k: entry[k] for k in ("artifact", "sha256", "timestamp")}
+    return json.dumps(fields, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly less than ``n`` (``n >= 2``)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def root_of(leaves: List[bytes]) -> bytes:
+    """Root over already-hashed leaves, computed in memory."""
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return node_hash(root_of(leaves[:k]), root_of(leaves[k:]))
+
+
+class MerkleTree:
+    """In-memory tree over a fixed list of leaf hashes (used for batches).
+
+    Built level by level, pairing neighbours and carrying an unpaired last
+    node up unchanged, which yields exactly the RFC 6962 tree shape; proofs
+    are therefore checked with ``verify_inclusion``.
+    """
+
+    def __init__(self, leaves: List[bytes]):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            prev = self.levels[-1]
+            nxt = [node_hash(prev[i], prev[i + 1]) for i in range(0, len(prev) - 1, 2)]
+            if len(prev) % 2:
+                nxt.append(prev[-1])
+            self.levels.append(nxt)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[bytes]:
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(level[sibling])
+            index >>= 1
+        return path
+
+
+class MerkleLog:
+    """Merkle tree persisted in the repository store.
+
+    Operates on an open store connection; callers own the transaction so
+    that a ledger row and its leaf are committed together.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def size(self) -> int:
+        row = self.conn.execute("SELECT MAX(idx) FROM merkle_nodes WHERE level = 0").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def _node(self, level: int, idx: int) -> bytes:
+        row = self.conn.execute(
+            "SELECT hash FROM merkle_nodes WHERE level = ? AND idx = ?", (level, idx)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"Missing Merkle node ({level}, {idx})")
+        return bytes(row[0])
+
+    def append(self, data: bytes) -> int:
+        """Append a leaf; returns its index."""
+        index = self.size()
+        h = leaf_hash(data)
+        level, idx = 0, index
+        self.conn.execute("INSERT INTO merkle_nodes VALUES (0, ?, ?)", (idx, h))
+        # each completed pair of siblings yields a parent one level up
+        while idx & 1:
+            h = node_hash(self._node(level, idx - 1), h)
+            level, idx = level + 1, idx >> 1
+            self.conn.execute("INSERT INTO merkle_nodes VALUES (?, ?, ?)", (level, idx, h))
+        return index
+
+    def sync(self) -> int:
+        """Append leaves for ledger rows that are not in the tree yet."""
+        pending = self.conn.execute(
+            "SELECT seq, artifact, sha256, timestamp FROM ledger WHERE leaf IS NULL ORDER BY seq"
+        ).fetchall()
+        for row in pending:
+            leaf = self.append(entry_leaf(dict(row)))
+            self.conn.execute("UPDATE ledger SET leaf = ? WHERE seq = ?", (leaf, row["seq"]))
+        return len(pending)
+
+    def _hash(self, start: int, end: int) -> bytes:
+        """MTH(D[start:end]) for ranges produced by the RFC 6962 recursion."""
+        n = end - start
+        if n == 0:
+            return hashlib.sha256(b"").digest()
+        if n & (n - 1) == 0 and start % n == 0:
+            level = n.bit_length() - 1
+            return self._node(level, start >> level)
+        k = _split(n)
+        return node_hash(self._hash(start, start + k), self._hash(start + k, end))
+
+    def root(self, size: Optional[int] = None) -> bytes:
+        return self._hash(0, self.size() if size is None else size)
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        size = self.size() if size is None else size
+        if not 0 <= index < size:
+            raise ValueError(f"Leaf {index} is not in a tree of size {size}")
+        path: List[bytes] = []
+        start, end = 0, size
+        while end - start > 1:
+            k = _split(end - start)
+            if index < start + k:
+                path.append(self._hash(start + k, end))
+                end = start + k
+            else:
+                path.append(self._hash(start, start + k))
+                start += k
+        return path[::-1]
+
+    def consistency_proof(self, old_size: int, size: Optional[int] = None) -> List[bytes]:
+        size = self.size() if size is None else size
+        if not 0 < old_size <= size:
+            raise ValueError(f"Cannot prove size {old_size} against size {size}")
+        proof: List[bytes] = []
+        start, end, m, complete = 0, size, old_size, True
+        while m != end - start:
+            k = _split(end - start)
+            if m <= k:
+                proof.append(self._hash(start + k, end))
+                end = start + k
+            else:
+                proof.append(self._hash(start, start + k))
+                start, m, complete = start + k, m - k, False
+        if not complete:
+            proof.append(self._hash(start, end))
+        return proof[::-1]
+
+
+def verify_inclusion(leaf: bytes, index: int, size: int, path: List[bytes], root: bytes) -> bool:
+    """RFC 9162 §2.1.3.2: check that ``leaf`` (a leaf hash) is at ``index``."""
+    if index >= size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+def verify_consistency(old_size: int, size: int, proof: List[bytes], old_root: bytes, root: bytes) -> bool:
+    """RFC 9162 §2.1.4.2: check that tree ``size`` extends tree ``old_size``."""
+    if old_size == size:
+        return not proof and old_root == root
+    if not 0 < old_size < size or not proof:
+        return False
+    if old_size & (old_size - 1) == 0:
+        proof = [old_root] + list(proof)
+    fn, sn = old_size - 1, size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = proof[0]
+    for c in proof[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(c, fr)
+            sr = node_hash(c, sr)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            sr = node_hash(sr, c)
+        fn >>= 1
+        sn >>= 1
+    return fr == old_root and sr == root and sn == 0
@@ -3,21 +3,38 @@ from __future__ import annotations
 """On-chain audit logging stubs for Bastion.
 
 In production this would commit Merkle roots to a permissioned blockchain such
-as Hyperledger Fabric. For demo purposes we persist a JSON ledger in the
-`.ctrepo` folder.
+as Hyperledger Fabric. For demo purposes ledger entries are kept in the
+``ledger`` table of the repository store (see :mod:`bst.store`), each one a
+leaf of the Merkle log in :mod:`bst.merkle`. Proofs are exchanged as JSON
+with hex-encoded hashes.
+
+``record_batch`` anchors a whole data release with a single ledger entry:
+the files are hashed in parallel, arranged in their own Merkle tree, and
+only the batch root goes into the ledger. A member's proof chains its path
+to the batch root with the batch entry's path to the ledger root.
 """
 
+import contextlib
+import glob
 import json
-import hashlib
+import os
 import time
 from pathlib import Path
-from typing import Dict, Any
-
-__all__ = ["record_artifact"]
+from typing import Dict, Any, Iterable, List, Optional
 
+from bst import merkle as _merkle
+from bst import store as _store
+from bst.hashing import cached_hash, cached_hashes
 
-def _ledger_path(repo_root: Path) -> Path:
-    return repo_root / ".ctrepo" / "onchain_ledger.json"
+__all__ = [
+    "record_artifact",
+    "collect_artifacts",
+    "record_batch",
+    "ledger_entries",
+    "prove_inclusion",
+    "prove_consistency",
+    "verify_proof",
+]
 
 
 def record_artifact(artifact: Path, repo_root: Path) -> Dict[str, Any]:
@@ -26,17 +43,195 @@ def record_artifact(artifact: Path, repo_root: Path) -> Dict[str, Any]:
     Returns the ledger entry created.
     """
     repo_root.mkdir(exist_ok=True, parents=True)
-    ledger_file = _ledger_path(repo_root)
-    ledger: list[dict[str, Any]] = (
-        json.loads(ledger_file.read_text()) if ledger_file.exists() else []
-    )
-
-    digest = hashlib.sha256(artifact.read_bytes()).hexdigest()
+    # the ledger is always sha256 so entries stay comparable across repos
+    digest = cached_hash(artifact, repo_root, "sha256")
     entry = {
         "artifact": str(artifact),
         "sha256": digest,
         "timestamp": int(time.time()),
     }
-    ledger.append(entry)
-    ledger_file.write_text(json.dumps(ledger, indent=2))
-    return entry
\ No newline at end of file
+    with contextlib.closing(_store.connect(repo_root)) as conn, _store.transaction(conn):
+        _append_entry(conn, entry)
+    return entry
+
+
+def _append_entry(conn, entry: Dict[str, Any]) -> None:
+    log = _merkle.MerkleLog(conn)
+    log.sync()
+    entry["leaf"] = log.append(_merkle.entry_leaf(entry))
+    conn.execute(
+        "INSERT INTO ledger (artifact, sha256, timestamp, leaf) VALUES (?, ?, ?, ?)",
+        (entry["artifact"], entry["sha256"], entry["timestamp"], entry["leaf"]),
+    )
+
+
+def _member_leaf(member: Dict[str, Any]) -> bytes:
+    data = json.dumps({"path": member["path"], "sha256": member["sha256"]}, sort_keys=True, separators=(",", ":"))
+    return _merkle.leaf_hash(data.encode())
+
+
+def _member_path(path: Path, repo_root: Path) -> str:
+    rel = os.path.relpath(path.resolve(), repo_root.resolve())
+    return Path(path).as_posix() if rel.startswith("..") else Path(rel).as_posix()
+
+
+def collect_artifacts(specs: Iterable[str]) -> List[Path]:
+    """Expand files, directories (recursively) and glob patterns.
+
+    Hidden files and directories (``.git``, ``.ctrepo``) are skipped when
+    walking directories. The result is de-duplicated and sorted.
+    """
+    found = set()
+    for spec in specs:
+        matches = glob.glob(spec, recursive=True) if glob.has_magic(spec) else [spec]
+        for m in matches:
+            p = Path(m)
+            if p.is_dir():
+                for dirpath, dirnames, filenames in os.walk(p):
+                    dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                    found.update(Path(dirpath) / f for f in filenames if not f.startswith("."))
+            elif p.is_file():
+                found.add(p)
+    return sorted(found)
+
+
+def record_batch(artifacts: List[Path], repo_root: Path, label: Optional[str] = None,
+                 workers: Optional[int] = None) -> Dict[str, Any]:
+    """Anchor ``artifacts`` under one Merkle root with a single ledger entry.
+
+    Returns the batch manifest (also written to ``.ctrepo/batches/``) with
+    the ledger entry and every member's proof against the batch root.
+    """
+    if not artifacts:
+        raise ValueError("No artifacts to commit")
+    digests = cached_hashes(artifacts, repo_root, "sha256", workers=workers)
+    members = sorted(
+        ({"path": _member_path(p, repo_root), "sha256": d} for p, d in zip(artifacts, digests)),
+        key=lambda m: m["path"],
+    )
+    tree = _merkle.MerkleTree([_member_leaf(m) for m in members])
+    batch_root = tree.root.hex()
+    entry = {
+        "artifact": f"batch:{label or time.strftime('%Y%m%dT%H%M%S')} ({len(members)} files)",
+        "sha256": batch_root,
+        "timestamp": int(time.time()),
+    }
+    with contextlib.closing(_store.connect(repo_root)) as conn, _store.transaction(conn):
+        _append_entry(conn, entry)
+        conn.executemany(
+            "INSERT OR IGNORE INTO batch_members VALUES (?, ?, ?, ?)",
+            [(batch_root, i, m["path"], m["sha256"]) for i, m in enumerate(members)],
+        )
+    manifest = {
+        "entry": entry,
+        "batch_root": batch_root,
+        "files": [dict(m, index=i, proof=[h.hex() for h in tree.proof(i)]) for i, m in enumerate(members)],
+    }
+    out = repo_root / ".ctrepo" / "batches" / f"{batch_root}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(manifest, indent=2))
+    manifest["manifest"] = str(out)
+    return manifest
+
+
+def ledger_entries(repo_root: Path, sha256: str | None = None) -> List[Dict[str, Any]]:
+    """Ledger entries in commit order, optionally only those for ``sha256``."""
+    return _store.rows(repo_root, "ledger", {"sha256": sha256} if sha256 else None)
+
+
+def _ledger_proof(log: _merkle.MerkleLog, row: Dict[str, Any]) -> Dict[str, Any]:
+    size = log.size()
+    return {
+        "entry": {k: row[k] for k in ("artifact", "sha256", "timestamp")},
+        "leaf_index": row["leaf"],
+        "tree_size": size,
+        "root": log.root(size).hex(),
+        "path": [h.hex() for h in log.inclusion_proof(row["leaf"], size)],
+    }
+
+
+def prove_inclusion(repo_root: Path, artifact: Path) -> Dict[str, Any]:
+    """Inclusion proof for the latest ledger entry covering ``artifact``.
+
+    The artifact is looked up by the file's current sha256 when it exists on
+    disk, otherwise by the recorded path. Files anchored as part of a batch
+    get a two-level proof (file -> batch root -> ledger root).
+    """
+    if artifact.is_file():
+        digest = cached_hash(artifact, repo_root, "sha256")
+        by_entry, by_member = ("sha256", digest), ("sha256", digest)
+    else:
+        by_entry, by_member = ("artifact", str(artifact)), ("path", _member_path(artifact, repo_root))
+    with contextlib.closing(_store.connect(repo_root)) as conn, _store.transaction(conn):
+        log = _merkle.MerkleLog(conn)
+        log.sync()
+        row = conn.execute(
+            f"SELECT seq, artifact, sha256, timestamp, leaf FROM ledger WHERE {by_entry[0]} = ? "
+            "ORDER BY seq DESC LIMIT 1", (by_entry[1],)
+        ).fetchone()
+        member = conn.execute(
+            "SELECT l.seq, b.batch_root, b.idx, b.path, b.sha256 FROM batch_members b "
+            f"JOIN ledger l ON l.sha256 = b.batch_root WHERE b.{by_member[0]} = ? "
+            "ORDER BY l.seq DESC LIMIT 1", (by_member[1],)
+        ).fetchone()
+        if member is not None and (row is None or member["seq"] > row["seq"]):
+            batch = conn.execute(
+                "SELECT path, sha256 FROM batch_members WHERE batch_root = ? ORDER BY idx", (member["batch_root"],)
+            ).fetchall()
+            tree = _merkle.MerkleTree([_member_leaf(dict(m)) for m in batch])
+            row = conn.execute(
+                "SELECT artifact, sha256, timestamp, leaf FROM ledger WHERE seq = ?", (member["seq"],)
+            ).fetchone()
+            return {
+                "type": "batch-inclusion",
+                "member": {"path": member["path"], "sha256": member["sha256"]},
+                "member_index": member["idx"],
+                "batch_size": len(batch),
+                "batch_path": [h.hex() for h in tree.proof(member["idx"])],
+                **_ledger_proof(log, dict(row)),
+            }
+        if row is None:
+            raise LookupError(f"{artifact} is not in the ledger")
+        return {"type": "inclusion", **_ledger_proof(log, dict(row))}
+
+
+def prove_consistency(repo_root: Path, old_size: int, size: Optional[int] = None) -> Dict[str, Any]:
+    """Proof that the ledger at ``size`` (default: now) extends ``old_size``."""
+    with contextlib.closing(_store.connect(repo_root)) as conn, _store.transaction(conn):
+        log = _merkle.MerkleLog(conn)
+        log.sync()
+        size = log.size() if size is None else size
+        proof = log.consistency_proof(old_size, size)
+        return {
+            "type": "consistency",
+            "old_size": old_size,
+            "old_root": log.root(old_size).hex(),
+            "tree_size": size,
+            "root": log.root(size).hex(),
+            "path": [h.hex() for h in proof],
+        }
+
+
+def verify_proof(proof: Dict[str, Any], root: Optional[str] = None) -> bool:
+    """Check a proof produced by ``prove_*``.
+
+    ``root`` pins the expected (new) root, e.g. one obtained out of band;
+    otherwise the root carried in the proof is used.
+    """
+    expected = bytes.fromhex(root or proof["root"])
+    path = [bytes.fromhex(h) for h in proof["path"]]
+    if proof["type"] in ("inclusion", "batch-inclusion"):
+        if proof["type"] == "batch-inclusion":
+            batch_path = [bytes.fromhex(h) for h in proof["batch_path"]]
+            batch_root = bytes.fromhex(proof["entry"]["sha256"])
+            if not _merkle.verify_inclusion(
+                _member_leaf(proof["member"]), proof["member_index"], proof["batch_size"], batch_path, batch_root
+            ):
+                return False
+        leaf = _merkle.leaf_hash(_merkle.entry_leaf(proof["entry"]))
+        return _merkle.verify_inclusion(leaf, proof["leaf_index"], proof["tree_size"], path, expected)
+    if proof["type"] == "consistency":
+        return _merkle.verify_consistency(
+            proof["old_size"], proof["tree_size"], path, bytes.fromhex(proof["old_root"]), expected
+        )
+    raise ValueError(f"Unknown proof type {proof['type']!r}")
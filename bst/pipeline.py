@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+"""Evidence CI as a cached DAG of stages (``bst ci run``).
+
+Stages come from the ``pipeline:`` section of ``bastion.yaml``::
+
+    pipeline:
+      protocol: protocol/trial.yaml
+      stages:
+        lint:
+          run: bst ci lint-protocol {protocol}
+          inputs: ["{protocol}", schemas/]
+        power-sim:
+          run: bst ci power-sim {protocol}
+          needs: [lint]
+          inputs: ["{protocol}"]
+
+``run`` is a command line (a leading ``bst`` runs this interpreter's
+``python -m bst``); ``{protocol}`` and ``{protocol_name}`` are filled in
+from the selected protocol. ``inputs`` and ``outputs`` are files,
+directories or globs relative to the repository root. Without a
+``stages`` section, ``DEFAULT_STAGES`` is used.
+
+Stages whose ``needs`` have all passed run concurrently, each in its own
+subprocess. Every stage has a cache key: a SHA-256 over its command, the
+bst code version, the digests of its inputs and the keys of the stages it
+needs. A successful run is recorded under ``.ctrepo/cache/pipeline/`` with
+its log and output digests, and its outputs are kept as content-addressed
+blobs; the next run with the same key replays the log and restores any
+missing or modified outputs instead of running the stage.
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bst.hashing import cached_hashes
+from bst.onchain import collect_artifacts
+
+__all__ = [
+    "DEFAULT_STAGES",
+    "Stage",
+    "StageResult",
+    "load_stages",
+    "resolve_protocol",
+    "levels",
+    "code_version",
+    "run_pipeline",
+]
+
+CACHE_DIR = Path(".ctrepo") / "cache"
+
+DEFAULT_STAGES: Dict[str, Dict[str, Any]] = {
+    "lint": {
+        "run": "bst ci lint-protocol --strict {protocol}",
+        "inputs": ["{protocol}", "schemas"],
+    },
+    "power-sim": {
+        "run": "bst ci power-sim {protocol}",
+        "needs": ["lint"],
+        "inputs": ["{protocol}"],
+    },
+    "interim-sim": {
+        "run": "bst ci interim-sim {protocol}",
+        "needs": ["lint"],
+        "inputs": ["{protocol}"],
+    },
+    "twin-simulate": {
+        "run": "bst twin-simulate --protocol {protocol_name}",
+        "needs": ["lint"],
+        "inputs": ["{protocol}"],
+        "outputs": ["data/synthetic-controls.parquet"],
+    },
+    "diversity-badge": {
+        "run": "bst ci diversity-badge {protocol}",
+        "needs": ["twin-simulate"],
+        "inputs": ["{protocol}", "data/synthetic-controls.parquet"],
+    },
+}
+
+
+@dataclass
+class Stage:
+    name: str
+    run: str
+    needs: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    name: str
+    # "passed", "failed", "cached" or "skipped"
+    status: str
+    returncode: Optional[int] = None
+    log: str = ""
+    seconds: float = 0.0
+    key: Optional[str] = None
+    outputs: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("passed", "cached")
+
+
+def resolve_protocol(root: Path, protocol: Optional[str] = None, config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Protocol path relative to ``root``.
+
+    Taken from ``protocol`` (a path, or a file name under ``protocol/``),
+    else ``pipeline.protocol`` in the config, else the only protocol file
+    in ``protocol/``. Returns ``None`` when none of these settles it.
+    """
+    protocol = protocol or ((config or {}).get("pipeline") or {}).get("protocol")
+    if protocol:
+        for candidate in (root / protocol, root / "protocol" / protocol):
+            if candidate.is_file():
+                return candidate.resolve().relative_to(root.resolve()).as_posix()
+        raise ValueError(f"Protocol {protocol} not found")
+    found = sorted(p for p in (root / "protocol").glob("*.y*ml") if p.is_file())
+    return found[0].relative_to(root).as_posix() if len(found) == 1 else None
+
+
+def _fill(text: str, protocol: Optional[str], stage: str) -> str:
+    if "{protocol" in text and protocol is None:
+        raise ValueError(f"Stage {stage} needs a protocol: pass --protocol or set pipeline.protocol in bastion.yaml")
+    return text.format(protocol=protocol or "", protocol_name=Path(protocol or "").name)
+
+
+def load_stages(config: Dict[str, Any], protocol: Optional[str] = None) -> Dict[str, Stage]:
+    """Stages from a ``bastion.yaml`` mapping, placeholders filled in."""
+    raw = ((config or {}).get("pipeline") or {}).get("stages") or DEFAULT_STAGES
+    stages: Dict[str, Stage] = {}
+    for name, spec in raw.items():
+        if isinstance(spec, str):
+            spec = {"run": spec}
+        if not isinstance(spec, dict) or not spec.get("run"):
+            raise ValueError(f"Stage {name} has no run command")
+
+        def paths(key: str) -> Tuple[str, ...]:
+            value = spec.get(key) or []
+            return tuple(_fill(str(v), protocol, name) for v in ([value] if isinstance(value, str) else value))
+
+        needs = spec.get("needs") or []
+        stages[str(name)] = Stage(
+            str(name), _fill(str(spec["run"]), protocol, name),
+            tuple(str(n) for n in ([needs] if isinstance(needs, str) else needs)),
+            paths("inputs"), paths("outputs"),
+        )
+    levels(stages)
+    return stages
+
+
+def levels(stages: Dict[str, Stage]) -> List[List[str]]:
+    """Stage names grouped so every stage comes after everything it needs.
+
+    Raises ``ValueError`` for a ``needs`` naming an unknown stage or for a
+    dependency cycle.
+    """
+    for stage in stages.values():
+        unknown = [n for n in stage.needs if n not in stages]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} needs unknown stage(s): {', '.join(unknown)}")
+    depth: Dict[str, int] = {}
+    remaining = dict(stages)
+    while remaining:
+        ready = [s.name for s in remaining.values() if all(n in depth for n in s.needs)]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among: {', '.join(sorted(remaining))}")
+        for name in ready:
+            depth[name] = 1 + max((depth[n] for n in stages[name].needs), default=-1)
+            del remaining[name]
+    out: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name in stages:
+        out[depth[name]].append(name)
+    return out
+
+
+def _closure(stages: Dict[str, Stage], selected: Iterable[str]) -> Dict[str, Stage]:
+    """``selected`` stages plus everything they transitively need."""
+    keep, todo = set(), list(selected)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage {name} (have: {', '.join(stages)})")
+        if name not in keep:
+            keep.add(name)
+            todo.extend(stages[name].needs)
+    return {name: s for name, s in stages.items() if name in keep}
+
+
+def code_version() -> str:
+    """bst version plus a digest of the installed bst sources."""
+    from bst import __version__
+
+    h = hashlib.sha256()
+    package = Path(__file__).resolve().parent
+    for path in sorted(package.rglob("*.py")):
+        h.update(path.relative_to(package).as_posix().encode())
+        h.update(path.read_bytes())
+    return f"{__version__}+{h.hexdigest()[:16]}"
+
+
+def _digests(root: Path, specs: Iterable[str]) -> Dict[str, str]:
+    files = collect_artifacts(str(root / s) for s in specs)
+    digests = cached_hashes(files, root, "sha256") if files else []
+    return {p.resolve().relative_to(root.resolve()).as_posix(): d for p, d in zip(files, digests)}
+
+
+def stage_key(root: Path, stage: Stage, code: str, upstream: Dict[str, str]) -> str:
+    """Content hash of everything a stage's result depends on."""
+    material = {
+        "stage": stage.name,
+        "run": stage.run,
+        "code": code,
+        "inputs": _digests(root, stage.inputs),
+        "needs": {n: upstream[n] for n in stage.needs},
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def _command(run: str) -> List[str]:
+    argv = shlex.split(run)
+    if argv and argv[0] == "bst":
+        argv = [sys.executable, "-m", "bst", *argv[1:]]
+    return argv
+
+
+def _execute(root: Path, stage: Stage) -> StageResult:
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(_command(stage.run), cwd=root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, errors="replace")
+        code, log = proc.returncode, proc.stdout
+    except OSError as exc:
+        code, log = 127, f"{exc}\n"
+    return StageResult(stage.name, "passed" if code == 0 else "failed", code, log, time.perf_counter() - start)
+
+
+def _restore(root: Path, entry: Dict[str, Any]) -> bool:
+    """Put a cached stage's outputs back; ``False`` if a blob is gone."""
+    blobs = root / CACHE_DIR / "blobs"
+    current = _digests(root, [p for p in entry["outputs"] if (root / p).is_file()])
+    for rel, digest in entry["outputs"].items():
+        if current.get(rel) == digest:
+            continue
+        blob = blobs / digest
+        if not blob.is_file():
+            return False
+        dest = root / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(blob, dest)
+    return True
+
+
+def _save(root: Path, stage: Stage, result: StageResult) -> None:
+    blobs = root / CACHE_DIR / "blobs"
+    blobs.mkdir(parents=True, exist_ok=True)
+    result.outputs = _digests(root, stage.outputs)
+    for rel, digest in result.outputs.items():
+        blob = blobs / digest
+        if not blob.exists():
+            tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+            shutil.copyfile(root / rel, tmp)
+            os.replace(tmp, blob)
+    entries = root / CACHE_DIR / "pipeline"
+    entries.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "stage": stage.name,
+        "key": result.key,
+        "returncode": result.returncode,
+        "log": result.log,
+        "seconds": result.seconds,
+        "outputs": result.outputs,
+        "timestamp": int(time.time()),
+    }
+    tmp = entries / f"{result.key}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(entry, indent=2))
+    os.replace(tmp, entries / f"{result.key}.json")
+
+
+def _cached(root: Path, stage: Stage, key: str) -> Optional[StageResult]:
+    path = root / CACHE_DIR / "pipeline" / f"{key}.json"
+    if not path.is_file():
+        return None
+    try:
+        entry = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not _restore(root, entry):
+        return None
+    return StageResult(stage.name, "cached", entry.get("returncode", 0), entry.get("log", ""),
+                       entry.get("seconds", 0.0), key, entry["outputs"])
+
+
+def run_pipeline(root: Path, stages: Dict[str, Stage], selected: Iterable[str] = (), jobs: Optional[int] = None,
+                 use_cache: bool = True, on_result: Optional[Callable[[StageResult], None]] = None) -> List[StageResult]:
+    """Run ``stages`` (or just ``selected`` and what they need) in dependency order.
+
+    Up to ``jobs`` stages run at once. A stage whose cache key was seen
+    before is restored from the cache; a failed stage is not cached and
+    every stage downstream of it is skipped. ``on_result`` is called with
+    each result as it lands.
+    """
+    selected = list(selected)
+    if selected:
+        stages = _closure(stages, selected)
+    levels(stages)
+    code = code_version()
+    keys: Dict[str, str] = {}
+    results: Dict[str, StageResult] = {}
+    pending = dict(stages)
+
+    def finish(result: StageResult) -> None:
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        running: Dict[Any, Tuple[Stage, str]] = {}
+        while pending or running:
+            for stage in list(pending.values()):
+                if not all(n in results for n in stage.needs):
+                    continue
+                del pending[stage.name]
+                failed = [n for n in stage.needs if not results[n].ok]
+                if failed:
+                    finish(StageResult(stage.name, "skipped", log=f"needs {', '.join(failed)}\n"))
+                    continue
+                key = keys[stage.name] = stage_key(root, stage, code, keys)
+                hit = _cached(root, stage, key) if use_cache else None
+                if hit is not None:
+                    finish(hit)
+                else:
+                    running[pool.submit(_execute, root, stage)] = (stage, key)
+            if not running:
+                # a cache hit or skip may have unblocked more stages
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                result = future.result()
+                result.key = key
+                if result.ok:
+                    _save(root, stage, result)
+                finish(result)
+    return [results[name] for level in levels(stages) for name in level]
@@ -0,0 +1,614 @@
+from __future__ import annotations
+
+"""Monte-Carlo power engine for ``bst power-analysis`` and ``ci power-sim``.
+
+A ``PowerDesign`` describes the primary comparison: control vs experimental
+arm sizes, two-sided ``alpha`` and the endpoint model:
+
+* ``continuous`` - Student t-test on a standardised effect ``effect_size``.
+  Arm means and variances are drawn from their exact sampling
+  distributions, so a replicate costs O(1) regardless of ``n``.
+* ``binary`` - pooled two-proportion z-test of ``treatment_rate`` against
+  ``control_rate``.
+* ``survival`` - log-rank test under exponential survival with
+  ``hazard_ratio``, administrative censoring at ``follow_up`` months and
+  random censoring of dropouts.
+
+Replicates are simulated in vectorised batches. Batch ``i`` always draws
+from the ``i``-th child of ``SeedSequence(seed)``, so the estimate depends
+only on the seed, never on how batches are spread over worker processes.
+Simulation stops once the Wilson 95% interval is narrower than
+``±tolerance`` (or at ``max_reps``).
+
+``solve_sample_size`` finds the smallest total ``n`` reaching a power
+target. It starts from a bracket around the normal-approximation sample
+size, then narrows it with a grid of candidate sizes per pass. Candidates
+are scored with common random numbers: each simulated trial is drawn once
+at the largest size scored so far and every smaller candidate is its first
+``n`` patients per arm, so the power curve is smooth in ``n``, all
+candidates of a pass share one set of simulated (and, for survival,
+sorted) trials, and a later pass re-scores a prefix of the same trials.
+Coarse passes locate the bracket; the full-precision passes - with only
+as many replicates as ``tolerance`` needs - then search around the
+interpolated crossing.
+"""
+
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional "sim" extra
+    np = None
+
+__all__ = [
+    "ENDPOINTS",
+    "PowerDesign",
+    "PowerResult",
+    "SampleSizeResult",
+    "analytic_total",
+    "design_from_protocol",
+    "endpoint_type",
+    "event_probability",
+    "simulate_power",
+    "simulate_batch",
+    "solve_sample_size",
+    "reps_for_tolerance",
+    "t_ppf",
+    "wilson_interval",
+]
+
+ENDPOINTS = ("continuous", "binary", "survival")
+# Cells (replicates x patients) simulated per batch for patient-level models
+BATCH_CELLS = 1_000_000
+_SURVIVAL_RE = re.compile(r"surviv|\bos\b|\bpfs\b|\befs\b|\bdfs\b|time[ -]to|hazard", re.I)
+_BINARY_RE = re.compile(r"rate|proportion|response|\borr\b|remission|incidence", re.I)
+
+
+@dataclass(frozen=True)
+class PowerDesign:
+    """Two-arm design whose power is being estimated."""
+
+    n_control: int
+    n_treatment: int
+    endpoint: str = "continuous"
+    alpha: float = 0.05
+    effect_size: float = 0.3
+    control_rate: float = 0.3
+    treatment_rate: float = 0.45
+    hazard_ratio: float = 0.7
+    median_survival: float = 12.0
+    follow_up: float = 24.0
+    dropout_rate: float = 0.0
+
+    def with_total(self, n_total: int) -> "PowerDesign":
+        """Same design with ``n_total`` patients split in the current ratio."""
+        share = self.n_treatment / (self.n_control + self.n_treatment)
+        n_treatment = max(2, round(n_total * share))
+        return replace(self, n_control=max(2, n_total - n_treatment), n_treatment=n_treatment)
+
+
+@dataclass
+class PowerResult:
+    power: float
+    ci_low: float
+    ci_high: float
+    reps: int
+    converged: bool
+
+
+@dataclass
+class SampleSizeResult:
+    design: PowerDesign
+    power: PowerResult
+    target: float
+    analytic_total: int
+    # (total n, estimated power, replicates) for every candidate scored
+    evaluations: List[Tuple[int, float, int]]
+    passes: int
+
+
+def endpoint_type(endpoint: Any) -> str:
+    """Guess the endpoint model from a protocol's primary endpoint."""
+    if isinstance(endpoint, list):
+        endpoint = endpoint[0] if endpoint else ""
+    if isinstance(endpoint, dict):
+        kind = str(endpoint.get("type", "")).lower()
+        if kind in ENDPOINTS:
+            return kind
+        endpoint = f"{endpoint.get('name', '')} {endpoint.get('description', '')}"
+    text = str(endpoint or "")
+    if _SURVIVAL_RE.search(text):
+        return "survival"
+    if _BINARY_RE.search(text):
+        return "binary"
+    return "continuous"
+
+
+def design_from_protocol(protocol: Dict[str, Any], **overrides: Any) -> PowerDesign:
+    """Build a ``PowerDesign`` from a parsed protocol.
+
+    Arm sizes come from ``sample_size`` (``per_arm`` or ``target`` split by
+    ``arms[].allocation``; the first arm is the control), ``alpha`` from
+    ``ci.alpha`` and effect assumptions from ``ci``/``design.power_analysis``.
+    ``overrides`` (``None`` values ignored) take precedence.
+    """
+    sample_size = protocol.get("sample_size") or {}
+    ci_config = protocol.get("ci") or {}
+    analysis = (protocol.get("design") or {}).get("power_analysis") or {}
+    arms = [a for a in protocol.get("arms") or [] if isinstance(a, dict)]
+    weights = [float(a.get("allocation", 1)) for a in arms[:2]] or [1.0, 1.0]
+    if len(weights) == 1:
+        weights.append(weights[0])
+    n_total = int(sample_size.get("target") or (protocol.get("population") or {}).get("target_size") or 100)
+    if sample_size.get("per_arm"):
+        n_control = n_treatment = int(sample_size["per_arm"])
+    else:
+        n_treatment = max(2, round(n_total * weights[1] / sum(weights)))
+        n_control = max(2, n_total - n_treatment)
+
+    params: Dict[str, Any] = {
+        "n_control": n_control,
+        "n_treatment": n_treatment,
+        "endpoint": endpoint_type((protocol.get("endpoints") or {}).get("primary")),
+        "alpha": float(ci_config.get("alpha", analysis.get("alpha", 0.05))),
+        "dropout_rate": float(sample_size.get("dropout_rate", 0.0)),
+    }
+    for key in ("effect_size", "control_rate", "treatment_rate", "hazard_ratio", "median_survival", "follow_up"):
+        value = ci_config.get(key, analysis.get(key))
+        if value is not None:
+            params[key] = float(value)
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return PowerDesign(**params)
+
+
+# ----------------------------------------------------------------------
+# Distribution helpers (no SciPy dependency)
+# ----------------------------------------------------------------------
+
+def _betacf(a: float, b: float, x: float) -> float:
+    # Lentz's continued fraction for the incomplete beta function
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularised incomplete beta I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    ln_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(ln_front) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(ln_front) * _betacf(b, a, 1.0 - x) / b
+
+
+def _t_cdf(t: float, df: float) -> float:
+    tail = 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+def t_ppf(q: float, df: float) -> float:
+    """Quantile of Student's t distribution."""
+    if df > 1e5:
+        return NormalDist().inv_cdf(q)
+    lo, hi = -1e3, 1e3
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        if _t_cdf(mid, df) < q:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo < 1e-10:
+            break
+    return (lo + hi) / 2
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.959963984540054) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+# ----------------------------------------------------------------------
+# Vectorised trial simulation
+# ----------------------------------------------------------------------
+
+def _completers(n: int, dropout: float) -> int:
+    return max(2, int(round(n * (1 - dropout))))
+
+
+def _reject_continuous(design: PowerDesign, rng: np.random.Generator, reps: int) -> np.ndarray:
+    n0 = _completers(design.n_control, design.dropout_rate)
+    n1 = _completers(design.n_treatment, design.dropout_rate)
+    df = n0 + n1 - 2
+    # sample mean ~ N(mu, 1/n), (n-1) s^2 ~ chi2(n-1): exact, O(1) per trial
+    m0 = rng.normal(0.0, 1.0 / math.sqrt(n0), reps)
+    m1 = rng.normal(design.effect_size, 1.0 / math.sqrt(n1), reps)
+    ss = rng.chisquare(n0 - 1, reps) + rng.chisquare(n1 - 1, reps)
+    t = (m1 - m0) / np.sqrt(ss / df * (1.0 / n0 + 1.0 / n1))
+    return np.abs(t) > t_ppf(1 - design.alpha / 2, df)
+
+
+def _reject_binary(design: PowerDesign, rng: np.random.Generator, reps: int) -> np.ndarray:
+    n0 = _completers(design.n_control, design.dropout_rate)
+    n1 = _completers(design.n_treatment, design.dropout_rate)
+    x0 = rng.binomial(n0, design.control_rate, reps)
+    x1 = rng.binomial(n1, design.treatment_rate, reps)
+    pooled = (x0 + x1) / (n0 + n1)
+    se = np.sqrt(pooled * (1 - pooled) * (1.0 / n0 + 1.0 / n1))
+    diff = x1 / n1 - x0 / n0
+    z = np.divide(diff, se, out=np.zeros_like(diff), where=se > 0)
+    return np.abs(z) > NormalDist().inv_cdf(1 - design.alpha / 2)
+
+
+def _logrank_sorted(e: np.ndarray, g: np.ndarray, include: Optional[np.ndarray] = None) -> np.ndarray:
+    """Log-rank Z from time-sorted event/group rows, over ``include``d patients."""
+    if include is not None:
+        e, g = e & include, g & include
+    else:
+        include = np.ones_like(g)
+    # at risk just before each position: included total minus those earlier
+    at_risk = include.sum(1, dtype=np.int32)[:, None] - np.cumsum(include, axis=1, dtype=np.int32) + include
+    at_risk1 = g.sum(1, dtype=np.int32)[:, None] - np.cumsum(g, axis=1, dtype=np.int32) + g
+    frac = np.divide(at_risk1, at_risk, out=np.zeros(at_risk.shape), where=e)
+    o_minus_e = np.sum(g, axis=1, where=e) - np.sum(frac, axis=1)
+    var = np.sum(frac * (1 - frac), axis=1)
+    return np.divide(o_minus_e, np.sqrt(var), out=np.zeros_like(o_minus_e), where=var > 0)
+
+
+def logrank_z(time: np.ndarray, event: np.ndarray, group: np.ndarray,
+              include: Optional[np.ndarray] = None) -> np.ndarray:
+    """Row-wise log-rank Z statistics (treatment minus expected events).
+
+    ``time``, ``event`` and ``group`` (and the optional ``include`` mask of
+    patients to analyse) are ``(trials, patients)`` arrays; continuous
+    event times are assumed, so ties are ignored.
+    """
+    order = np.argsort(time, axis=1)
+    return _logrank_sorted(
+        np.take_along_axis(event, order, axis=1),
+        np.take_along_axis(group, order, axis=1),
+        None if include is None else np.take_along_axis(include, order, axis=1),
+    )
+
+
+def _survival_trials(design: PowerDesign, rng: np.random.Generator, reps: int) -> Tuple[np.ndarray, ...]:
+    n0, n1 = design.n_control, design.n_treatment
+    hazard = math.log(2) / design.median_survival
+    scale = np.concatenate([np.full(n0, 1 / hazard), np.full(n1, 1 / (hazard * design.hazard_ratio))])
+    t = rng.exponential(1.0, (reps, n0 + n1)) * scale
+    censor = np.full((reps, n0 + n1), design.follow_up)
+    if design.dropout_rate:
+        drop = rng.random((reps, n0 + n1)) < design.dropout_rate
+        censor = np.where(drop, rng.uniform(0, design.follow_up, (reps, n0 + n1)), censor)
+    group = np.broadcast_to(np.concatenate([np.zeros(n0, bool), np.ones(n1, bool)]), t.shape)
+    return np.minimum(t, censor), t <= censor, group
+
+
+def _reject_survival(design: PowerDesign, rng: np.random.Generator, reps: int) -> np.ndarray:
+    z = logrank_z(*_survival_trials(design, rng, reps))
+    return np.abs(z) > NormalDist().inv_cdf(1 - design.alpha / 2)
+
+
+_SIMULATORS = {
+    "continuous": _reject_continuous,
+    "binary": _reject_binary,
+    "survival": _reject_survival,
+}
+
+
+def batch_size(design: PowerDesign) -> int:
+    if design.endpoint == "survival":
+        return max(16, BATCH_CELLS // (design.n_control + design.n_treatment))
+    return 2_000
+
+
+def simulate_batch(design: PowerDesign, seed: np.random.SeedSequence, reps: int) -> int:
+    """Number of rejections among ``reps`` simulated trials."""
+    rng = np.random.default_rng(seed)
+    return int(_SIMULATORS[design.endpoint](design, rng, reps).sum())
+
+
+def _map_batches(design: PowerDesign, seeds: List[np.random.SeedSequence], sizes: List[int], pool) -> List[int]:
+    if pool is None:
+        return [simulate_batch(design, s, n) for s, n in zip(seeds, sizes)]
+    return list(pool.map(simulate_batch, [design] * len(seeds), seeds, sizes))
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for power simulation (pip install 'bst[sim]')")
+
+
+def simulate_power(design: PowerDesign, max_reps: int = 50_000, tolerance: float = 0.01,
+                   seed: int = 0, workers: Optional[int] = None, min_reps: int = 1_000) -> PowerResult:
+    """Estimate power, stopping early once the 95% CI is within ``±tolerance``."""
+    _require_numpy()
+    if design.endpoint not in _SIMULATORS:
+        raise ValueError(f"Unknown endpoint type {design.endpoint!r} (choose from {', '.join(ENDPOINTS)})")
+    per_batch = min(batch_size(design), max_reps)
+    # the last batch is clipped so no more than max_reps trials are simulated
+    sizes = [min(per_batch, max_reps - i) for i in range(0, max_reps, per_batch)]
+    n_batches = len(sizes)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and n_batches > 1 else None
+    hits = reps = 0
+    converged = False
+    try:
+        i = 0
+        while i < n_batches and not converged:
+            # one round = one batch per worker; results are consumed in batch
+            # order so the stopping point does not depend on the worker count
+            for result in _map_batches(design, seeds[i:i + workers], sizes[i:i + workers], pool):
+                hits += result
+                reps += sizes[i]
+                i += 1
+                lo, hi = wilson_interval(hits, reps)
+                if reps >= min_reps and (hi - lo) / 2 <= tolerance:
+                    converged = True
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    lo, hi = wilson_interval(hits, reps)
+    return PowerResult(hits / reps, lo, hi, reps, converged)
+
+
+# ----------------------------------------------------------------------
+# Sample-size search
+# ----------------------------------------------------------------------
+
+# Smallest total sample size considered by the search
+MIN_TOTAL = 4
+# Candidate sizes scored per search pass (bracket ends included)
+GRID_POINTS = 10
+
+
+def event_probability(hazard: float, design: PowerDesign) -> float:
+    """P(event observed) under exponential survival with the design's censoring."""
+    admin = 1 - math.exp(-hazard * design.follow_up)
+    # dropouts are censored uniformly over follow-up
+    dropped = 1 - admin / (hazard * design.follow_up)
+    return (1 - design.dropout_rate) * admin + design.dropout_rate * dropped
+
+
+def analytic_total(design: PowerDesign, power: float) -> int:
+    """Normal-approximation total sample size for ``power`` (search start)."""
+    share1 = design.n_treatment / (design.n_control + design.n_treatment)
+    share0 = 1 - share1
+    z_alpha = NormalDist().inv_cdf(1 - design.alpha / 2)
+    z_beta = NormalDist().inv_cdf(power)
+    if design.endpoint == "continuous":
+        if design.effect_size == 0:
+            raise ValueError("effect_size is 0: no sample size reaches the power target")
+        total = (z_alpha + z_beta) ** 2 * (1 / share0 + 1 / share1) / design.effect_size ** 2
+        total /= 1 - design.dropout_rate
+    elif design.endpoint == "binary":
+        p0, p1 = design.control_rate, design.treatment_rate
+        if p0 == p1:
+            raise ValueError("control_rate equals treatment_rate: no sample size reaches the power target")
+        pbar = share0 * p0 + share1 * p1
+        root = (z_alpha * math.sqrt(pbar * (1 - pbar) * (1 / share0 + 1 / share1))
+                + z_beta * math.sqrt(p0 * (1 - p0) / share0 + p1 * (1 - p1) / share1))
+        total = root ** 2 / (p1 - p0) ** 2 / (1 - design.dropout_rate)
+    elif design.endpoint == "survival":
+        if design.hazard_ratio == 1:
+            raise ValueError("hazard_ratio is 1: no sample size reaches the power target")
+        # Schoenfeld: required events, then patients via P(event) per arm
+        events = (z_alpha + z_beta) ** 2 / (share0 * share1 * math.log(design.hazard_ratio) ** 2)
+        hazard = math.log(2) / design.median_survival
+        p_event = (share0 * event_probability(hazard, design)
+                   + share1 * event_probability(hazard * design.hazard_ratio, design))
+        total = events / p_event
+    else:
+        raise ValueError(f"Unknown endpoint type {design.endpoint!r} (choose from {', '.join(ENDPOINTS)})")
+    return max(MIN_TOTAL, math.ceil(total))
+
+
+def _crn_rejections(pool: PowerDesign, rng: np.random.Generator, reps: int,
+                    candidates: List[PowerDesign]) -> List[int]:
+    """Rejections per candidate, each scored on a prefix of the same trials."""
+    z_crit = NormalDist().inv_cdf(1 - pool.alpha / 2)
+    sizes = [(c.n_control, c.n_treatment) for c in candidates]
+    out = []
+    if pool.endpoint == "survival":
+        time, event, group = _survival_trials(pool, rng, reps)
+        # position of each patient within its own arm
+        rank = np.concatenate([np.arange(pool.n_control), np.arange(pool.n_treatment)])
+        order = np.argsort(time, axis=1)
+        e = np.take_along_axis(event, order, axis=1)
+        g = np.take_along_axis(group, order, axis=1)
+        r = rank[order]
+        for n0, n1 in sizes:
+            z = _logrank_sorted(e, g, np.where(g, r < n1, r < n0))
+            out.append(int((np.abs(z) > z_crit).sum()))
+        return out
+
+    m0 = _completers(pool.n_control, pool.dropout_rate)
+    m1 = _completers(pool.n_treatment, pool.dropout_rate)
+    completers = [(_completers(n0, pool.dropout_rate), _completers(n1, pool.dropout_rate)) for n0, n1 in sizes]
+    if pool.endpoint == "binary":
+        x0 = np.cumsum(rng.random((reps, m0)) < pool.control_rate, axis=1, dtype=np.int32)
+        x1 = np.cumsum(rng.random((reps, m1)) < pool.treatment_rate, axis=1, dtype=np.int32)
+        for n0, n1 in completers:
+            a, b = x0[:, n0 - 1], x1[:, n1 - 1]
+            pooled = (a + b) / (n0 + n1)
+            se = np.sqrt(pooled * (1 - pooled) * (1.0 / n0 + 1.0 / n1))
+            diff = b / n1 - a / n0
+            z = np.divide(diff, se, out=np.zeros_like(diff), where=se > 0)
+            out.append(int((np.abs(z) > z_crit).sum()))
+        return out
+
+    y0 = rng.standard_normal((reps, m0))
+    y1 = rng.standard_normal((reps, m1)) + pool.effect_size
+    s0, q0 = np.cumsum(y0, axis=1), np.cumsum(y0 * y0, axis=1)
+    s1, q1 = np.cumsum(y1, axis=1), np.cumsum(y1 * y1, axis=1)
+    for n0, n1 in completers:
+        mean0, mean1 = s0[:, n0 - 1] / n0, s1[:, n1 - 1] / n1
+        ss = q0[:, n0 - 1] - n0 * mean0 ** 2 + q1[:, n1 - 1] - n1 * mean1 ** 2
+        df = n0 + n1 - 2
+        t = (mean1 - mean0) / np.sqrt(ss / df * (1.0 / n0 + 1.0 / n1))
+        out.append(int((np.abs(t) > t_ppf(1 - pool.alpha / 2, df)).sum()))
+    return out
+
+
+def _crn_batch(pool: PowerDesign, seed: np.random.SeedSequence, reps: int,
+               candidates: List[PowerDesign]) -> List[int]:
+    return _crn_rejections(pool, np.random.default_rng(seed), reps, candidates)
+
+
+def _crn_power(design: PowerDesign, pool_total: int, totals: List[int], reps: int,
+               seed: int, pool_exec) -> Tuple[List[int], int]:
+    """Rejection counts for ``totals`` on trials simulated at ``pool_total``.
+
+    Batch ``i`` always uses the ``i``-th seed child, so a pass with fewer
+    replicates scores a prefix of the trials of a longer one.
+    """
+    pool = design.with_total(pool_total)
+    per_batch = max(16, BATCH_CELLS // pool_total)
+    n_batches = max(1, -(-reps // per_batch))
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    candidates = [design.with_total(t) for t in totals]
+    args = ([pool] * n_batches, seeds, [per_batch] * n_batches, [candidates] * n_batches)
+    if pool_exec is None or n_batches == 1:
+        results = list(map(_crn_batch, *args))
+    else:
+        results = list(pool_exec.map(_crn_batch, *args))
+    return [sum(col) for col in zip(*results)], n_batches * per_batch
+
+
+def _grid(lo: int, hi: int, points: int) -> List[int]:
+    return sorted({round(lo + (hi - lo) * i / (points - 1)) for i in range(points)})
+
+
+def _narrow(lo: int, hi: int, power: Dict[int, float], target: float) -> Tuple[int, int]:
+    """Tightest bracket (failing, passing) consistent with ``power``."""
+    hi = min([t for t, p in power.items() if lo <= t <= hi and p >= target] + [hi])
+    lo = max([t for t, p in power.items() if lo <= t < hi and p < target] + [lo])
+    return lo, hi
+
+
+def _interpolate(lo: int, hi: int, power: Dict[int, float], target: float, reps: int) -> Tuple[int, int]:
+    """Shrink a pilot bracket around the interpolated crossing of ``target``.
+
+    The new bracket spans about 2.5 pilot standard errors of power either
+    side of the estimate, converted to patients with the local slope.
+    """
+    slope = (hi - lo) / max(power[hi] - power[lo], 1e-9)
+    estimate = lo + (target - power[lo]) * slope
+    half = 2.5 * math.sqrt(target * (1 - target) / reps) * slope
+    return max(lo, math.floor(estimate - half)), min(hi, math.ceil(estimate + half))
+
+
+def reps_for_tolerance(target: float, tolerance: float, z: float = 1.959963984540054) -> int:
+    """Replicates giving a 95% interval of ``±tolerance`` at power ``target``."""
+    return math.ceil(z * z * target * (1 - target) / tolerance ** 2)
+
+
+def solve_sample_size(design: PowerDesign, target: float = 0.8, reps: int = 20_000, seed: int = 0,
+                      workers: Optional[int] = None, max_total: int = 200_000,
+                      tolerance: Optional[float] = None) -> SampleSizeResult:
+    """Smallest total sample size whose simulated power reaches ``target``.
+
+    The arm ratio of ``design`` is kept. Candidates in the final passes are
+    scored with ``reps`` replicates, or with just enough for a 95% interval
+    of ``±tolerance`` at the target when that is fewer; coarse passes at a
+    sixteenth and a quarter of that narrow the bracket first.
+    """
+    if design.endpoint not in _SIMULATORS:
+        raise ValueError(f"Unknown endpoint type {design.endpoint!r} (choose from {', '.join(ENDPOINTS)})")
+    if not 0 < target < 1:
+        raise ValueError("Power target must be between 0 and 1")
+    _require_numpy()
+    if tolerance:
+        reps = min(reps, reps_for_tolerance(target, tolerance))
+    start = analytic_total(design, target)
+    # the normal approximation is usually within a few percent; the search
+    # widens the bracket if it is not
+    lo, hi = max(MIN_TOTAL, int(start * 0.8)), min(max_total, max(MIN_TOTAL + 1, math.ceil(start * 1.25)))
+    evaluations: List[Tuple[int, float, int]] = []
+    scores: Dict[int, Tuple[int, int]] = {}
+    passes = 0
+    workers = workers or os.cpu_count() or 1
+    pool_exec = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    # every pass simulates trials at the same size (grown only if the bracket
+    # moves past it), so passes score prefixes of one set of trials and agree
+    pool_total = hi
+
+    def score(totals: List[int], n_reps: int) -> Dict[int, float]:
+        nonlocal passes, pool_total
+        pool_total = max(pool_total, *totals)
+        hits, used = _crn_power(design, pool_total, totals, n_reps, seed, pool_exec)
+        passes += 1
+        scores.update({t: (h, used) for t, h in zip(totals, hits)})
+        evaluations.extend((t, h / used, used) for t, h in zip(totals, hits))
+        return {t: h / used for t, h in zip(totals, hits)}
+
+    try:
+        # cheap coarse passes narrow the bracket, then full-precision passes
+        # refine it; ends are re-scored only until they are confirmed
+        for stage_reps in sorted({max(1, reps // 16), max(1, reps // 4), reps}):
+            confirmed = False
+            while not confirmed or (stage_reps == reps and hi - lo > 1):
+                grid = _grid(lo, hi, GRID_POINTS)
+                power = score(grid if not confirmed else grid[1:-1], stage_reps)
+                if not confirmed:
+                    if power[hi] < target:
+                        if hi >= max_total:
+                            raise ValueError(f"Power target {target} not reached with {max_total} patients")
+                        lo, hi = hi, min(max_total, hi + 2 * (hi - lo))
+                        continue
+                    if power[lo] >= target and lo > MIN_TOTAL:
+                        lo, hi = max(MIN_TOTAL, lo - 2 * (hi - lo)), lo
+                        continue
+                    confirmed = True
+                lo, hi = _narrow(lo, hi, power, target)
+                if stage_reps < reps and hi - lo > 2:
+                    lo, hi = _interpolate(lo, hi, power, target, scores[hi][1])
+    finally:
+        if pool_exec is not None:
+            pool_exec.shutdown()
+    hits, used = scores[hi]
+    ci_low, ci_high = wilson_interval(hits, used)
+    return SampleSizeResult(
+        design=design.with_total(hi),
+        power=PowerResult(hits / used, ci_low, ci_high, used, True),
+        target=target,
+        analytic_total=start,
+        evaluations=evaluations,
+        passes=passes,
+    )
@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+"""Structure-aware protocol diffs for ``bst diff protocol``.
+
+Both documents are walked together instead of diffing their JSON dumps
+line by line, so the cost is linear in the size of the protocols and every
+change names the field it touches:
+
+* mappings are compared key by key;
+* list items are matched by a stable key when every item has one (an
+  arm's ``id``, an endpoint's ``name``), otherwise by value - so a
+  criterion edited, inserted or moved in a list of thousands is found
+  with hash lookups, not an edit-distance table. Unmatched items that fall
+  between the same matched neighbours are paired up and diffed as edits.
+  Reorderings become the fewest ``move`` operations: items on a longest
+  increasing run of the matched positions stay where they are.
+
+The result is an RFC 6902 JSON Patch: applied in order to the left
+document (see :func:`apply_patch`) it yields the right one. Each operation
+also carries a ``severity`` - ``substantial``, ``non-substantial`` or
+``administrative`` - from :data:`SEVERITY_RULES`, a rough guide to the
+amendment a change would need, not a regulatory determination.
+"""
+
+import json
+from bisect import bisect_left
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "SEVERITIES",
+    "SEVERITY_RULES",
+    "Change",
+    "diff",
+    "to_patch",
+    "apply_patch",
+    "highest_severity",
+]
+
+# Least to most severe
+SEVERITIES = ("administrative", "non-substantial", "substantial")
+
+# Fields whose value identifies a list item, tried in order
+KEY_FIELDS = ("id", "name")
+
+# (pattern, severity): the first pattern matching a change's field path wins.
+# Field paths join mapping keys with dots and skip list indices, e.g.
+# ``spec.endpoints.secondary.timepoint``; unmatched paths are non-substantial.
+SEVERITY_RULES: Tuple[Tuple[str, str], ...] = (
+    ("id", "substantial"),
+    ("meta*.id", "substantial"),
+    ("*phase", "substantial"),
+    ("*endpoints.primary*", "substantial"),
+    ("*primary_endpoint*", "substantial"),
+    ("*objectives.primary*", "substantial"),
+    ("*inclusion*", "substantial"),
+    ("*exclusion*", "substantial"),
+    ("*eligibility*", "substantial"),
+    ("*arms*", "substantial"),
+    ("*intervention*", "substantial"),
+    ("*allocation*", "substantial"),
+    ("*randomization*", "substantial"),
+    ("*masking*", "substantial"),
+    ("*sample_size*", "substantial"),
+    ("*target_size*", "substantial"),
+    ("*alpha*", "substantial"),
+    ("*power*", "substantial"),
+    ("*title", "administrative"),
+    ("*description", "administrative"),
+    ("*sponsor*", "administrative"),
+    ("*principalInvestigator*", "administrative"),
+    ("*principal_investigator*", "administrative"),
+    ("*contact*", "administrative"),
+    ("*email", "administrative"),
+    ("*createdDate", "administrative"),
+    ("*lastModified", "administrative"),
+    ("*version", "administrative"),
+    ("*comment*", "administrative"),
+)
+
+_MISSING = object()
+_SCALARS = (str, int, float, bool, type(None))
+
+
+@dataclass
+class Change:
+    op: str  # "add" | "remove" | "replace" | "move"
+    path: str  # JSON pointer into the document as patched so far
+    value: Any = _MISSING
+    from_: Optional[str] = None
+    severity: str = "non-substantial"
+    # value being replaced or removed, for display
+    old: Any = _MISSING
+
+    def to_json(self) -> Dict[str, Any]:
+        """This change as a JSON Patch operation (plus ``severity``)."""
+        out: Dict[str, Any] = {"op": self.op, "path": self.path}
+        if self.from_ is not None:
+            out["from"] = self.from_
+        if self.value is not _MISSING:
+            out["value"] = self.value
+        out["severity"] = self.severity
+        return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Severity
+# ──────────────────────────────────────────────────────────────────────────
+
+def _classify(field_path: str) -> str:
+    for pattern, severity in SEVERITY_RULES:
+        if fnmatchcase(field_path, pattern):
+            return severity
+    return "non-substantial"
+
+
+def _field_paths(value: Any, prefix: str) -> Iterator[str]:
+    """Field paths of every mapping key inside ``value``."""
+    stack = [(value, prefix)]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            for k, v in node.items():
+                child = f"{path}.{k}" if path else str(k)
+                yield child
+                stack.append((v, child))
+        elif isinstance(node, list):
+            stack.extend((v, path) for v in node)
+
+
+def _severity(field_path: str, *values: Any) -> str:
+    """Most severe class of ``field_path`` and of any field inside ``values``."""
+    rank = SEVERITIES.index(_classify(field_path))
+    for value in values:
+        if isinstance(value, (dict, list)) and rank < len(SEVERITIES) - 1:
+            for path in _field_paths(value, field_path):
+                rank = max(rank, SEVERITIES.index(_classify(path)))
+    return SEVERITIES[rank]
+
+
+def highest_severity(changes: Sequence[Change]) -> Optional[str]:
+    """The most severe class among ``changes`` (``None`` when there are none)."""
+    if not changes:
+        return None
+    return max((c.severity for c in changes), key=SEVERITIES.index)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Tree walk
+# ──────────────────────────────────────────────────────────────────────────
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # 1 == 1.0 == True in Python, but not in a protocol, nested values included
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, list):
+        return len(a) == len(b) and all(map(_same, a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(v, b[k]) for k, v in a.items())
+    return a == b
+
+
+def _item_key(items: Sequence[Any]) -> Optional[str]:
+    """A field identifying every item of ``items`` uniquely, if there is one."""
+    if not items or not all(isinstance(i, dict) for i in items):
+        return None
+    for field_name in KEY_FIELDS:
+        values = [i.get(field_name, _MISSING) for i in items]
+        if all(isinstance(v, _SCALARS) for v in values) and len(set(map(repr, values))) == len(values):
+            return field_name
+    return None
+
+
+def _identity(item: Any) -> Hashable:
+    if isinstance(item, _SCALARS):
+        return (type(item).__name__, item)
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+class _Differ:
+    def __init__(self) -> None:
+        self.changes: List[Change] = []
+
+    def emit(self, op: str, path: str, field_path: str, value: Any = _MISSING, old: Any = _MISSING,
+             from_: Optional[str] = None) -> None:
+        severity = _severity(field_path, *(v for v in (value, old) if v is not _MISSING))
+        self.changes.append(Change(op, path, value, from_, severity, old))
+
+    def walk(self, a: Any, b: Any, path: str, field_path: str) -> None:
+        if isinstance(a, dict) and isinstance(b, dict):
+            self.walk_dict(a, b, path, field_path)
+        elif isinstance(a, list) and isinstance(b, list):
+            if not _same(a, b):
+                self.walk_list(a, b, path, field_path)
+        elif not _same(a, b):
+            self.emit("replace", path, field_path, value=b, old=a)
+
+    def walk_dict(self, a: Dict[Any, Any], b: Dict[Any, Any], path: str, field_path: str) -> None:
+        for k in a:
+            child = f"{path}/{_escape(k)}"
+            child_field = f"{field_path}.{k}" if field_path else str(k)
+            if k not in b:
+                self.emit("remove", child, child_field, old=a[k])
+            elif a[k] is not b[k]:
+                self.walk(a[k], b[k], child, child_field)
+        for k in b:
+            if k not in a:
+                child_field = f"{field_path}.{k}" if field_path else str(k)
+                self.emit("add", f"{path}/{_escape(k)}", child_field, value=b[k])
+
+    def walk_list(self, a: List[Any], b: List[Any], path: str, field_path: str) -> None:
+        key = _item_key(a)
+        if key != _item_key(b):
+            key = None
+        if key is not None:
+            ids_a: List[Hashable] = [("key", repr(i[key])) for i in a]
+            ids_b: List[Hashable] = [("key", repr(i[key])) for i in b]
+        else:
+            ids_a = [_identity(i) for i in a]
+            ids_b = [_identity(i) for i in b]
+
+        # match equal identities, first come first served
+        pending: Dict[Hashable, Deque[int]] = defaultdict(deque)
+        for i, ident in enumerate(ids_a):
+            pending[ident].append(i)
+        match_b: List[Optional[int]] = [None] * len(b)
+        matched_a = [False] * len(a)
+        for j, ident in enumerate(ids_b):
+            queue = pending.get(ident)
+            if queue:
+                i = queue.popleft()
+                match_b[j] = i
+                matched_a[i] = True
+
+        # pair leftovers lying between the same matched neighbours: edits, not remove + add
+        gaps_a: Dict[int, Deque[int]] = defaultdict(deque)
+        seen = 0
+        for i in range(len(a)):
+            if matched_a[i]:
+                seen += 1
+            else:
+                gaps_a[seen].append(i)
+        seen = 0
+        for j in range(len(b)):
+            if match_b[j] is not None:
+                seen += 1
+            elif gaps_a.get(seen):
+                i = gaps_a[seen].popleft()
+                match_b[j] = i
+                matched_a[i] = True
+
+        # 1. removals, from the end so earlier indices stay valid
+        for i in range(len(a) - 1, -1, -1):
+            if not matched_a[i]:
+                self.emit("remove", f"{path}/{i}", field_path, old=a[i])
+        current = [i for i in range(len(a)) if matched_a[i]]
+
+        # 2. edits inside surviving items, addressed by their post-removal index
+        position = {i: k for k, i in enumerate(current)}
+        for j, i in enumerate(match_b):
+            if i is not None and a[i] is not b[j]:
+                self.walk(a[i], b[j], f"{path}/{position[i]}", field_path)
+
+        # 3. moves, then additions front to back
+        order = [i for i in match_b if i is not None]
+        if order != current:
+            self.emit_moves(order, path, field_path)
+        for j, i in enumerate(match_b):
+            if i is None:
+                self.emit("add", f"{path}/{j}", field_path, value=b[j])
+
+    def emit_moves(self, order: List[int], path: str, field_path: str) -> None:
+        """Moves reordering the ascending survivors into ``order``.
+
+        Items on a longest increasing subsequence of ``order`` stay put; each
+        other item is moved to just after its predecessor in ``order``, so a
+        single displaced item costs a single ``move``. Positions are tracked
+        with a Fenwick tree over precomputed slots, O(n log n) overall.
+        """
+        steady = set(_increasing_run(order))
+        # slot (original rank, 0) for every item; (anchor rank, k) for the k-th
+        # item moved behind anchor, -1 anchoring items moved to the front
+        rank = {i: r for r, i in enumerate(sorted(order))}
+        targets: Dict[int, Tuple[int, int]] = {}
+        anchor, k = -1, 0
+        for i in order:
+            if i in steady:
+                anchor, k = rank[i], 0
+            else:
+                k += 1
+                targets[i] = (anchor, k)
+        slots = sorted([(r, 0) for r in range(len(order))] + list(targets.values()))
+        index = {slot: n for n, slot in enumerate(slots)}
+        tree = _Fenwick(len(slots))
+        for r in range(len(order)):
+            tree.add(index[(r, 0)], 1)
+        severity = _classify(field_path)
+        for i in order:
+            if i in steady:
+                continue
+            src = index[(rank[i], 0)]
+            frm = tree.before(src)
+            tree.add(src, -1)
+            dst = index[targets[i]]
+            self.changes.append(Change("move", f"{path}/{tree.before(dst)}", from_=f"{path}/{frm}",
+                                       severity=severity))
+            tree.add(dst, 1)
+
+
+class _Fenwick:
+    def __init__(self, size: int) -> None:
+        self.tree = [0] * (size + 1)
+
+    def add(self, pos: int, delta: int) -> None:
+        pos += 1
+        while pos < len(self.tree):
+            self.tree[pos] += delta
+            pos += pos & -pos
+
+    def before(self, pos: int) -> int:
+        """Sum over positions strictly less than ``pos``."""
+        total = 0
+        while pos > 0:
+            total += self.tree[pos]
+            pos -= pos & -pos
+        return total
+
+
+def _increasing_run(values: Sequence[int]) -> List[int]:
+    """A longest strictly increasing subsequence of ``values`` (patience sorting)."""
+    tails: List[int] = []  # per length, the index of the smallest tail value
+    tail_values: List[int] = []
+    prev: List[int] = [-1] * len(values)
+    for n, v in enumerate(values):
+        lo = bisect_left(tail_values, v)
+        if lo:
+            prev[n] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(n)
+            tail_values.append(v)
+        else:
+            tails[lo] = n
+            tail_values[lo] = v
+    out: List[int] = []
+    n = tails[-1] if tails else -1
+    while n != -1:
+        out.append(values[n])
+        n = prev[n]
+    return out[::-1]
+
+
+def diff(left: Any, right: Any) -> List[Change]:
+    """Changes turning ``left`` into ``right``, in JSON Patch order."""
+    differ = _Differ()
+    differ.walk(left, right, "", "")
+    return differ.changes
+
+
+def to_patch(changes: Sequence[Change]) -> List[Dict[str, Any]]:
+    """``changes`` as a JSON Patch document."""
+    return [c.to_json() for c in changes]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Patch application
+# ──────────────────────────────────────────────────────────────────────────
+
+def _tokens(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _parent(doc: Any, pointer: str) -> Tuple[Any, str]:
+    tokens = _tokens(pointer)
+    if not tokens:
+        raise ValueError("Patching the document root is not supported")
+    node = doc
+    for token in tokens[:-1]:
+        node = node[int(token)] if isinstance(node, list) else node[token]
+    return node, tokens[-1]
+
+
+def apply_patch(doc: Any, patch: Sequence[Dict[str, Any]]) -> Any:
+    """Apply a JSON Patch (``add``/``remove``/``replace``/``move``) to ``doc``.
+
+    ``doc`` is modified in place; the patched document is returned.
+    """
+    for op in patch:
+        kind = op["op"]
+        if kind == "move":
+            node, token = _parent(doc, op["from"])
+            value = node.pop(int(token)) if isinstance(node, list) else node.pop(token)
+            kind, op = "add", {**op, "value": value}
+        if op["path"] == "" and kind in ("add", "replace"):
+            doc = op["value"]
+            continue
+        node, token = _parent(doc, op["path"])
+        if kind == "add":
+            if isinstance(node, list):
+                node.insert(len(node) if token == "-" else int(token), op["value"])
+            else:
+                node[token] = op["value"]
+        elif kind == "remove":
+            del node[int(token) if isinstance(node, list) else token]
+        elif kind == "replace":
+            node[int(token) if isinstance(node, list) else token] = op["value"]
+        else:
+            raise ValueError(f"Unsupported JSON Patch operation: {kind!r}")
+    return doc
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""Shared, cached YAML loading for protocols and repository config.
+
+``yaml.safe_load`` uses PyYAML's pure-Python parser and every command
+re-parses the same files: ``ci lint-protocol`` alone reads its protocol in
+``ci-check`` and again in the Reg-Lint engine. ``load_protocol`` instead
+
+* parses with libyaml's ``CSafeLoader`` when PyYAML was built with it
+  (same safe subset, many times faster);
+* memoises each parsed document in-process by ``(path, mtime, size)``;
+* keeps a pickled copy under ``.ctrepo/cache/yaml/`` keyed by the SHA-256
+  of the file's bytes, so a later process (or a checkout restoring the
+  same content) skips parsing altogether.
+
+Documents are held as pickles and every call gets its own copy, so callers
+may modify what they are given. Cached pickles are read with an unpickler
+that only admits the types YAML's safe loader produces.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+import yaml
+
+__all__ = [
+    "SafeLoader",
+    "loads",
+    "load_protocol",
+]
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CACHE_DIR = Path(".ctrepo") / "cache"
+# Parsed documents kept in memory per process
+MEMO_ENTRIES = 256
+
+_MEMO: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+# Classes a safe-loaded YAML document can contain beyond the pickle builtins
+_ALLOWED = {
+    ("datetime", "date"),
+    ("datetime", "datetime"),
+    ("datetime", "timedelta"),
+    ("datetime", "timezone"),
+    ("builtins", "set"),
+    ("builtins", "frozenset"),
+}
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) not in _ALLOWED:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a cached protocol")
+        return super().find_class(module, name)
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """Parse one YAML document with the fastest safe loader available."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def _repo_root(path: Path) -> Optional[Path]:
+    for parent in path.parents:
+        if (parent / ".ctrepo").is_dir():
+            return parent
+    return None
+
+
+def _read_cached(blob: Path) -> Optional[Tuple[Any, bytes]]:
+    """``(document, pickled bytes)`` from a cache blob, or None if unusable."""
+    try:
+        data = blob.read_bytes()
+        doc = _SafeUnpickler(io.BytesIO(data)).load()
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError):
+        return None
+    return doc, data
+
+
+def _write_cached(blob: Path, data: bytes) -> None:
+    try:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        ignore = blob.parent.parent / ".gitignore"
+        if not ignore.exists():
+            ignore.write_text("*\n")
+        tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, blob)
+    except OSError:
+        # the cache is an optimisation; a read-only checkout still works
+        pass
+
+
+def load_protocol(path: Path, repo_root: Optional[Path] = None, disk_cache: bool = True) -> Any:
+    """Parsed YAML document at ``path`` (a fresh copy on every call).
+
+    The on-disk cache lives in ``repo_root`` (default: the trial repository
+    containing ``path``); files outside a repository are only memoised
+    in-process.
+    """
+    key = str(Path(path).resolve())
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _MEMO.get(key)
+    if hit is not None and hit[0] == stamp:
+        _MEMO.move_to_end(key)
+        return pickle.loads(hit[1])
+
+    raw = Path(key).read_bytes()
+    root = repo_root or (_repo_root(Path(key)) if disk_cache else None)
+    cached = None
+    blob = None
+    if root is not None and disk_cache:
+        digest = hashlib.sha256(raw).hexdigest()
+        blob = root / CACHE_DIR / "yaml" / f"{digest}.{SafeLoader.__name__}.pickle"
+        cached = _read_cached(blob)
+    if cached is not None:
+        doc, data = cached
+    else:
+        doc = loads(raw)
+        data = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+        if blob is not None:
+            _write_cached(blob, data)
+
+    # the memo keeps only the bytes, so ``doc`` is already the caller's own copy
+    _MEMO[key] = (stamp, data)
+    if len(_MEMO) > MEMO_ENTRIES:
+        _MEMO.popitem(last=False)
+    return doc
@@ -11,8 +11,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Any
 import time
-import hashlib
-import yaml
+
+from bst.protocol_io import load_protocol
 
 
 @dataclass
@@ -46,7 +46,7 @@ class RegLinter:
     # ------------------------------------------------------------------
     def run(self, yaml_path: Path) -> List[LintIssue]:
         """Run all lint rules on a YAML protocol file."""
-        protocol = yaml.safe_load(yaml_path.read_text())
+        protocol = load_protocol(yaml_path)
         issues: List[LintIssue] = []
         for rule_id, fn in self._rules.items():
             issues.extend(fn(protocol))
@@ -106,24 +106,15 @@ class RegLinter:
 
 
 # ----------------------------------------------------------------------
-# Helper for Merkle root computation (simple concatenation + sha256)
+# Helper for Merkle root computation (RFC 6962, see bst.merkle)
 # ----------------------------------------------------------------------
 
 def merkle_hash(hashes: List[str]) -> str:
-    """Compute a Merkle root of input payload hashes (very simplified)."""
+    """Compute the RFC 6962 Merkle root over hex payload hashes."""
+    from bst.merkle import leaf_hash, root_of
     if not hashes:
         return ""
-    current = hashes
-    while len(current) > 1:
-        it = iter(current)
-        next_level = []
-        for left in it:
-            right = next(it, left)  # Duplicate last if odd count
-            next_level.append(
-                hashlib.sha256((left + right).encode()).hexdigest()
-            )
-        current = next_level
-    return current[0]
+    return root_of([leaf_hash(h.encode()) for h in hashes]).hex()
 
 
 # ----------------------------------------------------------------------
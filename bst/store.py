@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+"""Transactional SQLite store for trial-repository records.
+
+Model and dataset registrations, e-signatures and on-chain ledger entries
+used to live in separate JSON files under ``.ctrepo/`` that every command
+rewrote in full. They now share one SQLite database, ``.ctrepo/bastion.db``:
+each write is a single ``BEGIN IMMEDIATE`` transaction, so parallel CI jobs
+serialise on SQLite's file lock instead of overwriting each other, and
+lookups by file or digest go through indexes.
+
+``migrate_json`` imports the legacy JSON files once (``bst store migrate``).
+"""
+
+import contextlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+__all__ = [
+    "DB_NAME",
+    "LEGACY_FILES",
+    "connect",
+    "transaction",
+    "insert",
+    "rows",
+    "migrate_json",
+]
+
+DB_NAME = "bastion.db"
+
+# Each migration step brings the schema to version ``index + 1``
+_SCHEMA: List[str] = [
+    """
+    CREATE TABLE models (
+        id        TEXT PRIMARY KEY,
+        weights   TEXT NOT NULL,
+        card      TEXT,
+        timestamp INTEGER NOT NULL
+    );
+    CREATE TABLE datasets (
+        id        TEXT PRIMARY KEY,
+        dataset   TEXT NOT NULL,
+        card      TEXT,
+        timestamp INTEGER NOT NULL
+    );
+    CREATE TABLE signatures (
+        seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+        file   TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        user   TEXT NOT NULL,
+        time   INTEGER NOT NULL
+    );
+    CREATE INDEX signatures_file ON signatures(file);
+    CREATE INDEX signatures_digest ON signatures(digest);
+    CREATE TABLE ledger (
+        seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+        artifact  TEXT NOT NULL,
+        sha256    TEXT NOT NULL,
+        timestamp INTEGER NOT NULL
+    );
+    CREATE INDEX ledger_artifact ON ledger(artifact);
+    CREATE INDEX ledger_sha256 ON ledger(sha256);
+    """,
+    """
+    CREATE TABLE hash_cache (
+        path      TEXT NOT NULL,
+        algorithm TEXT NOT NULL,
+        size      INTEGER NOT NULL,
+        mtime_ns  INTEGER NOT NULL,
+        ctime_ns  INTEGER NOT NULL,
+        inode     INTEGER NOT NULL,
+        digest    TEXT NOT NULL,
+        PRIMARY KEY (path, algorithm)
+    );
+    """,
+    """
+    CREATE TABLE merkle_nodes (
+        level INTEGER NOT NULL,
+        idx   INTEGER NOT NULL,
+        hash  BLOB NOT NULL,
+        PRIMARY KEY (level, idx)
+    ) WITHOUT ROWID;
+    ALTER TABLE ledger ADD COLUMN leaf INTEGER;
+    CREATE UNIQUE INDEX ledger_leaf ON ledger(leaf);
+    CREATE INDEX ledger_unanchored ON ledger(seq) WHERE leaf IS NULL;
+    """,
+    """
+    CREATE TABLE batch_members (
+        batch_root TEXT NOT NULL,
+        idx        INTEGER NOT NULL,
+        path       TEXT NOT NULL,
+        sha256     TEXT NOT NULL,
+        PRIMARY KEY (batch_root, idx)
+    ) WITHOUT ROWID;
+    CREATE INDEX batch_members_path ON batch_members(path);
+    CREATE INDEX batch_members_sha256 ON batch_members(sha256);
+    """,
+    """
+    CREATE TABLE ci_checks (
+        path    TEXT NOT NULL,
+        digest  TEXT NOT NULL,
+        schema  TEXT NOT NULL,
+        ok      INTEGER NOT NULL,
+        errors  TEXT NOT NULL,
+        checked INTEGER NOT NULL,
+        PRIMARY KEY (path, digest, schema)
+    ) WITHOUT ROWID;
+    CREATE TABLE twin_runs (
+        output    TEXT PRIMARY KEY,
+        inputs    TEXT NOT NULL,
+        digest    TEXT NOT NULL,
+        timestamp INTEGER NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE history_files (
+        id   INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE history_commits (
+        id      INTEGER PRIMARY KEY,
+        sha     TEXT NOT NULL UNIQUE,
+        time    INTEGER NOT NULL,
+        author  TEXT NOT NULL,
+        summary TEXT NOT NULL
+    );
+    CREATE TABLE history_paths (
+        id   INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE history_values (
+        hash  BLOB PRIMARY KEY,
+        value TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE history_revisions (
+        file      INTEGER NOT NULL,
+        rev       INTEGER NOT NULL,
+        commit_id INTEGER NOT NULL,
+        blob      TEXT,
+        PRIMARY KEY (file, rev)
+    ) WITHOUT ROWID;
+    CREATE TABLE history_spans (
+        file    INTEGER NOT NULL,
+        path    INTEGER NOT NULL,
+        value   BLOB NOT NULL,
+        added   INTEGER NOT NULL,
+        removed INTEGER,
+        PRIMARY KEY (file, path, added, value)
+    ) WITHOUT ROWID;
+    CREATE INDEX history_spans_open ON history_spans(file, path) WHERE removed IS NULL;
+    """,
+    """
+    CREATE TABLE comment_log (
+        id             INTEGER PRIMARY KEY CHECK (id = 0),
+        inode          INTEGER NOT NULL,
+        pos            INTEGER NOT NULL,
+        resolve_events INTEGER NOT NULL
+    );
+    CREATE TABLE comment_index (
+        id          TEXT PRIMARY KEY,
+        file        TEXT NOT NULL,
+        pos         INTEGER NOT NULL,
+        resolved    INTEGER NOT NULL,
+        resolved_by TEXT,
+        resolved_at TEXT
+    ) WITHOUT ROWID;
+    CREATE INDEX comment_index_file ON comment_index(file, pos);
+    CREATE INDEX comment_index_pos ON comment_index(pos);
+    """,
+]
+
+# bookkeeping columns left out of ``rows`` output
+_INTERNAL = ("seq", "leaf")
+
+# table -> legacy JSON file it replaces
+LEGACY_FILES: Dict[str, str] = {
+    "models": "model_registry.json",
+    "datasets": "dataset_registry.json",
+    "signatures": "signatures.json",
+    "ledger": "onchain_ledger.json",
+}
+
+
+def _upgrade(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(_SCHEMA):
+        return
+    with transaction(conn):
+        # re-check under the write lock: another process may have upgraded
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for step in _SCHEMA[version:]:
+            for stmt in step.split(";"):
+                if stmt.strip():
+                    conn.execute(stmt)
+        conn.execute(f"PRAGMA user_version = {len(_SCHEMA)}")
+
+
+def connect(repo_root: Path, timeout: float = 30.0) -> sqlite3.Connection:
+    """Open (creating and upgrading if needed) the repository database."""
+    db = repo_root / ".ctrepo" / DB_NAME
+    db.parent.mkdir(parents=True, exist_ok=True)
+    # isolation_level=None: transactions are managed explicitly below
+    conn = sqlite3.connect(str(db), timeout=timeout, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _upgrade(conn)
+    return conn
+
+
+@contextlib.contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run a block as one write transaction (committed or rolled back whole)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _check_table(table: str) -> None:
+    if table not in LEGACY_FILES:
+        raise ValueError(f"Unknown table {table!r}")
+
+
+def insert(repo_root: Path, table: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert one record atomically and return it."""
+    _check_table(table)
+    cols = ", ".join(entry)
+    marks = ", ".join("?" for _ in entry)
+    with contextlib.closing(connect(repo_root)) as conn, transaction(conn):
+        conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", list(entry.values()))
+    return entry
+
+
+def rows(repo_root: Path, table: str, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Records of ``table`` in insertion order, optionally filtered by equality."""
+    _check_table(table)
+    where = where or {}
+    sql = f"SELECT * FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(f"{k} = ?" for k in where)
+    sql += " ORDER BY rowid"
+    with contextlib.closing(connect(repo_root)) as conn:
+        out = [dict(r) for r in conn.execute(sql, list(where.values()))]
+    for r in out:
+        for col in _INTERNAL:
+            r.pop(col, None)
+    return out
+
+
+def migrate_json(repo_root: Path) -> Dict[str, Tuple[int, int]]:
+    """Import legacy ``.ctrepo/*.json`` registries.
+
+    Returns ``(imported, skipped)`` row counts per table; entries that clash
+    with a uniqueness constraint (e.g. an id already in the store) are
+    skipped. All files are imported in one transaction. Each imported file is renamed
+    to ``<name>.migrated`` so running the migration again is a no-op.
+    """
+    counts: Dict[str, Tuple[int, int]] = {}
+    imported: List[Path] = []
+    with contextlib.closing(connect(repo_root)) as conn, transaction(conn):
+        for table, name in LEGACY_FILES.items():
+            path = repo_root / ".ctrepo" / name
+            if not path.exists():
+                continue
+            entries = json.loads(path.read_text() or "[]")
+            cols = [r[1] for r in conn.execute(f"PRAGMA table_info({table})") if r[1] not in _INTERNAL]
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [[e.get(c) for c in cols] for e in entries],
+            )
+            added = conn.total_changes - before
+            counts[table] = (added, len(entries) - added)
+            imported.append(path)
+    for path in imported:
+        path.rename(path.with_name(path.name + ".migrated"))
+    return counts
@@ -6,8 +6,6 @@ Converts declarative clinical trial YAML protocols into executable Python test h
 for simulation, validation, and regulatory compliance checking.
 """
 
-import yaml
-import json
 import jsonschema
 from pathlib import Path
 from typing import Dict, Any, List, Optional
@@ -15,6 +13,9 @@ from dataclasses import dataclass
 import argparse
 import sys
 
+from bst.protocol_io import load_protocol
+from bst.validation import load_schema, validate
+
 @dataclass
 class TranspilerConfig:
     """Configuration for the YAML-to-Python transpiler."""
@@ -33,13 +34,12 @@ class ProtocolTranspiler:
         
     def _load_schema(self) -> Dict[str, Any]:
         """Load the JSON schema for validation."""
-        with open(self.config.schema_path, 'r') as f:
-            return json.load(f)
+        return load_schema(self.config.schema_path)
     
     def validate_protocol(self, protocol: Dict[str, Any]) -> bool:
         """Validate protocol against JSON schema."""
         try:
-            jsonschema.validate(protocol, self.schema)
+            validate(protocol, self.schema)
             return True
         except jsonschema.ValidationError as e:
             print(f"Protocol validation error: {e.message}", file=sys.stderr)
@@ -48,8 +48,7 @@ class ProtocolTranspiler:
     def transpile(self, yaml_path: Path) -> Optional[str]:
         """Transpile YAML protocol to Python test harness."""
         # Load YAML protocol
-        with open(yaml_path, 'r') as f:
-            protocol = yaml.safe_load(f)
+        protocol = load_protocol(yaml_path)
         
         # Validate protocol
         if not self.validate_protocol(protocol):
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+"""Synthetic control-twin generator for ``bst twin-simulate``.
+
+Twins are drawn from a simple parametric patient model shaped by the
+protocol: age and ECOG ranges come from the eligibility criteria, arm
+labels from ``arms[].allocation`` and dropout from
+``sample_size.dropout_rate``. Covariates and outcomes are generated with
+NumPy one block at a time and each block is written as a Parquet row group
+(or Arrow IPC record batch), so memory stays bounded by the block size no
+matter how many twins are requested.
+
+Output is reproducible: block ``i`` draws from ``default_rng([seed, i])``.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional "sim" extra
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional "sim" extra
+    pa = None
+    pq = None
+
+__all__ = [
+    "TwinSpec",
+    "available",
+    "spec_from_protocol",
+    "generate_blocks",
+    "write_twins",
+    "SEX_DISTRIBUTION",
+    "RACE_DISTRIBUTION",
+    "DEFAULT_BLOCK_ROWS",
+]
+
+DEFAULT_BLOCK_ROWS = 1 << 17
+
+# Reference population shares (US adult census, rounded); also the default
+# comparison population of the diversity badge.
+SEX_DISTRIBUTION: Dict[str, float] = {"F": 0.51, "M": 0.49}
+RACE_DISTRIBUTION: Dict[str, float] = {
+    "White": 0.59,
+    "Hispanic": 0.19,
+    "Black": 0.13,
+    "Asian": 0.06,
+    "Other": 0.03,
+}
+
+# Rejection-sampling passes before falling back to a uniform draw
+_MAX_REDRAWS = 100
+
+_AGE_RE = re.compile(r"age\D*?(\d+)\s*(?:-|–|to)\s*(\d+)", re.I)
+_AGE_MIN_RE = re.compile(r"age\s*(?:≥|>=|>)\s*(\d+)", re.I)
+_ECOG_RE = re.compile(r"ecog[^0-9]*(\d)\s*(?:-|–|to)\s*(\d)", re.I)
+
+
+@dataclass
+class TwinSpec:
+    """Parameters of the synthetic patient model."""
+
+    arms: List[Tuple[str, float]] = field(default_factory=lambda: [("control", 1.0)])
+    age_min: float = 18
+    age_max: float = 85
+    age_mean: float = 62
+    age_sd: float = 10
+    ecog_max: int = 2
+    dropout_rate: float = 0.1
+    # control-arm survival: median months, and administrative follow-up
+    median_survival: float = 12.0
+    follow_up: float = 24.0
+
+
+def available() -> bool:
+    """Whether the optional numpy/pyarrow dependencies for twins are installed."""
+    return np is not None and pa is not None
+
+
+def _criteria(protocol: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for section in (protocol.get("eligibility") or {}, protocol.get("population") or {}):
+        lines.extend(str(c) for c in section.get("inclusion") or [])
+    lines.extend(str(c) for c in protocol.get("inclusionCriteria") or [])
+    return lines
+
+
+def _check_ages(spec: TwinSpec) -> None:
+    if spec.age_min > spec.age_max:
+        raise ValueError(f"Empty age range: minimum age {spec.age_min:g} is above maximum age {spec.age_max:g}")
+
+
+def spec_from_protocol(protocol: Dict[str, Any]) -> TwinSpec:
+    """Build a ``TwinSpec`` from a parsed protocol, defaulting what is absent."""
+    spec = TwinSpec()
+    arms = [(str(a.get("id")), float(a.get("allocation", 1))) for a in protocol.get("arms") or [] if isinstance(a, dict)]
+    if arms:
+        total = sum(w for _, w in arms) or 1.0
+        spec.arms = [(a, w / total) for a, w in arms]
+    for line in _criteria(protocol):
+        m = _AGE_RE.search(line)
+        if m:
+            spec.age_min, spec.age_max = float(m.group(1)), float(m.group(2))
+            continue
+        m = _AGE_MIN_RE.search(line)
+        if m:
+            spec.age_min = float(m.group(1))
+            continue
+        m = _ECOG_RE.search(line)
+        if m:
+            spec.ecog_max = int(m.group(2))
+    age = (protocol.get("population") or {}).get("age") or {}
+    spec.age_min = float(age.get("min", spec.age_min))
+    spec.age_max = float(min(age.get("max", spec.age_max), 100))
+    _check_ages(spec)
+    spec.age_mean = min(max(spec.age_mean, spec.age_min), spec.age_max)
+    dropout = (protocol.get("sample_size") or {}).get("dropout_rate")
+    if dropout is not None:
+        spec.dropout_rate = float(dropout)
+    return spec
+
+
+def _truncated_normal(rng: np.random.Generator, n: int, mean: float, sd: float, lo: float, hi: float) -> np.ndarray:
+    if hi <= lo:
+        return np.full(n, lo, dtype=float)
+    out = rng.normal(mean, sd, n)
+    bad = (out < lo) | (out > hi)
+    # redraw only the rejected entries; a handful of passes usually suffices
+    for _ in range(_MAX_REDRAWS):
+        if not bad.any():
+            return out
+        out[bad] = rng.normal(mean, sd, int(bad.sum()))
+        bad = (out < lo) | (out > hi)
+    # a range far out in the tail: fill what is left uniformly
+    out[bad] = rng.uniform(lo, hi, int(bad.sum()))
+    return out
+
+
+def _categorical(rng: np.random.Generator, n: int, dist: Dict[str, float]) -> np.ndarray:
+    """Category codes drawn from ``dist`` (codes index ``list(dist)``)."""
+    cum = np.cumsum(list(dist.values()))
+    return np.searchsorted(cum / cum[-1], rng.random(n), side="right").astype(np.int8)
+
+
+def generate_blocks(spec: TwinSpec, n: int, seed: int = 0,
+                    block_rows: int = DEFAULT_BLOCK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield column dicts of at most ``block_rows`` twins until ``n`` are made."""
+    if np is None:
+        raise RuntimeError("numpy is required for twin generation (pip install 'bst[sim]')")
+    _check_ages(spec)
+    arm_dist = dict(spec.arms)
+    base_hazard = math.log(2) / spec.median_survival
+    for block, start in enumerate(range(0, n, block_rows)):
+        rows = min(block_rows, n - start)
+        rng = np.random.default_rng([seed, block])
+        age = _truncated_normal(rng, rows, spec.age_mean, spec.age_sd, spec.age_min, spec.age_max)
+        ecog = rng.integers(0, spec.ecog_max + 1, rows, dtype=np.int8)
+        biomarker = rng.lognormal(mean=1.0, sigma=0.5, size=rows)
+        # proportional hazards on age and performance status
+        hazard = base_hazard * np.exp(0.02 * (age - 60) + 0.35 * ecog)
+        event_time = rng.exponential(1.0 / hazard)
+        dropout = rng.random(rows) < spec.dropout_rate
+        censor_at = np.where(dropout, rng.uniform(0, spec.follow_up, rows), spec.follow_up)
+        logit = -0.8 - 0.5 * ecog + 0.3 * np.log(biomarker)
+        yield {
+            "twin_id": np.arange(start, start + rows, dtype=np.int64),
+            "arm": _categorical(rng, rows, arm_dist),
+            "age": np.floor(age).astype(np.int16),
+            "sex": _categorical(rng, rows, SEX_DISTRIBUTION),
+            "race": _categorical(rng, rows, RACE_DISTRIBUTION),
+            "ecog": ecog,
+            "biomarker": biomarker.astype(np.float32),
+            "time_months": np.minimum(event_time, censor_at).astype(np.float32),
+            "event": event_time <= censor_at,
+            "response": rng.random(rows) < 1 / (1 + np.exp(-logit)),
+            "dropout": dropout,
+        }
+
+
+def _to_batch(cols: Dict[str, np.ndarray], spec: TwinSpec) -> "pa.RecordBatch":
+    dictionaries = {
+        "arm": [a for a, _ in spec.arms],
+        "sex": list(SEX_DISTRIBUTION),
+        "race": list(RACE_DISTRIBUTION),
+    }
+    arrays = []
+    for name, values in cols.items():
+        if name in dictionaries:
+            arrays.append(pa.DictionaryArray.from_arrays(values, pa.array(dictionaries[name])))
+        else:
+            arrays.append(pa.array(values))
+    return pa.RecordBatch.from_arrays(arrays, names=list(cols))
+
+
+def write_twins(path: Path, spec: TwinSpec, n: int, seed: int = 0,
+                block_rows: int = DEFAULT_BLOCK_ROWS, fmt: str = "parquet") -> int:
+    """Generate ``n`` twins into ``path`` block by block; returns rows written."""
+    if pa is None or np is None:
+        raise RuntimeError("numpy and pyarrow are required for twin generation (pip install 'bst[sim]')")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    written = 0
+    writer = None
+    try:
+        for cols in generate_blocks(spec, n, seed, block_rows):
+            batch = _to_batch(cols, spec)
+            if writer is None:
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(str(tmp), batch.schema, compression="zstd")
+                elif fmt == "arrow":
+                    writer = pa.ipc.new_file(str(tmp), batch.schema)
+                else:
+                    raise ValueError(f"Unknown twin output format {fmt!r}")
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=block_rows)
+            else:
+                writer.write_batch(batch)
+            written += batch.num_rows
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+    if writer is None:
+        raise ValueError("Cannot generate an empty twin cohort")
+    tmp.replace(path)
+    return written
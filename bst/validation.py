@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+"""Compiled, cached JSON Schema validation for protocols.
+
+``jsonschema.validate`` checks the schema against its metaschema and
+builds a fresh validator on every call, which costs far more than
+validating a protocol. Here each schema is compiled once per process and
+cached by the SHA-256 of its canonical JSON, so every caller holding the
+same schema - whether loaded by ``add-protocol``, ``ci-check``, the
+transpiler or the ctrepo server - shares one validator.
+
+When the optional ``fastjsonschema`` package is installed, a code-generated
+validator is compiled alongside and answers the common "valid" case;
+``jsonschema`` is only consulted to describe errors.
+
+``validate_files`` validates many protocol files in one go, reporting every
+error of every file, and spreads large batches over a process pool.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jsonschema
+import yaml
+from jsonschema import validators
+from jsonschema.exceptions import best_match
+
+from bst.protocol_io import load_protocol, loads
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover - optional speed-up
+    fastjsonschema = None
+
+__all__ = [
+    "CompiledSchema",
+    "schema_digest",
+    "compile_schema",
+    "load_schema",
+    "format_error",
+    "validate",
+    "errors",
+    "file_errors",
+    "validate_files",
+    "benchmark",
+]
+
+# Below this many files, batch validation stays in-process
+POOL_THRESHOLD = 16
+
+_COMPILED: Dict[str, "CompiledSchema"] = {}
+_LOADED: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def schema_digest(schema: Dict[str, Any]) -> str:
+    """SHA-256 of a schema's canonical JSON."""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def format_error(error: jsonschema.ValidationError) -> str:
+    """``path/to/field: message`` for one validation error."""
+    return f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+
+
+@dataclass
+class CompiledSchema:
+    digest: str
+    validator: Any
+    # code-generated validator (fastjsonschema), when available
+    fast: Optional[Callable[[Any], Any]] = None
+
+    def _fast_ok(self, instance: Any) -> bool:
+        if self.fast is None:
+            return False
+        try:
+            self.fast(instance)
+        except fastjsonschema.JsonSchemaException:
+            return False
+        return True
+
+    def errors(self, instance: Any) -> List[str]:
+        """Every validation error, ordered by location."""
+        if self._fast_ok(instance):
+            return []
+        found = sorted(self.validator.iter_errors(instance), key=lambda e: [str(p) for p in e.absolute_path])
+        return [format_error(e) for e in found]
+
+    def validate(self, instance: Any) -> None:
+        """Raise the most relevant ``jsonschema.ValidationError``, like ``jsonschema.validate``."""
+        if self._fast_ok(instance):
+            return
+        error = best_match(self.validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """The process-wide compiled validator for ``schema``.
+
+    The schema is checked against its metaschema once, on first use;
+    an invalid schema raises ``jsonschema.SchemaError``.
+    """
+    digest = schema_digest(schema)
+    compiled = _COMPILED.get(digest)
+    if compiled is None:
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        fast = None
+        if fastjsonschema is not None:
+            try:
+                fast = fastjsonschema.compile(schema)
+            except Exception:  # pragma: no cover - unsupported keyword/draft: jsonschema alone
+                fast = None
+        compiled = _COMPILED[digest] = CompiledSchema(digest, cls(schema), fast)
+    return compiled
+
+
+def load_schema(path: Path) -> Dict[str, Any]:
+    """A JSON or YAML schema file, re-read only when it changes on disk."""
+    key = str(Path(path).resolve())
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _LOADED.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    text = Path(key).read_text()
+    schema = loads(text) if key.endswith((".yaml", ".yml")) else json.loads(text)
+    _LOADED[key] = (stamp, schema)
+    return schema
+
+
+def validate(instance: Any, schema: Dict[str, Any]) -> None:
+    """Drop-in for ``jsonschema.validate`` using the cached validator."""
+    compile_schema(schema).validate(instance)
+
+
+def errors(instance: Any, schema: Dict[str, Any]) -> List[str]:
+    """Every validation error of ``instance`` (empty when valid)."""
+    return compile_schema(schema).errors(instance)
+
+
+def file_errors(path: Path, schema: Dict[str, Any]) -> List[str]:
+    """Every validation error of one protocol file, including YAML errors."""
+    try:
+        data = load_protocol(path)
+    except (OSError, yaml.YAMLError) as exc:
+        return [f"cannot read protocol: {exc}"]
+    return errors(data, schema)
+
+
+def _file_errors_batch(paths: List[Path], schema: Dict[str, Any]) -> List[List[str]]:
+    return [file_errors(p, schema) for p in paths]
+
+
+def validate_files(paths: List[Path], schema: Dict[str, Any], workers: Optional[int] = None) -> List[List[str]]:
+    """Errors for each of ``paths``, in order; large batches use a process pool."""
+    paths = [Path(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if len(paths) < POOL_THRESHOLD or workers < 2:
+        return _file_errors_batch(paths, schema)
+    # a few chunks per worker; each worker process compiles the schema once
+    size = -(-len(paths) // (workers * 4))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        parts = list(pool.map(_file_errors_batch, chunks, [schema] * len(chunks)))
+    return [errs for part in parts for errs in part]
+
+
+def benchmark(paths: List[Path], schema: Dict[str, Any], rounds: int = 20) -> Dict[str, float]:
+    """Microseconds per protocol: ``jsonschema.validate`` vs the cached validator.
+
+    Protocols are parsed once up front so only validation is timed.
+    """
+    docs = [load_protocol(p) for p in paths]
+    if not docs:
+        raise ValueError("No protocols to benchmark")
+
+    def per_protocol(check: Callable[[Any], Any]) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for doc in docs:
+                try:
+                    check(doc)
+                except jsonschema.ValidationError:
+                    pass
+        return (time.perf_counter() - start) / (rounds * len(docs)) * 1e6
+
+    compiled = compile_schema(schema)
+    return {
+        "protocols": float(len(docs)),
+        "jsonschema_us": per_protocol(lambda doc: jsonschema.validate(doc, schema)),
+        "cached_us": per_protocol(lambda doc: validate(doc, schema)),
+        "cached_errors_us": per_protocol(compiled.errors),
+    }
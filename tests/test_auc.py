@@ -0,0 +1,64 @@
+"""Test the twin AUC evaluator."""
+
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+
+from bst.auc import bootstrap_auc, roc_auc, score_bins
+
+
+def test_roc_auc_matches_pairwise_with_ties():
+    """Sort-based AUC equals the pairwise Mann-Whitney count, ties halved."""
+    rng = np.random.default_rng(0)
+    scores = np.round(rng.normal(size=2000), 1)
+    labels = rng.random(2000) < 1 / (1 + np.exp(-scores))
+    pos, neg = scores[labels], scores[~labels]
+    pairwise = ((pos[:, None] > neg).sum() + 0.5 * (pos[:, None] == neg).sum()) / (len(pos) * len(neg))
+    assert roc_auc(scores, labels) == pytest.approx(pairwise)
+    assert roc_auc([0.1, 0.9], [False, True]) == 1.0
+
+    # few distinct scores: bins are exact and the bootstrap centres on the AUC
+    pos_counts, neg_counts, binned = score_bins(np.sort(pos), np.sort(neg))
+    assert not binned and pos_counts.sum() == len(pos)
+    reps = bootstrap_auc(pos_counts, neg_counts, reps=500, seed=1, workers=1)
+    assert abs(np.median(reps) - pairwise) < 0.01
+
+
+def test_evaluate_files_reads_batches():
+    """Control labels and twin scores are paired row by row across batches."""
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    from bst.auc import evaluate_files
+
+    rng = np.random.default_rng(2)
+    score = rng.random(5000)
+    response = rng.random(5000) < score
+    with tempfile.TemporaryDirectory() as tmpdir:
+        control, twins = pathlib.Path(tmpdir, 'control.parquet'), pathlib.Path(tmpdir, 'twins.csv')
+        pq.write_table(pa.table({'response': response}), control, row_group_size=700)
+        twins.write_text('prediction\n' + '\n'.join(map(str, score.tolist())) + '\n')
+        result = evaluate_files(control, twins, bootstrap=200, workers=1, batch_rows=1000)
+    assert result.auc == pytest.approx(roc_auc(score, response))
+    assert result.ci_low < result.auc < result.ci_high
+    assert result.n_pos + result.n_neg == 5000
+
+
+def test_evaluate_files_drops_missing_labels():
+    """Null labels are left out, not counted as negatives, and reported."""
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    from bst.auc import evaluate_files
+
+    response = [True, None, False, True, None, False]
+    score = [0.9, 0.1, 0.2, float('nan'), 0.95, 0.8]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, column in [('flag', response), ('number', [None if r is None else float(r) for r in response]),
+                             ('text', [None if r is None else ('yes' if r else 'no') for r in response])]:
+            path = pathlib.Path(tmpdir, f'{name}.parquet')
+            pq.write_table(pa.table({'response': column, 'score': score}), path)
+            result = evaluate_files(path, bootstrap=0)
+            assert (result.n_pos, result.n_neg) == (1, 2), name
+            assert (result.missing_labels, result.missing_scores) == (2, 1), name
+            assert result.auc == 1.0
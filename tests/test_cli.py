@@ -55,4 +55,130 @@ def test_twin_simulate():
             result = runner.invoke(cli, ['twin-simulate', '--n', '50'])
             
             assert result.exit_code == 0
-            assert pathlib.Path('data/synthetic-controls.parquet').exists()
\ No newline at end of file
+            assert pathlib.Path('data/synthetic-controls.parquet').exists()
+
+def test_ci_check_changed_since_memoises():
+    """Only protocols changed since a revision are checked, and results are memoised."""
+    import subprocess
+
+    runner = CliRunner()
+    git = ['git', '-c', 'user.name=ci', '-c', 'user.email=ci@example.com']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            pathlib.Path('protocol/a.yaml').write_text('id: a\n')
+            pathlib.Path('protocol/b.yaml').write_text('id: b\n')
+            subprocess.run([*git, 'add', '-A'], check=True)
+            subprocess.run([*git, 'commit', '-qm', 'base'], check=True)
+
+            pathlib.Path('protocol/b.yaml').write_text('id: 2\n')
+            result = runner.invoke(cli, ['ci-check', '--changed-since', 'HEAD'])
+            assert result.exit_code == 1
+            assert 'protocol/b.yaml' in result.output
+            assert 'protocol/a.yaml' not in result.output
+
+            result = runner.invoke(cli, ['ci-check', '--changed-since', 'HEAD'])
+            assert '(cached)' in result.output
+
+            pathlib.Path('protocol/b.yaml').write_text('id: b2\n')
+            result = runner.invoke(cli, ['ci-check', '--changed-since', 'HEAD'])
+            assert result.exit_code == 0
+            assert '(cached)' not in result.output
+
+
+def test_ci_check_gates_only_when_strict():
+    """A failing protocol is reported by ci-check; only --strict turns it into an exit code."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            pathlib.Path('protocol/bad.yaml').write_text('id: 2\n')
+
+            result = runner.invoke(cli, ['ci-check', 'protocol/bad.yaml'])
+            assert result.exit_code == 0
+            assert 'Schema validation failed' in result.output
+
+            result = runner.invoke(cli, ['ci-check', '--strict', 'protocol/bad.yaml'])
+            assert result.exit_code == 1
+
+            result = runner.invoke(cli, ['ci', 'lint-protocol', '--strict', 'protocol/bad.yaml'])
+            assert result.exit_code == 1
+
+
+
+def test_git_changes_commit_in_process(monkeypatch):
+    """Each command lands as one commit; a transaction batches records; --no-commit only stages."""
+    import git
+
+    from bst import gitrepo
+
+    for var in ('GIT_AUTHOR_NAME', 'GIT_COMMITTER_NAME'):
+        monkeypatch.setenv(var, 'ci')
+    for var in ('GIT_AUTHOR_EMAIL', 'GIT_COMMITTER_EMAIL'):
+        monkeypatch.setenv(var, 'ci@example.com')
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            repo = git.Repo('.')
+            assert repo.head.commit.message == 'scaffold trial for NSCLC'
+
+            root = pathlib.Path.cwd()
+            with gitrepo.transaction():
+                for name in ('a', 'b'):
+                    pathlib.Path(f'protocol/{name}.yaml').write_text(f'id: {name}\n')
+                    gitrepo.record(root, [pathlib.Path(f'protocol/{name}.yaml')], f'add protocol {name}')
+            assert len(list(repo.iter_commits())) == 2
+            assert set(repo.head.commit.stats.files) == {'protocol/a.yaml', 'protocol/b.yaml'}
+
+            pathlib.Path('c.yaml').write_text('id: c\n')
+            result = runner.invoke(cli, ['--no-commit', 'add-protocol', 'c.yaml'])
+            assert result.exit_code == 0
+            assert len(list(repo.iter_commits())) == 2
+            assert 'protocol/c.yaml' in [d.a_path for d in repo.index.diff('HEAD')]
+
+            pathlib.Path('.gitignore').write_text('*.log\nscratch/\n')
+            pathlib.Path('protocol/run.log').write_text('noise\n')
+            pathlib.Path('protocol/scratch').mkdir()
+            pathlib.Path('protocol/scratch/tmp.yaml').write_text('id: tmp\n')
+            gitrepo.record(root, [pathlib.Path('.gitignore'), pathlib.Path('protocol')], 'ignore logs')
+            assert set(repo.head.commit.stats.files) == {'.gitignore', 'protocol/c.yaml'}
+
+
+# Cumulative import time allowed for `bst --help`, in microseconds
+HELP_IMPORT_BUDGET_US = 150_000
+
+
+def test_help_import_budget():
+    """`bst --help` imports no command dependencies and stays within budget."""
+    import subprocess
+    import sys
+
+    root = pathlib.Path(__file__).resolve().parents[1]
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'bst', '--help'],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    assert 'ci-check' in proc.stdout
+    imported = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(cumulative)
+    for heavy in ('git', 'jsonschema', 'rich', 'yaml', 'numpy', 'pyarrow', 'prometheus_client', 'bst.commands'):
+        assert heavy not in imported, f'bst --help imported {heavy}'
+    assert imported['bst'] < HELP_IMPORT_BUDGET_US, f"bst imports took {imported['bst']} us"
+
+
+def test_lazy_commands_match_registered_help():
+    """Each lazily listed command resolves, and its help matches COMMANDS."""
+    import click
+    from bst.cli import COMMANDS
+
+    ctx = click.Context(cli)
+    for name, (_, short_help) in COMMANDS.items():
+        assert cli.get_command(ctx, name).get_short_help_str(limit=500) == short_help
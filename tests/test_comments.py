@@ -0,0 +1,81 @@
+"""Test the append-only comment store."""
+
+import json
+import pathlib
+import tempfile
+
+from click.testing import CliRunner
+
+from bst import comments as _comments
+from bst.cli import cli
+from bst.comments import CommentStore
+
+
+def test_comment_add_list_resolve():
+    """Comments round-trip through the CLI and resolution is an appended event."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            runner.invoke(cli, ['comment', 'add', '--file', 'protocol/a.yaml', '--line', '3', '--text', 'Check alpha'])
+            runner.invoke(cli, ['comment', 'add', '--file', 'protocol/b.yaml', '--line', '1', '--text', 'Typo'])
+
+            store = CommentStore(pathlib.Path('.').resolve())
+            first = store.list('protocol/a.yaml')
+            assert [c['text'] for c in first] == ['Check alpha']
+
+            result = runner.invoke(cli, ['comment', 'resolve', first[0]['id']])
+            assert 'resolved' in result.output.lower()
+            log = pathlib.Path('.ctrepo/comments.jsonl').read_text().splitlines()
+            assert [json.loads(l)['op'] for l in log] == ['add', 'add', 'resolve']
+
+            result = runner.invoke(cli, ['comment', 'list', '--file', 'protocol/a.yaml'])
+            assert '[resolved]' in result.output
+            assert 'Typo' not in result.output
+
+
+def test_comment_compaction_and_legacy_import(monkeypatch):
+    """Legacy comments.json is imported and compaction folds resolve events."""
+    monkeypatch.setattr(_comments, 'COMPACT_THRESHOLD', 3)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        (root / '.ctrepo').mkdir()
+        legacy = [{"id": "old", "file": "x.yaml", "line": 1, "text": "legacy", "role": "IRB",
+                   "user": "u", "created": "2024-01-01T00:00:00Z", "resolved": True}]
+        (root / '.ctrepo' / 'comments.json').write_text(json.dumps(legacy))
+
+        store = CommentStore(root)
+        assert store.get('old')['resolved'] is True
+        ids = [store.add('y.yaml', i, f'c{i}', 'reviewer')['id'] for i in range(4)]
+        store.resolve(ids[0], user='stats')
+        resolved_at = store.get(ids[0])['resolved_at']
+        for cid in ids[1:3]:
+            store.resolve(cid)
+
+        # third resolve triggers compaction: only add records remain
+        ops = [json.loads(l)['op'] for l in (root / '.ctrepo' / 'comments.jsonl').read_text().splitlines()]
+        assert ops == ['add'] * 5
+        listed = store.list('y.yaml')
+        assert [c['resolved'] for c in listed] == [True, True, True, False]
+        # who resolved a comment, and when, survives compaction
+        assert (listed[0]['resolved_by'], listed[0]['resolved_at']) == ('stats', resolved_at)
+        assert 'resolved_by' not in listed[3]
+        assert store.resolve('missing') is False
+
+
+def test_comment_index_catches_up_incrementally():
+    """Only events appended since the last look-up are read into the store index."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        store = CommentStore(root)
+        first = store.add('a.yaml', 1, 'one', 'reviewer')
+        assert store.get(first['id'])['text'] == 'one'
+
+        log = root / '.ctrepo' / 'comments.jsonl'
+        size = log.stat().st_size
+        # a later reader must not re-read what is already indexed
+        with open(log, 'r+b') as fh:
+            fh.write(b'X' * (size - 1))
+        store.add('b.yaml', 2, 'two', 'reviewer')
+        assert [c['text'] for c in store.list('b.yaml')] == ['two']
@@ -0,0 +1,50 @@
+"""Test diversity badge scoring."""
+
+import pathlib
+import tempfile
+
+import pytest
+
+from bst.diversity import badge_for, meets, reference_from_protocol, score_counts, score_dataset
+
+
+def test_representation_index_and_tiers():
+    """Index is the overlap with the reference; PPR flags missing groups."""
+    perfect = score_counts({'F': 51, 'M': 49}, {'F': 0.51, 'M': 0.49}, 'sex')
+    assert perfect.index == pytest.approx(1.0)
+
+    skewed = score_counts({'female': 90, 'Male': 10, 'unknown': 5}, {'F': 0.5, 'M': 0.5}, 'sex')
+    assert skewed.index == pytest.approx(0.6)
+    assert skewed.ppr == {'F': pytest.approx(1.8), 'M': pytest.approx(0.2)}
+    assert skewed.unmapped == 5
+
+    assert badge_for(0.95, 0.9) == 'gold'
+    assert badge_for(0.95, 0.3) == 'bronze'
+    assert badge_for(0.5, 1.0) is None
+    assert meets('gold', 'silver') and not meets('bronze', 'Silver') and not meets(None, 'bronze')
+    with pytest.raises(ValueError, match='Unknown diversity badge'):
+        meets('gold', 'platinum')
+
+
+def test_reference_weights_must_have_a_positive_total():
+    custom = {'ci': {'diversity_reference': {'sex': {'F': 0, 'M': 0}}}}
+    with pytest.raises(ValueError, match='diversity_reference.sex'):
+        reference_from_protocol(custom)
+    custom['ci']['diversity_reference']['sex'] = {'F': 2, 'M': 1}
+    assert reference_from_protocol(custom)['sex'] == {'F': 2.0, 'M': 1.0}
+
+
+def test_score_dataset_streams_csv_batches():
+    """CSV input is read in batches and counts add up across them."""
+    pytest.importorskip('pyarrow')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir, 'enrolment.csv')
+        rows = ['sex,race,age'] + ['F,White,30', 'M,Black,50', 'F,Asian,70', 'M,Pacific Islander,40'] * 500
+        path.write_text('\n'.join(rows) + '\n')
+        report = score_dataset(path, batch_rows=100)
+    assert report.rows == 2000
+    dims = {d.dimension: d for d in report.dimensions}
+    assert dims['race'].counts == {'White': 500, 'Hispanic': 0, 'Black': 500, 'Asian': 500, 'Other': 500}
+    assert dims['age'].counts == {'18-44': 1000, '45-64': 500, '65+': 500}
+    # no Hispanic participants: the worst PPR is 0, which caps the badge at bronze
+    assert report.min_ppr == 0 and report.badge == 'bronze'
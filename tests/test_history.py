@@ -0,0 +1,63 @@
+"""Test the protocol history index."""
+
+import pathlib
+import subprocess
+import tempfile
+
+import yaml
+
+from bst import history
+
+GIT = ['git', '-c', 'user.name=ci', '-c', 'user.email=ci@example.com']
+
+
+def _commit(root, doc, message):
+    (root / 'protocol' / 'p.yaml').write_text(yaml.safe_dump(doc, sort_keys=False))
+    subprocess.run([*GIT, 'add', '-A'], cwd=root, check=True)
+    subprocess.run([*GIT, 'commit', '-qm', message], cwd=root, check=True)
+    return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def test_blame_value_at_and_churn_from_incremental_index():
+    """Queries read the index; re-indexing only visits new commits."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+        (root / '.ctrepo').mkdir()
+        (root / 'protocol').mkdir()
+        protocol = root / 'protocol' / 'p.yaml'
+        doc = {
+            'id': 'P-1',
+            'arms': [{'id': 'CONTROL', 'allocation': 0.5}, {'id': 'EXP', 'allocation': 0.5}],
+            'inclusion': ['Age >= 18', 'ECOG 0-1'],
+        }
+        first = _commit(root, doc, 'initial protocol')
+        doc['inclusion'].insert(0, 'Signed consent')
+        second = _commit(root, doc, 'add consent criterion')
+        assert history.index(root) == {'protocol/p.yaml': 2}
+
+        doc['arms'][1]['allocation'] = 0.6
+        doc['inclusion'][2] = 'ECOG 0-2'
+        third = _commit(root, doc, 'widen ECOG')
+        assert history.index(root) == {'protocol/p.yaml': 1}
+        assert history.index(root) == {'protocol/p.yaml': 0}
+
+        blamed = {(s.path, s.value): s.sha for s in history.blame(root, protocol, 'inclusion')}
+        assert blamed == {
+            ('inclusion[]', 'Age >= 18'): first,
+            ('inclusion[]', 'Signed consent'): second,
+            ('inclusion[]', 'ECOG 0-2'): third,
+        }
+        assert history.value_at(root, protocol, 'arms[EXP]', first) == {
+            'arms[EXP].allocation': [0.5],
+            'arms[EXP].id': ['EXP'],
+        }
+        assert history.value_at(root, protocol, 'arms[EXP].allocation') == {'arms[EXP].allocation': [0.6]}
+
+        events = [(e.sha, e.op, e.value) for e in history.log(root, protocol, 'arms[EXP]')]
+        assert events == [(first, '+', 0.5), (first, '+', 'EXP'), (third, '-', 0.5), (third, '+', 0.6)]
+        assert history.churn(root, protocol) == [
+            ('inclusion[]', 2, third),
+            ('arms[EXP].allocation', 1, third),
+        ]
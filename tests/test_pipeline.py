@@ -0,0 +1,62 @@
+"""Test the cached CI pipeline."""
+
+import pathlib
+import sys
+import tempfile
+
+import pytest
+import yaml
+
+from bst.pipeline import levels, load_stages, run_pipeline
+
+
+def _stages(spec):
+    return load_stages({'pipeline': {'stages': spec}})
+
+
+def test_levels_order_and_cycles():
+    """Stages come after their needs; cycles and unknown needs are rejected."""
+    stages = _stages({
+        'a': {'run': 'true'},
+        'b': {'run': 'true', 'needs': ['a']},
+        'c': {'run': 'true', 'needs': ['a']},
+        'd': {'run': 'true', 'needs': ['b', 'c']},
+    })
+    assert levels(stages) == [['a'], ['b', 'c'], ['d']]
+    with pytest.raises(ValueError, match='cycle'):
+        _stages({'a': {'run': 'true', 'needs': ['b']}, 'b': {'run': 'true', 'needs': ['a']}})
+    with pytest.raises(ValueError, match='unknown'):
+        _stages({'a': {'run': 'true', 'needs': ['z']}})
+
+
+def test_unchanged_stages_come_from_cache():
+    """Only stages whose inputs changed run again; outputs are restored."""
+    py = sys.executable
+    copy = "import sys, pathlib; pathlib.Path(sys.argv[2]).write_text(pathlib.Path(sys.argv[1]).read_text() + '!')"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        (root / '.ctrepo').mkdir()
+        (root / 'a.txt').write_text('a')
+        (root / 'c.txt').write_text('c')
+        config = {'pipeline': {'stages': {
+            'a': {'run': f'{py} -c "{copy}" a.txt a.out', 'inputs': ['a.txt'], 'outputs': ['a.out']},
+            'b': {'run': f'{py} -c "{copy}" a.out b.out', 'needs': ['a'], 'inputs': ['a.out'], 'outputs': ['b.out']},
+            'c': {'run': f'{py} -c "{copy}" c.txt c.out', 'inputs': ['c.txt'], 'outputs': ['c.out']},
+        }}}
+        (root / 'bastion.yaml').write_text(yaml.safe_dump(config))
+        stages = load_stages(config)
+
+        first = {r.name: r.status for r in run_pipeline(root, stages, jobs=2)}
+        assert first == {'a': 'passed', 'b': 'passed', 'c': 'passed'}
+        assert (root / 'b.out').read_text() == 'a!!'
+
+        (root / 'c.txt').write_text('changed')
+        (root / 'b.out').unlink()
+        second = {r.name: r.status for r in run_pipeline(root, stages, jobs=2)}
+        assert second == {'a': 'cached', 'b': 'cached', 'c': 'passed'}
+        assert (root / 'b.out').read_text() == 'a!!'
+        assert (root / 'c.out').read_text() == 'changed!'
+
+        config['pipeline']['stages']['a']['run'] = f'{py} -c "import sys; sys.exit(3)"'
+        third = {r.name: r.status for r in run_pipeline(root, load_stages(config), ['b'])}
+        assert third == {'a': 'failed', 'b': 'skipped'}
@@ -0,0 +1,91 @@
+"""Test the structure-aware protocol diff."""
+
+import copy
+import random
+
+from bst.protocol_diff import apply_patch, diff, highest_severity, to_patch
+
+LEFT = {
+    'id': 'P-1',
+    'title': 'Demo',
+    'arms': [{'id': 'CONTROL', 'allocation': 0.5}, {'id': 'EXPERIMENTAL', 'allocation': 0.5}],
+    'endpoints': {'secondary': [{'name': 'PFS', 'timepoint': 'Week 8'}, {'name': 'QoL', 'timepoint': 'Week 8'}]},
+    'eligibility': {'inclusion': [f'criterion {i}' for i in range(1000)]},
+}
+
+
+def test_list_items_matched_by_key_and_patch_round_trips():
+    """Reordered keyed items are moved, not rewritten, and the patch reproduces the right side."""
+    right = copy.deepcopy(LEFT)
+    right['arms'].reverse()
+    right['arms'][0]['allocation'] = 0.6
+    right['endpoints']['secondary'][1]['timepoint'] = 'Week 12'
+    right['title'] = 'Demo trial'
+
+    changes = diff(LEFT, right)
+    ops = {(c.op, c.path) for c in changes}
+    assert ('replace', '/arms/1/allocation') in ops
+    assert ('move', '/arms/0') in ops
+    assert ('replace', '/endpoints/secondary/1/timepoint') in ops
+    assert {c.path: c.severity for c in changes}['/title'] == 'administrative'
+    assert highest_severity(changes) == 'substantial'
+    assert apply_patch(copy.deepcopy(LEFT), to_patch(changes)) == right
+    assert diff(LEFT, copy.deepcopy(LEFT)) == []
+
+
+def test_long_criteria_lists_diff_by_item():
+    """Edits in a thousand-item list are reported item by item."""
+    right = copy.deepcopy(LEFT)
+    inclusion = right['eligibility']['inclusion']
+    inclusion[500] = 'criterion 500 (amended)'
+    del inclusion[10]
+    inclusion.insert(900, 'new criterion')
+
+    changes = diff(LEFT, right)
+    assert [(c.op, c.path) for c in changes] == [
+        ('remove', '/eligibility/inclusion/10'),
+        ('replace', '/eligibility/inclusion/499'),
+        ('add', '/eligibility/inclusion/900'),
+    ]
+    assert all(c.severity == 'substantial' for c in changes)
+    assert apply_patch(copy.deepcopy(LEFT), to_patch(changes)) == right
+
+
+def test_moving_one_item_is_one_move():
+    """A criterion moved from the front to the back is a single move, however long the list."""
+    right = copy.deepcopy(LEFT)
+    inclusion = right['eligibility']['inclusion']
+    inclusion.append(inclusion.pop(0))
+
+    changes = diff(LEFT, right)
+    assert [(c.op, c.path, c.from_) for c in changes] == [
+        ('move', '/eligibility/inclusion/999', '/eligibility/inclusion/0'),
+    ]
+    assert apply_patch(copy.deepcopy(LEFT), to_patch(changes)) == right
+
+
+def test_shuffled_lists_round_trip():
+    """Reordering mixed with inserts and removals still patches back to the right side."""
+    rng = random.Random(7)
+    for _ in range(50):
+        left = [f'c{i}' for i in range(rng.randint(0, 40))]
+        right = [c for c in left if rng.random() > 0.2]
+        rng.shuffle(right)
+        for n in range(rng.randint(0, 5)):
+            right.insert(rng.randint(0, len(right)), f'new {n}')
+        patch = to_patch(diff({'l': left}, {'l': right}))
+        assert apply_patch({'l': list(left)}, patch) == {'l': right}
+
+
+def test_type_changes_inside_lists_are_reported():
+    """[1.0] -> [True] is a change even though the lists compare equal in Python."""
+    left = {'ci': {'weights': [1.0, 2], 'nested': [{'a': [1]}]}}
+    right = {'ci': {'weights': [True, 2], 'nested': [{'a': [1.0]}]}}
+
+    changes = diff(left, right)
+    assert [(c.op, c.path, c.value) for c in changes] == [
+        ('replace', '/ci/weights/0', True),
+        ('replace', '/ci/nested/0/a/0', 1.0),
+    ]
+    patched = apply_patch(copy.deepcopy(left), to_patch(changes))
+    assert type(patched['ci']['weights'][0]) is bool
@@ -0,0 +1,42 @@
+"""Test the cached protocol loader."""
+
+import hashlib
+import pickle
+import pathlib
+import tempfile
+
+from bst import protocol_io
+
+
+def test_load_protocol_caches_copies_on_disk():
+    """Documents are parsed once, cached under .ctrepo and handed out as copies."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        (root / '.ctrepo').mkdir()
+        path = root / 'trial.yaml'
+        path.write_text('id: t1\narms: [a, b]\nstart: 2024-01-02\n')
+
+        doc = protocol_io.load_protocol(path)
+        assert doc['arms'] == ['a', 'b'] and str(doc['start']) == '2024-01-02'
+        doc['arms'].append('c')
+        assert protocol_io.load_protocol(path)['arms'] == ['a', 'b']
+
+        blobs = list((root / '.ctrepo' / 'cache' / 'yaml').iterdir())
+        assert len(blobs) == 1
+        assert (root / '.ctrepo' / 'cache' / '.gitignore').exists()
+
+        # a fresh process would read the pickle instead of parsing
+        protocol_io._MEMO.clear()
+        blobs[0].write_bytes(pickle.dumps({'id': 'from-cache'}))
+        cached = protocol_io.load_protocol(path)
+        assert cached['id'] == 'from-cache'
+        cached['id'] = 'mutated'
+        assert protocol_io.load_protocol(path)['id'] == 'from-cache'
+
+        # edits are picked up; pickles naming other classes are ignored
+        path.write_text('id: t2\n')
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        blob = blobs[0].with_name(blobs[0].name.replace(blobs[0].name.split('.')[0], digest))
+        blob.write_bytes(pickle.dumps(pathlib.Path('x')))
+        protocol_io._MEMO.clear()
+        assert protocol_io.load_protocol(path) == {'id': 't2'}
@@ -0,0 +1,167 @@
+"""Test the SQLite record store."""
+
+import contextlib
+import json
+import pathlib
+import tempfile
+import threading
+
+from click.testing import CliRunner
+
+from bst import store
+from bst.cli import cli
+
+
+def test_concurrent_inserts_are_not_lost():
+    """Parallel writers each land their record."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+
+        def sign(i):
+            store.insert(root, 'signatures', {'file': f'f{i}', 'digest': f'd{i}', 'user': 'ci', 'time': i})
+
+        threads = [threading.Thread(target=sign, args=(i,)) for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(store.rows(root, 'signatures')) == 16
+        assert store.rows(root, 'signatures', {'digest': 'd3'})[0]['file'] == 'f3'
+
+
+def test_store_migrate_imports_legacy_json():
+    """`bst store migrate` imports and retires the JSON registries."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            ledger = [{'artifact': 'a.csv', 'sha256': 'ab' * 32, 'timestamp': 1}]
+            models = [{'id': 'm1', 'weights': 'w.pt', 'card': None, 'timestamp': 2}]
+            duplicate = {'id': 'm1', 'weights': 'other.pt', 'card': None, 'timestamp': 3}
+            pathlib.Path('.ctrepo/onchain_ledger.json').write_text(json.dumps(ledger))
+            pathlib.Path('.ctrepo/model_registry.json').write_text(json.dumps(models + [duplicate]))
+
+            result = runner.invoke(cli, ['store', 'migrate'])
+            assert result.exit_code == 0
+            assert 'models: 1 records' in result.output
+            assert '1 duplicate or invalid records skipped' in result.output
+            assert not pathlib.Path('.ctrepo/onchain_ledger.json').exists()
+
+            root = pathlib.Path('.').resolve()
+            assert store.rows(root, 'ledger') == ledger
+            assert store.rows(root, 'models') == models
+            result = runner.invoke(cli, ['store', 'migrate'])
+            assert 'nothing to migrate' in result.output.lower()
+
+
+def test_hash_file_streams_and_caches():
+    """Streaming digests match hashlib and are served from the stat cache."""
+    import hashlib
+    import os
+
+    from bst import hashing
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        artefact = root / 'weights.bin'
+        data = os.urandom(3 * hashing.BUFFER_BYTES + 17)
+        artefact.write_bytes(data)
+
+        assert hashing.hash_file(artefact, 'sha256') == hashlib.sha256(data).hexdigest()
+        assert hashing.cached_hash(artefact, root, 'sha256') == hashlib.sha256(data).hexdigest()
+        tree = hashing.hash_file(artefact, 'blake2b-tree')
+        assert len(tree) == 64 and tree != hashing.hash_file(root / 'weights.bin', 'sha256')
+
+        with contextlib.closing(store.connect(root)) as conn:
+            cached = conn.execute('SELECT digest FROM hash_cache').fetchall()
+        assert [r['digest'] for r in cached] == [hashlib.sha256(data).hexdigest()]
+
+        artefact.write_bytes(b'changed')
+        assert hashing.cached_hash(artefact, root, 'sha256') == hashlib.sha256(b'changed').hexdigest()
+
+
+def test_blake2b_tree_matches_a_direct_computation():
+    """Multi-leaf tree digests equal BLAKE2b tree mode computed over the bytes in memory."""
+    import hashlib
+    import os
+
+    from bst import hashing
+
+    leaf_size = hashing.TREE_LEAF_BYTES
+    params = dict(digest_size=32, fanout=0, depth=2, leaf_size=leaf_size, inner_size=32)
+
+    def direct(data):
+        chunks = [data[i:i + leaf_size] for i in range(0, len(data), leaf_size)] or [b'']
+        root = hashlib.blake2b(node_offset=0, node_depth=1, last_node=True, **params)
+        for i, chunk in enumerate(chunks):
+            root.update(hashlib.blake2b(chunk, node_offset=i, node_depth=0,
+                                        last_node=i == len(chunks) - 1, **params).digest())
+        return root.hexdigest()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir, 'weights.bin')
+        # empty, one partial leaf, exactly two leaves, two leaves and a partial third
+        for size in (0, 17, 2 * leaf_size, 2 * leaf_size + 1234):
+            data = os.urandom(size)
+            path.write_bytes(data)
+            assert hashing.hash_file(path, 'blake2b-tree') == direct(data), size
+
+
+def test_compliance_prove_and_verify():
+    """Ledger entries get inclusion proofs that verify; tampering is caught."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            for i in range(5):
+                pathlib.Path(f'a{i}.csv').write_text(f'row,{i}\n')
+                runner.invoke(cli, ['compliance', 'onchain-commit', f'a{i}.csv'])
+
+            result = runner.invoke(cli, ['compliance', 'prove', 'a2.csv', '--out', 'p.json'])
+            assert result.exit_code == 0
+            proof = json.loads(pathlib.Path('p.json').read_text())
+            assert (proof['leaf_index'], proof['tree_size']) == (2, 5)
+            assert runner.invoke(cli, ['compliance', 'verify', 'p.json']).exit_code == 0
+
+            proof['entry']['sha256'] = '00' * 32
+            pathlib.Path('p.json').write_text(json.dumps(proof))
+            assert runner.invoke(cli, ['compliance', 'verify', 'p.json']).exit_code == 1
+
+            runner.invoke(cli, ['compliance', 'prove', '--consistency', '3', '--out', 'c.json'])
+            assert runner.invoke(cli, ['compliance', 'verify', 'c.json']).exit_code == 0
+
+
+def test_batch_onchain_commit_proves_members():
+    """A directory is anchored as one ledger entry with per-file proofs."""
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with runner.isolated_filesystem(temp_dir=tmpdir):
+            runner.invoke(cli, ['init', '--indication', 'NSCLC'])
+            release = pathlib.Path('release/sub')
+            release.mkdir(parents=True)
+            for i in range(7):
+                (release / f'part{i}.csv').write_text(f'id,{i}\n')
+            pathlib.Path('single.csv').write_text('x\n')
+            runner.invoke(cli, ['compliance', 'onchain-commit', 'single.csv'])
+
+            result = runner.invoke(cli, ['compliance', 'onchain-commit', 'release', '--label', 'dr1'])
+            assert result.exit_code == 0, result.output
+            root = pathlib.Path('.').resolve()
+            ledger = store.rows(root, 'ledger')
+            assert len(ledger) == 2 and ledger[1]['artifact'] == 'batch:dr1 (7 files)'
+
+            manifest = json.loads(next(pathlib.Path('.ctrepo/batches').glob('*.json')).read_text())
+            assert [f['path'] for f in manifest['files']][0] == 'release/sub/part0.csv'
+
+            result = runner.invoke(cli, ['compliance', 'prove', 'release/sub/part3.csv', '--out', 'p.json'])
+            proof = json.loads(pathlib.Path('p.json').read_text())
+            assert proof['type'] == 'batch-inclusion' and proof['batch_size'] == 7
+            assert runner.invoke(cli, ['compliance', 'verify', 'p.json']).exit_code == 0
+
+            proof['member']['sha256'] = '11' * 32
+            pathlib.Path('p.json').write_text(json.dumps(proof))
+            assert runner.invoke(cli, ['compliance', 'verify', 'p.json']).exit_code == 1
@@ -0,0 +1,41 @@
+"""Test the cached protocol validators."""
+
+import pathlib
+import tempfile
+
+import jsonschema
+import pytest
+
+from bst import validation
+
+SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'type': 'object',
+    'required': ['id'],
+    'properties': {'id': {'type': 'string'}, 'arms': {'type': 'array', 'items': {'type': 'string'}}},
+}
+
+
+def test_validators_are_shared_and_report_every_error():
+    """Equal schemas share one compiled validator; all errors are listed."""
+    assert validation.compile_schema(SCHEMA) is validation.compile_schema(dict(SCHEMA))
+    with pytest.raises(jsonschema.ValidationError):
+        validation.validate({'arms': []}, SCHEMA)
+    assert validation.errors({'id': 1, 'arms': ['a', 2]}, SCHEMA) == [
+        "arms/1: 2 is not of type 'string'",
+        "id: 1 is not of type 'string'",
+    ]
+
+
+def test_validate_files_batches_in_order():
+    """Batch validation keeps file order and reports unreadable YAML."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = pathlib.Path(tmpdir)
+        (root / 'ok.yaml').write_text('id: a\n')
+        (root / 'bad.yaml').write_text('arms: [x]\n')
+        (root / 'broken.yaml').write_text('id: [\n')
+        paths = [root / 'ok.yaml', root / 'bad.yaml', root / 'broken.yaml']
+        results = validation.validate_files(paths, SCHEMA)
+        assert results[0] == []
+        assert results[1] == ["<root>: 'id' is a required property"]
+        assert results[2][0].startswith('cannot read protocol')